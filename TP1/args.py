@@ -1,4 +1,5 @@
-import argparse
+import argparse, os
+from src.analizador import crear_costo
 
 def set_args():
     parser = argparse.ArgumentParser(
@@ -7,7 +8,56 @@ def set_args():
     )
     
     parser.add_argument("-n", "--num", type=int, default=60, required=False, help="Indica la cantidad de datos que se generan.")
+    parser.add_argument("-w", "--ventana", type=int, default=30, required=False, help="Tamaño de la ventana deslizante de cada analizador.")
+    parser.add_argument("-b", "--binario", action="store_true", help="Enviar los datos del generador a los analizadores en formato binario de tamaño fijo en lugar de JSON.")
+    parser.add_argument("-t", "--transporte", choices=("pipe", "shm"), default="pipe", help="Transporte entre el generador y los analizadores: un pipe por analizador o un único anillo en memoria compartida (implica --binario).")
+    parser.add_argument("--resultados", choices=("cola", "shm"), default="cola", help="Cómo llegan los resultados de los analizadores al verificador: como JSON por la Queue o como registros binarios en casillas de memoria compartida, con avisos por la Queue.")
+    parser.add_argument("--sin-barrera", action="store_true", help="No sincronizar a los analizadores después de cada dato; el verificador reordena los resultados por número de secuencia.")
+    parser.add_argument("--profundidad", type=int, default=8, required=False, help="Con --sin-barrera, cantidad máxima de rondas que un analizador puede adelantarse al verificador (0 = sin límite).")
+    parser.add_argument("--cola", type=int, default=0, required=False, help="Cantidad máxima de mensajes en la cola de resultados hacia el verificador; si se llena, los analizadores esperan (0 = sin límite).")
+    parser.add_argument("--capacidad", type=int, default=0, required=False, help="Cantidad máxima de mensajes sin leer en la entrada de cada analizador (créditos del generador; con -t shm, capacidad del anillo). 0 = sin límite explícito.")
+    parser.add_argument("--contrapresion", choices=("bloquear", "descartar", "coalescer"), default="bloquear", help="Qué hace el generador cuando algún analizador tiene la entrada llena (--capacidad): esperar, descartar el dato pendiente más viejo o juntar los pendientes en una sola actualización de la ventana. descartar y coalescer requieren --capacidad, -t pipe y --lote 1.")
+    parser.add_argument("--tasa", "--rate", type=float, default=1.0, required=False, help="Datos generados por segundo (0 = tan rápido como sea posible).")
+    parser.add_argument("--lote", "--batch", type=int, default=1, required=False, help="Cantidad de datos por mensaje entre generador, analizadores y verificador.")
+    parser.add_argument("--almacen", choices=("json", "jsonl"), default="json", help="Cómo guarda el verificador la cadena: reescribiendo blockchain.json en cada bloque o agregando líneas a blockchain.jsonl (al terminar se exporta a blockchain.json).")
+    parser.add_argument("--fsync", type=int, default=0, required=False, help="Con --almacen jsonl, cada cuántos bloques se fuerza la escritura a disco (0 = solo al terminar).")
+    parser.add_argument("--checkpoints", type=int, default=0, required=False, help="Cada cuántos bloques se guarda un checkpoint con raíz de Merkle en blockchain.checkpoints.jsonl (0 = desactivado).")
+    parser.add_argument("--reanudar", action="store_true", help="Seguir agregando bloques a la cadena existente (por ejemplo, después de un corte) en lugar de empezar una nueva. Con --almacen jsonl solo se verifican los bloques posteriores al último registrado en blockchain.jsonl.idx.")
+    parser.add_argument("--offsets", action="store_true", help="Mantener el índice de offsets de la cadena (blockchain.json.offsets o blockchain.jsonl.offsets) para consultar bloques por número o timestamp con consultar_cadena.py.")
+    parser.add_argument("--reglas", default=None, required=False, help="Archivo JSON con las reglas de alerta del verificador (umbrales, ventanas e histéresis). Por defecto, los límites de la consigna.")
+    parser.add_argument("--senales", nargs="+", choices=("variabilidad", "tendencia", "espectro"), default=[], help="Agregar analizadores de procesamiento de señales sobre la ventana: variabilidad (RMSSD y SDNN), tendencia (pendiente por minuto de cada canal) y espectro (potencia en bandas VLF/LF/HF). Sus métricas se guardan en el cuerpo del bloque.")
+    parser.add_argument("--costo", default="aleatorio", required=False, metavar="MODELO[:PARAMETRO]", help="Costo simulado del cálculo de cada analizador: ninguno, fijo:SEGUNDOS, aleatorio (hasta 3 segundos, por defecto) o fft:REPETICIONES (carga de CPU real con FFT sobre la ventana).")
+    parser.add_argument("--pool", type=int, nargs="?", const=os.cpu_count(), default=None, metavar="PROCESOS", help="En lugar de un proceso por tipo de analizador, un coordinador reparte por cada dato una tarea por tipo entre un pool de PROCESOS procesos (por defecto, la cantidad de CPUs). --profundidad limita las rondas en vuelo.")
+    parser.add_argument("--asyncio", action="store_true", help="Correr generador, analizadores y verificador como corrutinas de asyncio en un solo proceso (el costo del análisis corre en un executor). --profundidad acota la cola de cada analizador.")
+    parser.add_argument("--stats", type=float, nargs="?", const=0, default=None, metavar="SEGUNDOS", help="Medir latencias por etapa (p50/p95/p99), pendientes en pipes y cola y bloques por segundo, y mostrarlas al terminar (y cada SEGUNDOS si se indica).")
+    parser.add_argument("--pacientes", type=int, default=0, required=False, help="Monitorear P pacientes con trabajadores que atienden a varios pacientes cada uno, con una cadena por paciente (0 = un solo flujo con generador, 3 analizadores y verificador).")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), required=False, help="Con --pacientes, cantidad de procesos trabajadores (por defecto, la cantidad de CPUs).")
+    parser.add_argument("--rebalanceo", type=float, default=5.0, required=False, help="Con --pacientes, cada cuántos segundos se revisa la carga de CPU de los trabajadores para mover pacientes (0 = desactivado).")
+    parser.add_argument("--directorio", default="cadenas", required=False, help="Con --pacientes, directorio donde se guarda la cadena de cada paciente.")
     parser.add_argument("-v", "--verbose", action="store_true", help="Modo verboso")
 
     args = parser.parse_args()
+    if args.cola < 0 or args.capacidad < 0:
+        parser.error("--cola y --capacidad no pueden ser negativos")
+    if args.contrapresion != "bloquear":
+        if args.capacidad == 0:
+            parser.error(f"--contrapresion {args.contrapresion} requiere --capacidad")
+        if args.transporte != "pipe" or args.lote != 1 or args.pool is not None or args.asyncio or args.pacientes:
+            parser.error(f"--contrapresion {args.contrapresion} solo se puede usar con -t pipe, --lote 1 y un proceso por analizador")
+    if args.resultados == "shm" and (args.pool is not None or args.asyncio or args.pacientes):
+        parser.error("--resultados shm requiere un proceso por analizador")
+    if args.pacientes:
+        # Los trabajadores guardan cada paciente en su propio .jsonl y calculan sin costo simulado
+        ignoradas = [opcion for opcion, usada in (
+            ("--almacen", args.almacen != "json"), ("--checkpoints", args.checkpoints), ("--offsets", args.offsets),
+            ("--costo", args.costo != "aleatorio"), ("--reanudar", args.reanudar), ("--senales", args.senales),
+        ) if usada]
+        if ignoradas:
+            parser.error(f"--pacientes no admite {', '.join(ignoradas)}")
+    try:
+        crear_costo(args.costo)
+    except ValueError:
+        parser.error(f"--costo inválido: {args.costo} (ninguno, fijo:SEGUNDOS, aleatorio o fft:REPETICIONES)")
+    if args.asyncio and args.capacidad:
+        parser.error("con --asyncio la entrada de cada analizador se acota con --profundidad")
     return args
\ No newline at end of file
@@ -0,0 +1,190 @@
+import argparse, json, os, subprocess, sys, tempfile, time, platform, resource, runpy
+from itertools import product
+
+# Benchmark del pipeline real de main.py. Cada configuración se corre en un proceso aparte
+# (`--interno`) que mide cuánto tarda cada escritura de la cadena y el pico de memoria (RSS) de
+# cada proceso, y guarda el reporte de `src.metricas` para obtener las latencias de punta a punta.
+# El costo del cálculo de los analizadores se elige con `--costo` de main.py (por defecto ninguno).
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+
+def instrumentar(salida:str):
+    '''
+    Parchea el pipeline dentro del proceso que corre main.py (y, por fork, en sus hijos) para
+    medir el tiempo de escritura de la cadena y el RSS máximo por proceso.
+    Cada proceso escribe sus mediciones en `salida/<pid>.json` al terminar.
+    '''
+    sys.path.insert(0, DIRECTORIO)
+    from multiprocessing import Process, current_process
+    import src.almacenamiento, src.metricas
+
+    escritura = {'segundos': 0.0, 'bloques': 0}
+
+    def medir(agregar):
+        def agregar_medido(self, bloque):
+            inicio = time.perf_counter()
+            agregar(self, bloque)
+            escritura['segundos'] += time.perf_counter() - inicio
+            escritura['bloques'] += 1
+        return agregar_medido
+    for almacen in (src.almacenamiento.AlmacenJSON, src.almacenamiento.AlmacenJSONL):
+        almacen.agregar = medir(almacen.agregar)
+
+    def guardar_proceso():
+        with open(os.path.join(salida, f'{os.getpid()}.json'), 'w') as f:
+            json.dump({
+                'proceso': current_process().name,
+                'rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                'escritura': escritura,
+            }, f)
+
+    run = Process.run
+    def run_medido(self):
+        try:
+            run(self)
+        finally:
+            guardar_proceso()
+    Process.run = run_medido
+
+    liberar = src.metricas.Metricas.liberar
+    def liberar_guardando(self):
+        with open(os.path.join(salida, 'metricas.json'), 'w') as f:
+            json.dump(self.reporte(), f)
+        liberar(self)
+    src.metricas.Metricas.liberar = liberar_guardando
+    return guardar_proceso
+
+def correr_interno(salida:str, argumentos:list):
+    guardar_proceso = instrumentar(salida)
+    sys.argv = ['main.py'] + argumentos
+    try:
+        runpy.run_path(os.path.join(DIRECTORIO, 'main.py'), run_name='__main__')
+    finally:
+        guardar_proceso()
+
+def configuraciones(muestras:list, ventanas:list, transportes:list, almacenes:list, lotes:list, costos:tuple=('ninguno',)) -> list:
+    '''
+    Devuelve todas las combinaciones de parámetros a medir.
+    '''
+    return [
+        {'muestras': n, 'ventana': w, 'transporte': t, 'almacen': a, 'lote': l, 'costo': c}
+        for n, w, t, a, l, c in product(muestras, ventanas, transportes, almacenes, lotes, costos)
+    ]
+
+def correr(configuracion:dict, timeout:float=600) -> dict:
+    '''
+    Corre main.py con una configuración, en un directorio temporal, y devuelve sus mediciones.
+    '''
+    with tempfile.TemporaryDirectory() as trabajo:
+        salida = os.path.join(trabajo, 'mediciones')
+        os.mkdir(salida)
+        argumentos = [
+            '-n', str(configuracion.get('muestras')),
+            '-w', str(configuracion.get('ventana')),
+            # El transporte 'asyncio' es la variante en un solo proceso de main.py --asyncio
+            *(['--asyncio'] if configuracion.get('transporte') == 'asyncio' else ['-t', configuracion.get('transporte')]),
+            '--almacen', configuracion.get('almacen'),
+            '--lote', str(configuracion.get('lote')),
+            '--costo', configuracion.get('costo', 'ninguno'),
+            '--tasa', '0', '--stats',
+        ]
+        inicio = time.perf_counter()
+        subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--interno', salida, '--'] + argumentos,
+            cwd=trabajo, check=True, timeout=timeout, stdout=subprocess.DEVNULL
+        )
+        segundos = time.perf_counter() - inicio
+
+        with open(os.path.join(salida, 'metricas.json')) as f:
+            metricas = json.load(f)
+        procesos = []
+        for nombre in sorted(os.listdir(salida)):
+            if nombre != 'metricas.json':
+                with open(os.path.join(salida, nombre)) as f:
+                    procesos.append(json.load(f))
+    escritura = next((p.get('escritura') for p in procesos if p.get('escritura').get('bloques')), {'segundos': 0.0, 'bloques': 0})
+    bloques = escritura.get('bloques')
+    return {
+        'configuracion': configuracion,
+        'segundos': segundos,
+        'muestras_por_segundo': configuracion.get('muestras') / segundos,
+        'bloques_por_segundo': metricas.get('bloques_por_segundo'),
+        'latencias': metricas.get('latencias'),
+        'rss_kb': {p.get('proceso'): p.get('rss_kb') for p in procesos},
+        'escritura': {
+            'segundos': escritura.get('segundos'),
+            'por_bloque': escritura.get('segundos') / bloques if bloques else None,
+        },
+    }
+
+def comparar(anterior:list, actual:list) -> list:
+    '''
+    Compara dos corridas (listas de resultados de `correr`) configuración por configuración.
+
+    Returns
+    -------
+    list
+        (configuracion, muestras/s anterior, muestras/s actual, actual / anterior) por cada
+        configuración que está en ambas corridas.
+    '''
+    clave = lambda resultado: json.dumps(resultado.get('configuracion'), sort_keys=True)
+    previos = {clave(resultado): resultado for resultado in anterior}
+    comparacion = []
+    for resultado in actual:
+        previo = previos.get(clave(resultado))
+        if previo is not None:
+            antes, ahora = previo.get('muestras_por_segundo'), resultado.get('muestras_por_segundo')
+            comparacion.append((resultado.get('configuracion'), antes, ahora, ahora / antes))
+    return comparacion
+
+def version() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=DIRECTORIO, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+if __name__ == '__main__':
+    if len(sys.argv) > 2 and sys.argv[1] == '--interno':
+        # python3 benchmark.py --interno <directorio de mediciones> -- <argumentos de main.py>
+        correr_interno(sys.argv[2], sys.argv[4:])
+        sys.exit(0)
+
+    parser = argparse.ArgumentParser(
+        prog='python3 benchmark.py',
+        description="Mide el pipeline de main.py con distintas configuraciones y guarda los resultados en JSON."
+    )
+    parser.add_argument("-n", "--muestras", type=int, nargs="+", default=[100, 1000], help="Cantidades de datos a generar.")
+    parser.add_argument("-w", "--ventanas", type=int, nargs="+", default=[30], help="Tamaños de ventana.")
+    parser.add_argument("-t", "--transportes", nargs="+", choices=("pipe", "shm", "asyncio"), default=["pipe", "shm"], help="Transportes entre generador y analizadores (asyncio: todo el pipeline en un solo proceso).")
+    parser.add_argument("--almacenes", nargs="+", choices=("json", "jsonl"), default=["jsonl"], help="Almacenamientos de la cadena.")
+    parser.add_argument("--lotes", type=int, nargs="+", default=[1], help="Tamaños de lote.")
+    parser.add_argument("--costos", nargs="+", default=["ninguno"], help="Modelos de costo de los analizadores (main.py --costo), por ejemplo ninguno fft:10.")
+    parser.add_argument("-o", "--salida", default="benchmark.json", help="Archivo JSON donde se guardan los resultados.")
+    parser.add_argument("--comparar", default=None, metavar="ANTERIOR", help="Resultados de una corrida anterior para comparar las muestras por segundo.")
+    args = parser.parse_args()
+
+    resultados = []
+    for configuracion in configuraciones(args.muestras, args.ventanas, args.transportes, args.almacenes, args.lotes, args.costos):
+        resultado = correr(configuracion)
+        resultados.append(resultado)
+        total = resultado.get('latencias').get('total')
+        print(f"[+] {configuracion}: {resultado.get('muestras_por_segundo'):.1f} muestras/s, "
+              f"latencia p50 {total.get('p50') * 1000:.2f} ms / p99 {total.get('p99') * 1000:.2f} ms, "
+              f"escritura {resultado.get('escritura').get('por_bloque') * 1e6:.0f} us/bloque")
+
+    with open(args.salida, 'w') as f:
+        json.dump({
+            'version': version(),
+            'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            'cpus': os.cpu_count(),
+            'resultados': resultados,
+        }, f, indent=2)
+    print(f'[+] Resultados guardados en {args.salida}')
+
+    if args.comparar:
+        with open(args.comparar) as f:
+            anterior = json.load(f).get('resultados')
+        for configuracion, antes, ahora, relacion in comparar(anterior, resultados):
+            print(f'[{"!" if relacion < 0.9 else "+"}] {configuracion}: {antes:.1f} -> {ahora:.1f} muestras/s ({relacion:.2f}x)')
@@ -0,0 +1,47 @@
+import argparse, json, os, sys
+from src.consultas import CadenaIndexada, epoch, ruta_offsets
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        prog='python3 consultar_cadena.py',
+        description="Lee bloques de una cadena por número o por timestamp usando su índice de offsets (main.py --offsets), sin recorrer la cadena. Muestra un bloque por línea en JSON compacto, con su número en el campo 'numero'."
+    )
+    parser.add_argument("-c", "--cadena", default="blockchain.json", help="Cadena a consultar (blockchain.json o blockchain.jsonl); el índice es <cadena>.offsets.")
+    consulta = parser.add_mutually_exclusive_group(required=True)
+    consulta.add_argument("--bloque", type=int, default=None, help="Número de bloque (desde 0).")
+    consulta.add_argument("--en", default=None, metavar="TIMESTAMP", help="El último bloque con timestamp anterior o igual a TIMESTAMP (YYYY-MM-DDTHH:MM:SS).")
+    consulta.add_argument("--rango", nargs=2, default=None, metavar=("DESDE", "HASTA"), help="Los bloques con timestamp entre DESDE y HASTA (incluidos; '-' = sin límite).")
+    parser.add_argument("--desplazamiento", type=int, default=0, required=False, help="Con --rango, cantidad de bloques del rango que se saltean.")
+    parser.add_argument("--limite", type=int, default=100, required=False, help="Con --rango, cantidad máxima de bloques que se muestran (0 = todos).")
+    args = parser.parse_args()
+
+    if not os.path.exists(ruta_offsets(args.cadena)):
+        parser.error(f"no existe el índice {ruta_offsets(args.cadena)} (correr main.py con --offsets)")
+    if args.desplazamiento < 0 or args.limite < 0:
+        parser.error("--desplazamiento y --limite no pueden ser negativos")
+    for timestamp in [args.en] + (args.rango or []):
+        try:
+            if timestamp not in (None, '-'):
+                epoch(timestamp)
+        except ValueError:
+            parser.error(f"timestamp inválido: {timestamp}")
+
+    with CadenaIndexada(args.cadena) as cadena:
+        if args.bloque is not None:
+            if not 0 <= args.bloque < len(cadena):
+                parser.error(f"el bloque {args.bloque} no está en el índice ({len(cadena)} bloques)")
+            print(json.dumps(dict(cadena.bloque(args.bloque), numero=args.bloque), separators=(',', ':')))
+        elif args.en is not None:
+            numero = cadena.buscar(args.en)
+            if numero < 0:
+                parser.error(f"no hay bloques anteriores a {args.en}")
+            print(json.dumps(dict(cadena.bloque(numero), numero=numero), separators=(',', ':')))
+        else:
+            desde, hasta = (None if valor == '-' else valor for valor in args.rango)
+            inicio, fin = cadena.rango(desde, hasta)
+            primero = inicio + args.desplazamiento
+            ultimo = fin if args.limite == 0 else min(fin, primero + args.limite)
+            for numero, bloque in enumerate(cadena.bloques(primero, ultimo), start=primero):
+                print(json.dumps(dict(bloque, numero=numero), separators=(',', ':')))
+            mostrados = f'Bloques {primero}-{ultimo - 1}' if ultimo > primero else 'Ningún bloque'
+            print(f'[+] {mostrados} ({fin - inicio} en el rango)', file=sys.stderr)
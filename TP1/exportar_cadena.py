@@ -0,0 +1,23 @@
+import argparse
+from src.almacenamiento import exportar_json
+from src.columnar import exportar_columnas
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        prog='python3 exportar_cadena.py',
+        description="Compacta una cadena guardada en JSON Lines (main.py --almacen jsonl) al formato de blockchain.json, o exporta una cadena a un archivo columnar para análisis."
+    )
+    parser.add_argument("-i", "--entrada", default=None, help="Cadena a exportar (por defecto blockchain.jsonl; con -f columnas, blockchain.json o una cadena .jsonl).")
+    parser.add_argument("-o", "--salida", default=None, help="Archivo JSON a generar (por defecto blockchain.json) o directorio del archivo columnar (por defecto blockchain.columnas).")
+    parser.add_argument("-f", "--formato", choices=("json", "columnas"), default="json", help="json: formato de blockchain.json; columnas: un .npy por métrica más metadatos, con los bloques válidos de la cadena (src/columnar.py).")
+    args = parser.parse_args()
+
+    if args.formato == 'columnas':
+        entrada = args.entrada or 'blockchain.json'
+        salida = args.salida or 'blockchain.columnas'
+        metadatos = exportar_columnas(entrada, salida)
+        print(f'[+] {metadatos.get("validos")} bloques válidos de {metadatos.get("bloques")} exportados a {salida}/ ({len(metadatos.get("columnas"))} columnas)')
+    else:
+        salida = args.salida or 'blockchain.json'
+        cantidad = exportar_json(args.entrada or 'blockchain.jsonl', salida)
+        print(f'[+] {cantidad} bloques exportados a {salida}')
@@ -1,36 +1,148 @@
-from multiprocessing import Process, Pipe, Queue, Value, Condition
-from src.analizador import analizar
+from multiprocessing import Process, Pipe, Queue, Value, Condition, Semaphore, Array
+import os, asyncio
+from src.analizador import analizar, TIPOS, TIPOS_BASE
 from src.generador import generar
 from src.verificador import verificar
+from src.memoria_compartida import AnilloCompartido, ResultadosCompartidos
+from src.almacenamiento import exportar_json
+from src.alertas import cargar_reglas
+from src.pacientes import trabajar, supervisar
+from src.pool import coordinar
+from src.asincrono import pipeline
+from src.metricas import Metricas, formatear_reporte
+from src.contrapresion import Contrapresion
 from args import set_args
 
+def monitorear_pacientes(args, reglas):
+    '''
+    Topología con varios pacientes: `args.workers` trabajadores atienden a `args.pacientes`
+    pacientes, repartidos por el supervisor (este proceso) según la carga de CPU.
+    '''
+    os.makedirs(args.directorio, exist_ok=True)
+    respuestas = Queue()
+    cpu = Array('d', args.workers)
+    pipes = [Pipe(duplex=False) for _ in range(args.workers)]
+    trabajadores = [
+        Process(target=trabajar, args=(pipes[i][0], respuestas, i, cpu, args.directorio, args.ventana, reglas, args.verbose), name=f'Trabajador-{i}') for i in range(args.workers)
+    ]
+    for p in trabajadores:
+        p.start()
+    bloques = supervisar([p[1] for p in pipes], respuestas, cpu, args.pacientes, args.num, args.tasa, args.rebalanceo, args.verbose)
+    for p in trabajadores:
+        p.join()
+    print(f'[+] {len(bloques)} pacientes, {sum(bloques.values())} bloques en {args.directorio}/')
+
+def monitorear_asyncio(args, reglas, tipos):
+    '''
+    Variante en un solo proceso (`src.asincrono`): las mismas etapas como corrutinas de asyncio.
+    '''
+    metricas = Metricas(analizadores=len(TIPOS)) if args.stats is not None else None
+    asyncio.run(pipeline(args.num, tipos, args.tasa, args.ventana, args.costo, args.almacen, args.fsync, args.checkpoints, reglas, args.profundidad, args.verbose, metricas, args.reanudar, args.offsets, args.cola))
+    if metricas is not None:
+        print(formatear_reporte(metricas.reporte()))
+        metricas.liberar()
+    if args.almacen == 'jsonl':
+        print(f'[+] {exportar_json(offsets=args.offsets)} bloques exportados a blockchain.json')
+
 if __name__ == "__main__":
     args = set_args()
     
     print(f'[+] Modo verboso: {"Activo" if args.verbose else "Inactivo"} - Datos a generar: {args.num} datos.')
     
+    # Se leen antes de iniciar los procesos para que un archivo inválido falle de entrada
+    reglas = cargar_reglas(args.reglas) if args.reglas else None
+    if args.pacientes > 0:
+        monitorear_pacientes(args, reglas)
+        raise SystemExit
+
+    # Un analizador por cada tipo base y por cada tipo de procesamiento de señales pedido
+    tipos = TIPOS_BASE + tuple(args.senales)
+    if args.asyncio:
+        monitorear_asyncio(args, reglas, tipos)
+        raise SystemExit
+
     n = args.num
-    q = Queue()
+    q = Queue(maxsize=args.cola)
     done_count = Value('i', 0)
     cond = Condition()
+    creditos = [None] * len(tipos)
+    if args.sin_barrera:
+        # Sin barrera global: cada analizador avanza hasta `profundidad` rondas por delante del verificador
+        done_count, cond = None, None
+        if args.profundidad > 0:
+            # Un analizador necesita créditos para un lote completo antes de enviarlo
+            creditos = [Semaphore(max(args.profundidad, args.lote)) for _ in tipos]
 
-    pipes = [Pipe(duplex=False) for _ in range(3)]
-    generador_pipes = [p[1] for p in pipes]
-    analizador_pipes = [p[0] for p in pipes]
+    # Con --pool un único coordinador lee del generador y reparte los tipos entre el pool
+    lectores = 1 if args.pool is not None else len(tipos)
+    anillo = None
+    binario = args.binario
+    contrapresion = None
+    if args.transporte == 'shm':
+        # Un solo segmento compartido: el generador escribe una vez y cada analizador lee con su cursor.
+        # El anillo ya tiene su propio límite (el generador espera al lector más lento)
+        anillo = AnilloCompartido(lectores=lectores, capacidad=args.capacidad or 1024)
+        generador_pipes = [anillo.escritor()]
+        analizador_pipes = [anillo.lector(i) for i in range(lectores)]
+        binario = True
+    else:
+        pipes = [Pipe(duplex=False) for _ in range(lectores)]
+        generador_pipes = [p[1] for p in pipes]
+        analizador_pipes = [p[0] for p in pipes]
+        if args.capacidad > 0:
+            contrapresion = Contrapresion(lectores, args.contrapresion, args.capacidad)
+    entradas = [None if contrapresion is None else contrapresion.entrada(i) for i in range(lectores)]
+    # Si se descartan o coalescen datos no se sabe cuántas rondas habrá: se termina con mensajes de fin
+    rondas = None if contrapresion is not None and contrapresion.fin_explicito else n
+    # Un mensaje coalescido trae hasta `capacidad` datos (el anillo no tiene mensajes: se lee de a lote)
+    datos_por_mensaje = args.capacidad if args.contrapresion == 'coalescer' else args.lote
 
-    gen = Process(target=generar, args=(n,generador_pipes,args.verbose), name='Generador')
-    tipos = ('frecuencia', 'presion', 'oxigeno')
-    proc_analizadores = [
-        Process(target=analizar, args=(analizador_pipes[i], q, tipos[i], n, done_count, cond, 3, args.verbose), name=f"Analizador-{tipos[i]}") for i in range(3)
-    ]
-    verificador = Process(target=verificar ,args=(q,args.num,args.verbose))
+    # Casillas para 1024 resultados sin leer por tipo (al menos un lote); si se llenan, el analizador espera
+    resultados = ResultadosCompartidos(tipos, max(1024, args.lote)) if args.resultados == 'shm' else None
+
+    # Una fila de métricas por cada tipo posible (cada analizador usa la de su tipo)
+    metricas = Metricas(analizadores=len(TIPOS)) if args.stats is not None else None
+
+    gen = Process(target=generar, args=(n,generador_pipes,args.verbose,binario,args.tasa,args.lote,metricas,contrapresion), name='Generador')
+    if args.pool is not None:
+        proc_analizadores = [
+            Process(target=coordinar, args=(analizador_pipes[0], q, tipos, n, args.pool, args.verbose, args.ventana, binario, args.lote, metricas, args.costo, args.profundidad, entradas[0]), name='Coordinador')
+        ]
+        creditos = [None]
+    else:
+        proc_analizadores = [
+            Process(target=analizar, args=(analizador_pipes[i], q, tipos[i], rondas, done_count, cond, len(tipos), args.verbose, args.ventana, binario, creditos[i], args.lote, metricas, args.costo, entradas[i], datos_por_mensaje, resultados), name=f"Analizador-{tipos[i]}") for i in range(len(tipos))
+        ]
+    verificador = Process(target=verificar ,args=(q,rondas,args.verbose,creditos if creditos[0] is not None else None,args.almacen,args.fsync,args.checkpoints,reglas,metricas,len(tipos),args.reanudar,args.offsets,resultados), name='Verificador')
 
     gen.start()
     for p in proc_analizadores:
         p.start()
     verificador.start()
  
+    if metricas is not None and args.stats > 0:
+        # Reporte periódico mientras el verificador siga escribiendo bloques
+        verificador.join(args.stats)
+        while verificador.is_alive():
+            print(formatear_reporte(metricas.reporte()))
+            verificador.join(args.stats)
     gen.join()
     for p in proc_analizadores:
         p.join()
     verificador.join()
+
+    if anillo is not None:
+        anillo.liberar()
+    if resultados is not None:
+        resultados.liberar()
+
+    if contrapresion is not None:
+        print(f'[+] Contrapresión ({contrapresion.politica}, capacidad {contrapresion.capacidad}): {contrapresion.mensajes} rondas, {contrapresion.descartados} datos descartados, {contrapresion.coalescidos} coalescidos')
+
+    if metricas is not None:
+        print(formatear_reporte(metricas.reporte()))
+        metricas.liberar()
+
+    if args.almacen == 'jsonl':
+        # Se compacta una sola vez al final para que verificar_cadena.py lea el formato de siempre
+        print(f'[+] {exportar_json(offsets=args.offsets)} bloques exportados a blockchain.json')
@@ -0,0 +1,156 @@
+import json
+import numpy as np
+
+# Canales sobre los que se pueden definir reglas (columnas de las matrices de `matriz_rondas`)
+CANALES = ('frecuencia', 'sistolica', 'diastolica', 'oxigeno')
+
+OPERADORES = {
+    '>': np.greater,
+    '>=': np.greater_equal,
+    '<': np.less,
+    '<=': np.less_equal,
+}
+
+# Los límites de seguridad de la consigna (los mismos que evaluaba `alertar` con if/elif)
+REGLAS_POR_DEFECTO = [
+    {'canal': 'frecuencia', 'op': '>', 'umbral': 200},
+    {'canal': 'sistolica', 'op': '>', 'umbral': 200},
+    {'canal': 'diastolica', 'op': '<', 'umbral': 50},
+    {'canal': 'oxigeno', 'op': '<=', 'umbral': 90},
+    {'canal': 'oxigeno', 'op': '>=', 'umbral': 100},
+]
+
+def _fila(medias:dict) -> list:
+    # Un canal que falta vale 0, igual que en la versión original de `alertar`
+    presion = medias.get('presion') or [0, 0]
+    return [medias.get('frecuencia', 0), presion[0], presion[1], medias.get('oxigeno', 0)]
+
+def matriz_rondas(rondas:list) -> np.ndarray:
+    '''
+    Arma la matriz de medias (una fila por ronda, una columna por canal de `CANALES`) a partir
+    de rondas de resultados de los analizadores (listas de dicts con 'tipo' y 'media').
+    '''
+    filas = [_fila({dato.get('tipo'): dato.get('media') for dato in datos}) for datos in rondas]
+    return np.array(filas, dtype=np.float64).reshape(len(filas), len(CANALES))
+
+def matriz_bloques(bloques:list) -> np.ndarray:
+    '''
+    Igual que `matriz_rondas`, pero a partir de bloques de la cadena (para evaluar las reglas
+    sobre una cadena ya guardada).
+    '''
+    filas = [_fila({tipo: dato.get('media') for tipo, dato in bloque.get('datos').items()}) for bloque in bloques]
+    return np.array(filas, dtype=np.float64).reshape(len(filas), len(CANALES))
+
+def cargar_reglas(ruta:str) -> list:
+    '''
+    Lee un conjunto de reglas de un archivo JSON (una lista con el formato de `REGLAS_POR_DEFECTO`).
+    Lanza ValueError si alguna regla no es válida.
+    '''
+    with open(ruta, 'r', encoding='utf-8') as f:
+        reglas = json.load(f)
+    if not isinstance(reglas, list):
+        raise ValueError
+    MotorAlertas(reglas) # Valida las reglas
+    return reglas
+
+class MotorAlertas:
+    '''
+    Evalúa un conjunto declarativo de reglas sobre muchas rondas a la vez con operaciones
+    vectorizadas de NumPy, sin recorrer los datos de a un dict.
+
+    Cada regla es un dict con:
+
+    - 'canal': uno de `CANALES`.
+    - 'op': '>', '>=', '<' o '<='.
+    - 'umbral': la regla se activa cuando `media_ventana op umbral`.
+    - 'ventana' (opcional, 1): se compara la media de las últimas `ventana` rondas del canal.
+    - 'histeresis' (opcional, 0): una vez activa, la regla sigue activa hasta que el valor vuelve
+      a cruzar el umbral por más de `histeresis` (evita alertas intermitentes alrededor del umbral).
+
+    El motor guarda el estado de las ventanas y de la histéresis entre llamadas, así que evaluar
+    una cadena de a tramos da el mismo resultado que evaluarla de una vez.
+
+    Parameters
+    ----------
+    reglas : list
+        Lista de reglas. Por defecto, `REGLAS_POR_DEFECTO`.
+    '''
+    def __init__(self, reglas:list=None):
+        reglas = REGLAS_POR_DEFECTO if reglas is None else reglas
+        self.reglas = []
+        for regla in reglas:
+            canal, op = regla.get('canal'), regla.get('op')
+            ventana = int(regla.get('ventana', 1))
+            histeresis = float(regla.get('histeresis', 0))
+            if canal not in CANALES or op not in OPERADORES or 'umbral' not in regla or ventana < 1 or histeresis < 0:
+                raise ValueError
+            umbral = float(regla.get('umbral'))
+            # Para > y >= la regla se libera por debajo de umbral - histeresis; para < y <=, por encima
+            signo = 1 if op in ('>', '>=') else -1
+            self.reglas.append({
+                'columna': CANALES.index(canal),
+                'comparar': OPERADORES[op],
+                'umbral': umbral,
+                'liberacion': umbral - signo * histeresis,
+                'ventana': ventana,
+            })
+        self.reiniciar()
+
+    def reiniciar(self):
+        '''
+        Olvida las ventanas y el estado de histéresis (por ejemplo, para evaluar otra cadena).
+        '''
+        self.historial = [np.empty(0) for _ in self.reglas]
+        self.activas = np.zeros(len(self.reglas), dtype=bool)
+
+    def _promedios(self, i:int, valores:np.ndarray) -> np.ndarray:
+        # Media móvil de `ventana` rondas con sumas acumuladas, incluyendo las rondas de llamadas anteriores
+        ventana = self.reglas[i].get('ventana')
+        if ventana == 1:
+            return valores
+        previos = self.historial[i]
+        extendidos = np.concatenate((previos, valores))
+        acumulado = np.concatenate(([0.0], np.cumsum(extendidos)))
+        fin = np.arange(len(previos), len(extendidos)) + 1
+        inicio = np.maximum(0, fin - ventana)
+        self.historial[i] = extendidos[-(ventana - 1):]
+        return (acumulado[fin] - acumulado[inicio]) / (fin - inicio)
+
+    def evaluar(self, matriz:np.ndarray) -> np.ndarray:
+        '''
+        Evalúa todas las reglas sobre un lote de rondas.
+
+        Parameters
+        ----------
+        matriz : np.ndarray
+            Matriz de medias de `matriz_rondas` o `matriz_bloques` (n x len(CANALES)).
+
+        Returns
+        -------
+        np.ndarray
+            Matriz booleana n x len(reglas): si cada regla está activa en cada ronda.
+        '''
+        n = len(matriz)
+        resultado = np.zeros((n, len(self.reglas)), dtype=bool)
+        if n == 0:
+            return resultado
+        posiciones = np.arange(n)
+        for i, regla in enumerate(self.reglas):
+            valores = self._promedios(i, matriz[:, regla.get('columna')])
+            comparar = regla.get('comparar')
+            activa = comparar(valores, regla.get('umbral'))
+            liberada = ~comparar(valores, regla.get('liberacion'))
+            # El estado en cada ronda lo decide el último evento (activación o liberación) hasta
+            # esa ronda; si todavía no hubo ninguno en el lote se mantiene el estado anterior
+            ultima_activacion = np.maximum.accumulate(np.where(activa, posiciones, -1))
+            ultima_liberacion = np.maximum.accumulate(np.where(liberada, posiciones, -1))
+            sin_eventos = (ultima_activacion == -1) & (ultima_liberacion == -1)
+            resultado[:, i] = np.where(sin_eventos, self.activas[i], ultima_activacion > ultima_liberacion)
+        self.activas = resultado[-1].copy()
+        return resultado
+
+    def alertas(self, matriz:np.ndarray) -> np.ndarray:
+        '''
+        Devuelve un arreglo booleano con una posición por ronda: True si alguna regla está activa.
+        '''
+        return self.evaluar(matriz).any(axis=1)
@@ -0,0 +1,356 @@
+import json, os
+from os import fsync
+from src.blockchain import hash_valido
+from src.consultas import IndiceOffsets, ruta_offsets
+from typing import Any
+
+# Backends de almacenamiento de la cadena de bloques usados por el verificador:
+#   - 'json':  reescribe blockchain.json completo después de cada bloque (formato de la consigna).
+#   - 'jsonl': agrega cada bloque como una línea de blockchain.jsonl (JSON Lines), O(1) por bloque.
+#              `exportar_json` lo compacta al formato de blockchain.json para verificar_cadena.py.
+#
+# Ambos pueden continuar una cadena existente (`continuar=True`) en lugar de empezar desde el
+# bloque génesis. El backend 'jsonl' mantiene además un índice (<cadena>.idx) con la cantidad de
+# bloques, el offset del final del último bloque escrito a disco y su hash, para que al reanudar
+# solo haya que verificar los bloques escritos después.
+#
+# Con `offsets=True` los dos mantienen también el índice de offsets (<cadena>.offsets, ver
+# `src.consultas`) para leer bloques sueltos o buscarlos por timestamp sin recorrer la cadena.
+
+GENESIS = '0' * 64
+
+def ruta_indice(ruta:str) -> str:
+    return ruta + '.idx'
+
+def leer_lineas_finales(archivo:Any, fin:int, cantidad:int, tam_lectura:int=1 << 16) -> list:
+    '''
+    Lee hacia atrás las últimas `cantidad` líneas completas de un archivo binario que terminan en
+    el offset `fin` (que debe estar justo después de un salto de línea). El costo depende de las
+    líneas leídas, no del tamaño del archivo.
+    '''
+    if cantidad <= 0 or fin <= 0:
+        return []
+    pos = fin
+    buffer = b''
+    # Hace falta un salto de línea más que las líneas pedidas para saber dónde empieza la primera
+    while pos > 0 and buffer.count(b'\n') <= cantidad:
+        leer = min(tam_lectura, pos)
+        pos -= leer
+        archivo.seek(pos)
+        buffer = archivo.read(leer) + buffer
+    lineas = buffer.split(b'\n')[:-1]
+    if pos > 0:
+        lineas = lineas[1:] # La primera puede estar cortada
+    return lineas[-cantidad:]
+
+def texto_bloque_json(bloque:dict) -> str:
+    '''
+    Texto de un bloque dentro de blockchain.json: el mismo que escribe `json.dump(blockchain, f,
+    indent=4)`, con la indentación del arreglo. No depende de los otros bloques, así que cada uno
+    ocupa siempre el mismo lugar del archivo.
+    '''
+    return '\n'.join('    ' + linea for linea in json.dumps(bloque, indent=4).splitlines())
+
+def quitar_offsets(ruta:str):
+    '''
+    Borra el índice de offsets de una cadena que se va a empezar de nuevo.
+    '''
+    if os.path.exists(ruta_offsets(ruta)):
+        os.remove(ruta_offsets(ruta))
+
+def recuperar_jsonl(ruta:str) -> dict:
+    '''
+    Recupera el final de una cadena JSON Lines para seguir agregando bloques. Si el índice
+    (`ruta_indice`) coincide con la cadena se parte de él y solo se verifican los bloques
+    posteriores; si no existe o no coincide, se verifica la cadena completa.
+
+    Una última línea incompleta (el proceso murió mientras la escribía) se descarta. Lanza
+    ValueError si un bloque completo no encadena con el anterior o su hash no es válido.
+
+    Returns
+    -------
+    dict
+        {'bloques': int, 'offset': int, 'hash': str}: cantidad de bloques válidos, offset del
+        final del último y su hash (GENESIS si no hay bloques).
+    '''
+    estado = {'bloques': 0, 'offset': 0, 'hash': GENESIS}
+    if not os.path.exists(ruta):
+        return estado
+    with open(ruta, 'rb') as f:
+        try:
+            with open(ruta_indice(ruta), 'r', encoding='utf-8') as archivo_indice:
+                indice = json.load(archivo_indice)
+            # El índice vale si el bloque que termina en su offset es el que dice
+            ultima = leer_lineas_finales(f, indice.get('offset'), 1)
+            if indice.get('offset') <= os.path.getsize(ruta) and ultima and json.loads(ultima[0]).get('hash') == indice.get('hash'):
+                estado = {'bloques': indice.get('bloques'), 'offset': indice.get('offset'), 'hash': indice.get('hash')}
+        except (OSError, ValueError, TypeError, AttributeError):
+            pass
+        f.seek(estado.get('offset'))
+        for linea in f:
+            try:
+                bloque = json.loads(linea) if linea.endswith(b'\n') else None
+            except ValueError:
+                bloque = None
+            if bloque is None:
+                if f.read(1):
+                    raise ValueError(f'Bloque {estado.get("bloques")} ilegible en {ruta}')
+                break # Escritura incompleta al final
+            if bloque.get('prev_hash') != estado.get('hash') or not hash_valido(bloque):
+                raise ValueError(f'Bloque {estado.get("bloques")} inválido en {ruta}')
+            estado = {'bloques': estado.get('bloques') + 1, 'offset': estado.get('offset') + len(linea), 'hash': bloque.get('hash')}
+    return estado
+
+class AlmacenJSON:
+    '''
+    Guarda la cadena completa en un único arreglo JSON indentado, reescribiendo el archivo después
+    de cada bloque. Es el formato original; cada escritura es O(n). El archivo se reescribe en uno
+    temporal que después lo reemplaza, así un corte a mitad de la escritura no lo deja a medias.
+
+    Parameters
+    ----------
+    ruta : str
+        Archivo de la cadena.
+    continuar : bool
+        Seguir la cadena existente en `ruta` (se verifica completa) en lugar de empezar una nueva.
+    offsets : bool
+        Mantener el índice de offsets `<ruta>.offsets` (al continuar se rearma completo).
+    '''
+    def __init__(self, ruta:str='blockchain.json', continuar:bool=False, offsets:bool=False):
+        self.ruta = ruta
+        self.bloques = []
+        self.prev_hash = GENESIS
+        if continuar and os.path.exists(ruta):
+            for bloque in leer_json(ruta):
+                if bloque.get('prev_hash') != self.prev_hash or not hash_valido(bloque):
+                    raise ValueError(f'Bloque {len(self.bloques)} inválido en {ruta}')
+                self.bloques.append(bloque)
+                self.prev_hash = bloque.get('hash')
+        elif not continuar:
+            quitar_offsets(ruta)
+        self.offsets = None
+        self.fin = 0 # Offset del final del texto del último bloque
+        if offsets:
+            self.offsets = IndiceOffsets(ruta)
+            for bloque in self.bloques:
+                self.indexar(bloque)
+
+    def indexar(self, bloque:dict):
+        # Cada bloque empieza después de '[\n' (el primero) o de ',\n' (los demás)
+        inicio = self.fin + 2
+        self.fin = inicio + len(texto_bloque_json(bloque))
+        self.offsets.agregar(inicio, self.fin - inicio, bloque.get('timestamp'))
+
+    @property
+    def total(self) -> int:
+        return len(self.bloques)
+
+    def agregar(self, bloque:dict):
+        self.bloques.append(bloque)
+        self.prev_hash = bloque.get('hash')
+        with open(self.ruta + '.tmp', 'w') as f:
+            json.dump(self.bloques, f, indent=4)
+        os.replace(self.ruta + '.tmp', self.ruta)
+        if self.offsets is not None:
+            self.indexar(bloque)
+
+    def ultimos_hashes(self, cantidad:int) -> list:
+        return [bloque.get('hash') for bloque in self.bloques[len(self.bloques) - cantidad:]] if cantidad > 0 else []
+
+    def cerrar(self):
+        if self.offsets is not None:
+            self.offsets.cerrar()
+
+class AlmacenJSONL:
+    '''
+    Guarda la cadena como JSON Lines: un bloque compacto por línea, agregado al final del archivo.
+    Cada escritura es O(1).
+
+    Parameters
+    ----------
+    ruta : str
+        Archivo de la cadena.
+    fsync_cada : int
+        Cada cuántos bloques se fuerza la escritura a disco con fsync (0 = solo al cerrar). Los
+        bloques siempre se pasan al sistema operativo (flush) en cuanto se agregan.
+    continuar : bool
+        Agregar los bloques al final de una cadena existente en lugar de empezar una nueva (por
+        ejemplo, cuando otro proceso toma una cadena que se venía escribiendo, o para reanudar
+        después de un corte). El final de la cadena se recupera con `recuperar_jsonl`.
+
+    offsets : bool
+        Mantener el índice de offsets `<ruta>.offsets`. Al continuar se completan los bloques que
+        le falten (por ejemplo, si la cadena se escribió sin índice).
+
+    Cada vez que se hace fsync (y al cerrar) se actualiza el índice `<ruta>.idx`.
+    '''
+    def __init__(self, ruta:str='blockchain.jsonl', fsync_cada:int=0, continuar:bool=False, offsets:bool=False):
+        if fsync_cada < 0:
+            raise ValueError
+        self.ruta = ruta
+        self.fsync_cada = fsync_cada
+        self.cantidad = 0 # Bloques agregados por este almacén
+        if continuar:
+            estado = recuperar_jsonl(ruta)
+            with open(ruta, 'ab') as f:
+                f.truncate(estado.get('offset')) # Descarta una escritura incompleta
+        else:
+            estado = {'bloques': 0, 'offset': 0, 'hash': GENESIS}
+            if os.path.exists(ruta_indice(ruta)):
+                os.remove(ruta_indice(ruta))
+            quitar_offsets(ruta)
+        self.total = estado.get('bloques')
+        self.offset = estado.get('offset')
+        self.prev_hash = estado.get('hash')
+        self.offsets = IndiceOffsets(ruta, bloques=self.total) if offsets else None
+        if self.offsets is not None and self.offsets.cantidad < self.total:
+            self.completar_offsets()
+        self.archivo = open(ruta, 'a' if continuar else 'w', encoding='utf-8')
+
+    def completar_offsets(self):
+        '''
+        Agrega al índice de offsets los bloques de la cadena que todavía no tiene, leyendo desde
+        el final del último indexado.
+        '''
+        ultimo = self.offsets.ultimo()
+        pos = 0 if ultimo is None else ultimo[0] + ultimo[1] + 1
+        with open(self.ruta, 'rb') as f:
+            f.seek(pos)
+            while self.offsets.cantidad < self.total:
+                linea = f.readline()
+                self.offsets.agregar(pos, len(linea) - 1, json.loads(linea).get('timestamp'))
+                pos += len(linea)
+
+    def agregar(self, bloque:dict):
+        linea = json.dumps(bloque, separators=(',', ':')) + '\n'
+        self.archivo.write(linea)
+        self.archivo.flush()
+        largo = len(linea.encode('utf-8'))
+        if self.offsets is not None:
+            self.offsets.agregar(self.offset, largo - 1, bloque.get('timestamp'))
+        self.cantidad += 1
+        self.total += 1
+        self.offset += largo
+        self.prev_hash = bloque.get('hash')
+        if self.fsync_cada and self.cantidad % self.fsync_cada == 0:
+            fsync(self.archivo.fileno())
+            self.guardar_indice()
+
+    def guardar_indice(self):
+        '''
+        Escribe el índice con el último bloque que ya está en disco (reemplazando el anterior de
+        una vez, para que nunca quede a medio escribir).
+        '''
+        temporal = ruta_indice(self.ruta) + '.tmp'
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump({'bloques': self.total, 'offset': self.offset, 'hash': self.prev_hash}, f)
+        os.replace(temporal, ruta_indice(self.ruta))
+
+    def ultimos_hashes(self, cantidad:int) -> list:
+        '''
+        Devuelve los hashes de los últimos `cantidad` bloques, leyendo la cadena hacia atrás.
+        '''
+        with open(self.ruta, 'rb') as f:
+            return [json.loads(linea).get('hash') for linea in leer_lineas_finales(f, self.offset, cantidad)]
+
+    def cerrar(self):
+        self.archivo.flush()
+        fsync(self.archivo.fileno())
+        self.archivo.close()
+        self.guardar_indice()
+        if self.offsets is not None:
+            self.offsets.cerrar()
+
+def crear_almacen(formato:str='json', ruta:str=None, fsync_cada:int=0, continuar:bool=False, offsets:bool=False):
+    '''
+    Crea el backend de almacenamiento según el formato ('json' o 'jsonl'). Si no se indica la ruta
+    se usa blockchain.json o blockchain.jsonl. Con `continuar` se sigue la cadena existente y con
+    `offsets` se mantiene su índice de offsets.
+    '''
+    if formato == 'json':
+        return AlmacenJSON(ruta or 'blockchain.json', continuar, offsets)
+    elif formato == 'jsonl':
+        return AlmacenJSONL(ruta or 'blockchain.jsonl', fsync_cada, continuar, offsets)
+    raise ValueError
+
+def leer_jsonl(ruta:str='blockchain.jsonl'):
+    '''
+    Recorre los bloques de una cadena en formato JSON Lines, de a uno (memoria constante).
+    '''
+    with open(ruta, 'r', encoding='utf-8') as f:
+        for linea in f:
+            if linea.strip():
+                yield json.loads(linea)
+
+def leer_json(ruta:str='blockchain.json', tam_lectura:int=1 << 16):
+    '''
+    Recorre los bloques de una cadena en formato blockchain.json (un arreglo JSON) de a uno,
+    leyendo el archivo en trozos de `tam_lectura` caracteres y decodificando cada bloque con
+    `JSONDecoder.raw_decode`. La memoria usada depende del tamaño de un bloque, no de la cadena.
+    '''
+    decoder = json.JSONDecoder()
+    with open(ruta, 'r', encoding='utf-8') as f:
+        buffer = ''
+        pos = 0
+        abierto = False
+        eof = False
+        while True:
+            # Saltar espacios y separadores entre bloques ('[' al inicio, ',' entre bloques)
+            while pos < len(buffer) and (buffer[pos].isspace() or buffer[pos] == ',' or (buffer[pos] == '[' and not abierto)):
+                abierto = abierto or buffer[pos] == '['
+                pos += 1
+            if pos < len(buffer) and buffer[pos] == ']':
+                return
+            if pos < len(buffer):
+                try:
+                    bloque, pos = decoder.raw_decode(buffer, pos)
+                    yield bloque
+                    continue
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+            elif eof:
+                if abierto:
+                    raise json.JSONDecodeError('Falta el cierre del arreglo', buffer, pos)
+                return
+            # El bloque está incompleto: leer otro trozo y descartar lo ya decodificado
+            trozo = f.read(tam_lectura)
+            eof = trozo == ''
+            buffer = buffer[pos:] + trozo
+            pos = 0
+
+def iterar_bloques(ruta:str='blockchain.json'):
+    '''
+    Recorre los bloques de una cadena de a uno, en formato JSON Lines si la ruta termina en
+    .jsonl y como arreglo JSON (blockchain.json) en otro caso.
+    '''
+    return leer_jsonl(ruta) if ruta.endswith('.jsonl') else leer_json(ruta)
+
+def exportar_json(origen:str='blockchain.jsonl', destino:str='blockchain.json', offsets:bool=False) -> int:
+    '''
+    Compacta una cadena JSON Lines al formato de blockchain.json (el mismo que produce
+    `json.dump(blockchain, f, indent=4)`), escribiendo de a un bloque. Con `offsets` se genera
+    también el índice de offsets de `destino`; si no, se borra el que hubiera (ya no coincide).
+
+    Returns
+    -------
+    int
+        Cantidad de bloques exportados.
+    '''
+    quitar_offsets(destino)
+    indice = IndiceOffsets(destino) if offsets else None
+    cantidad = 0
+    pos = 0
+    with open(destino, 'w') as salida:
+        for bloque in leer_jsonl(origen):
+            texto = texto_bloque_json(bloque)
+            salida.write('[\n' if cantidad == 0 else ',\n')
+            salida.write(texto)
+            if indice is not None:
+                indice.agregar(pos + 2, len(texto), bloque.get('timestamp'))
+            pos += 2 + len(texto)
+            cantidad += 1
+        salida.write('\n]' if cantidad else '[]')
+    if indice is not None:
+        indice.cerrar()
+    return cantidad
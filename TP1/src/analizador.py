@@ -2,14 +2,43 @@ from json import dumps, loads
 from time import sleep
 from random import randint
 from os import getpid
-from src.utils import media, desviacion
+from src.utils import media, desviacion, EstadisticaMovil
+from src.ventana import VentanaCircular, extraer, registro_desde_dato, dato_desde_registro
+from src.protocolo import REGISTRO, nuevo_buffer
+from src.senales import SENALES
+from src.blockchain import TIPOS_BASE
+from collections import deque
+from functools import partial
+import numpy as np
 
 # Imports para mejorar el tipado (para hacer un poco más verborrágico a python jaja)
 from multiprocessing.connection import Connection
 from multiprocessing.queues import Queue
 from typing import Any, List
 
-def leer_datos(canal_entrada:Connection, ventana:List=[], ventana_size:int=30):
+def recibir(canal_entrada:Connection, buffer:bytearray=None) -> list:
+    '''
+    Recibe un mensaje del canal de entrada y devuelve la lista de datos que contiene (uno, o
+    varios si el generador envía lotes).
+
+    Returns
+    -------
+    list
+        Lista de dicts si el mensaje es JSON, o de registros (tuplas) si se pasa `buffer` y el
+        mensaje está en el formato binario de `src.protocolo`. Vacía si el mensaje es el de fin de
+        los datos (ver `src.contrapresion`).
+    '''
+    if buffer is not None:
+        cantidad = canal_entrada.recv_bytes_into(buffer)
+        return list(REGISTRO.iter_unpack(memoryview(buffer)[:cantidad]))
+    # Formato del dato string: {"timestamp": "2025-06-11T15:32:09", "frecuencia": 122, "presion": [166, 99], "oxigeno": 100}
+    # o un arreglo JSON de datos con ese formato si se envían lotes
+    dato = loads(canal_entrada.recv()) # Validar que la string sea un json válido
+    if dato is None:
+        return []
+    return dato if isinstance(dato, list) else [dato]
+
+def leer_datos(canal_entrada:Connection, ventana:List=[], ventana_size:int=30, stats:EstadisticaMovil=None, buffer:bytearray=None, pendientes:deque=None):
     '''
     Consume (o lee) un dato del canal de entrada y lo agrega a la ventana.
     El tamaño de la ventana está dado por `ventana_size`. Si se supera este tamaño se elimina el elemento más antiguo.
@@ -18,27 +47,169 @@ def leer_datos(canal_entrada:Connection, ventana:List=[], ventana_size:int=30):
     ----------
     canal_de_entrada : Connection
         Debe ser algún canal que permita IPC, como el extremo de lectura de un Pipe (consumidor).
-    ventana : List
-        Lista por referencia, donde se agregan los datos leidos del generador.
+    ventana : List or VentanaCircular
+        Lista por referencia o VentanaCircular, donde se agregan los datos leidos del generador.
     ventana_size : int
-        Número entero que determina el tamaño de la ventana.
+        Número entero que determina el tamaño de la ventana (si es una VentanaCircular se usa
+        su propia capacidad).
+    stats : EstadisticaMovil
+        Estadísticas incrementales de la ventana (opcional). Si se pasa, se agrega el dato nuevo
+        y se quita el dato desalojado, de forma que `procesar` no tenga que recorrer la ventana.
+    buffer : bytearray
+        Buffer reutilizable (ver `src.protocolo.nuevo_buffer`). Si se pasa, el dato se lee en formato
+        binario con `recv_bytes_into` en lugar de decodificar un string JSON. Para recibir lotes
+        debe tener lugar para `lote` registros.
+    pendientes : deque
+        Datos recibidos en un lote que todavía no se agregaron a la ventana. Si hay alguno se
+        usa sin leer del canal; es obligatorio si el generador envía lotes.
+
+    Returns
+    -------
+    bool
+        False si en lugar de un dato llegó el mensaje de fin de los datos.
     '''
 
-    # Formato del dato string: {"timestamp": "2025-06-11T15:32:09", "frecuencia": 122, "presion": [166, 99], "oxigeno": 100}
-    ventana.append(loads(canal_entrada.recv())) # Validar que la string sea un json válido
+    if pendientes:
+        dato = pendientes.popleft()
+    else:
+        recibidos = recibir(canal_entrada, buffer)
+        if not recibidos:
+            return False
+        dato = recibidos[0]
+        if len(recibidos) > 1:
+            if pendientes is None:
+                raise ValueError
+            pendientes.extend(recibidos[1:])
+    registro = dato if isinstance(dato, tuple) else None
+    if isinstance(ventana, VentanaCircular):
+        # La ventana circular sobrescribe el registro más antiguo en O(1) y lo devuelve
+        if registro is None:
+            registro = registro_desde_dato(dato)
+        desalojado = ventana.agregar(registro)
+        if stats is not None:
+            stats.agregar(extraer(registro, stats.tipo))
+            if desalojado is not None:
+                stats.quitar(extraer(desalojado, stats.tipo))
+        return True
+    if registro is not None:
+        dato = dato_desde_registro(registro)
+    ventana.append(dato)
+    if stats is not None:
+        stats.agregar(dato.get(stats.tipo))
     if len(ventana) > ventana_size:
-        ventana.pop(0)
+        viejo = ventana.pop(0)
+        if stats is not None:
+            stats.quitar(viejo.get(stats.tipo))
+    return True
+
+# Tipos de analizador: los tres de la consigna (media y desviación de un signo vital, los tipos
+# base del formato de bloque) y los de procesamiento de señales sobre la ventana completa (`src.senales`)
+TIPOS = TIPOS_BASE + tuple(SENALES)
+
+def calcular(tipo:str='none',ventana:List=[],stats:EstadisticaMovil=None):
+    '''
+    Calcula la media, la desviación estándar y el timestamp de la ventana según el tipo de dato
+    (ver `procesar`), sin simular el cálculo costoso. Para los tipos de `src.senales` devuelve
+    sus métricas en lugar de la media y la desviación.
+    '''
+    if tipo not in TIPOS or len(ventana) == 0:
+        raise ValueError
+    circular = isinstance(ventana, VentanaCircular)
+    timestamp = ventana.ultimo_timestamp() if circular else ventana[-1].get('timestamp')
+    if tipo in SENALES:
+        registros = ventana.registros() if circular else np.array([registro_desde_dato(dato) for dato in ventana])
+        return {'tipo': tipo, 'timestamp': timestamp, **SENALES[tipo](registros)}
+
+    # Obtiene los datos según el self.__tipo__ entonces:
+    # Frecuen: datos = [55,59,65,70,90,...] todas las frecuencias cardiacas que hay en ventana 
+    # Presión: datos = [[110,80], [112,90], ...] todas las Listas de presion que hay en ventana
+    # Oxigeno: datos = [92,95,96,95,96,...] todos los oxigenos que hay en ventana
+    if stats is not None:
+        med = stats.media()
+        desv = stats.desviacion()
+    else:
+        datos = ventana.datos(tipo) if circular else [dato.get(tipo) for dato in ventana]
+        med = media(tipo, datos)
+        desv = desviacion(tipo, datos)
+    return {
+        'tipo': tipo,
+        'timestamp': timestamp,
+        'media': med,
+        'desv': desv
+    }
+
+# Modelos de costo del procesamiento: simulan (o generan) la carga de un cálculo costoso por dato.
+# Cada uno recibe el tipo y la ventana; se eligen al iniciar con `crear_costo`.
+
+def costo_ninguno(tipo:str, ventana:Any):
+    pass
 
-def procesar(tipo:str='none',ventana:List=[],verbose:bool=False):
+def costo_fijo(tipo:str, ventana:Any, segundos:float=0.1):
+    sleep(segundos)
+
+def costo_aleatorio(tipo:str, ventana:Any):
+    # Simula un calculo costoso (1 a 5 segundos float)
+    sleep(randint(1,300)/100)
+
+def costo_fft(tipo:str, ventana:Any, repeticiones:int=1, puntos:int=4096):
+    '''
+    Carga de CPU real: remuestrea la serie de la ventana a `puntos` valores y calcula su espectro
+    de potencia con FFT (como en un análisis de variabilidad de la frecuencia cardíaca),
+    `repeticiones` veces.
+    '''
+    # Los tipos de procesamiento de señales trabajan sobre la serie de frecuencia cardíaca
+    tipo = tipo if tipo in TIPOS_BASE else 'frecuencia'
+    datos = ventana.datos(tipo) if isinstance(ventana, VentanaCircular) else np.array([dato.get(tipo) for dato in ventana])
+    serie = np.asarray(datos, dtype=np.float64).reshape(len(datos), -1)
+    tiempos = np.linspace(0, len(serie) - 1, puntos)
+    for _ in range(repeticiones):
+        for canal in serie.T:
+            remuestreada = np.interp(tiempos, np.arange(len(canal)), canal)
+            np.abs(np.fft.rfft(remuestreada - remuestreada.mean())) ** 2
+
+# nombre: (función, parámetro opcional, tipo del parámetro)
+COSTOS = {
+    'ninguno': (costo_ninguno, None, None),
+    'fijo': (costo_fijo, 'segundos', float),
+    'aleatorio': (costo_aleatorio, None, None),
+    'fft': (costo_fft, 'repeticiones', int),
+}
+
+def crear_costo(especificacion:str='aleatorio'):
+    '''
+    Crea el modelo de costo a partir de una especificación 'nombre' o 'nombre:parametro':
+    'ninguno', 'fijo:SEGUNDOS' (0.1 por defecto), 'aleatorio' (hasta 3 segundos, el original) o
+    'fft:REPETICIONES' (1 por defecto). Lanza ValueError si la especificación no es válida.
+    '''
+    nombre, _, parametro = especificacion.partition(':')
+    if nombre not in COSTOS:
+        raise ValueError
+    funcion, nombre_parametro, tipo_parametro = COSTOS[nombre]
+    if not parametro:
+        return funcion
+    if nombre_parametro is None:
+        raise ValueError
+    valor = tipo_parametro(parametro)
+    if valor < 0:
+        raise ValueError
+    return partial(funcion, **{nombre_parametro: valor})
+
+def procesar(tipo:str='none',ventana:List=[],verbose:bool=False,stats:EstadisticaMovil=None,costo:Any=costo_aleatorio):
     '''
     Procesa los datos de la ventana según el tipo de dato y devuelve un objeto con la media, desviación estándar y timestamp.
     
     Parameters
     ----------
     tipo : str
-        Tipo de dato. Puede ser 'frecuencia', 'presion' o 'oxigeno'.
-    ventana : List
-        Lista por referencia, con los datos leidos del generador.
+        Tipo de dato. Puede ser 'frecuencia', 'presion', 'oxigeno' o uno de los tipos de
+        procesamiento de señales de `src.senales` ('variabilidad', 'tendencia' o 'espectro').
+    ventana : List or VentanaCircular
+        Lista por referencia o VentanaCircular, con los datos leidos del generador.
+    stats : EstadisticaMovil
+        Estadísticas incrementales de la ventana (opcional). Si se pasa, la media y la desviación
+        se obtienen en O(1) en vez de recalcularse sobre toda la ventana.
+    costo : Any
+        Modelo de costo del cálculo (ver `crear_costo`). Por defecto, una espera aleatoria.
 
     Returns
     -------
@@ -53,27 +224,9 @@ def procesar(tipo:str='none',ventana:List=[],verbose:bool=False):
         }
         ```
     '''
-    if tipo != 'frecuencia' and tipo != 'presion' and tipo != 'oxigeno' or len(ventana) == 0:
-        raise ValueError
-    timestamp = ventana[-1].get('timestamp')
-
-    # Obtiene los datos según el self.__tipo__ entonces:
-    # Frecuen: datos = [55,59,65,70,90,...] todas las frecuencias cardiacas que hay en ventana 
-    # Presión: datos = [[110,80], [112,90], ...] todas las Listas de presion que hay en ventana
-    # Oxigeno: datos = [92,95,96,95,96,...] todos los oxigenos que hay en ventana
-    datos = [dato.get(tipo) for dato in ventana]
-
-    med = media(tipo, datos)
-    desv = desviacion(tipo, datos)
-    # Simula un calculo costoso (1 a 5 segundos float)
-    sleep(randint(1,300)/100)
+    resultado = calcular(tipo, ventana, stats)
+    costo(tipo, ventana)
 
-    resultado = {
-        'tipo': tipo,
-        'timestamp': timestamp,
-        'media': med,
-        'desv': desv
-    }
     if verbose:
         print(f'[{getpid()} - {tipo}] Procesado:\n\t{resultado}')
     return resultado
@@ -86,7 +239,16 @@ def analizar(
         done_count:Any=None,
         cond:Any=None, 
         total_procs:int=3, 
-        verbose:bool=False
+        verbose:bool=False,
+        ventana_size:int=30,
+        binario:bool=False,
+        creditos:Any=None,
+        lote:int=1,
+        metricas:Any=None,
+        costo:str='aleatorio',
+        entrada:Any=None,
+        datos_por_mensaje:int=None,
+        resultados:Any=None
     ):
     '''
     Analiza los datos del pipe_to_read y envía los resultados a la queue.
@@ -98,13 +260,17 @@ def analizar(
     queue : Queue
         Debe ser una Queue (se usará como productor).
     tipo : str
-        Tipo de dato. Puede ser 'frecuencia', 'presion' o 'oxigeno'.
+        Tipo de dato. Puede ser 'frecuencia', 'presion', 'oxigeno' o uno de los tipos de
+        procesamiento de señales de `src.senales` ('variabilidad', 'tendencia' o 'espectro').
     n : int
-        Número entero que determina cuántas veces se lee del pipe y se envía a la queue.
+        Número entero que determina cuántas veces se lee del pipe y se envía a la queue. Si es
+        None se lee hasta el mensaje de fin de los datos y al terminar se envía `null` a la queue
+        (con las políticas 'descartar' y 'coalescer' de `src.contrapresion`).
     done_count: Any
         Se espera un valor (Value) compartido, que se utiliza como "semaforo", para esperar 
         a que todos los procesos analizadores terminen y los datos se escriban en orden en 
-        la cola. 
+        la cola. Si es None (junto con `cond`) no se usa la barrera: cada resultado lleva su
+        número de `secuencia` y el verificador reordena las rondas.
     cond: Any 
         Es la condición que me permite escribir el Value recibido (done_count) y esperar
         al resto de procesos.
@@ -112,18 +278,78 @@ def analizar(
         Cantidad de procesos analizadores que se crearán.
     verbose: bool
         Mostrar información adicional en la salida estándar.
+    ventana_size: int
+        Capacidad de la ventana circular donde se guardan los últimos datos leídos.
+    binario: bool
+        Leer los datos en el formato binario de `src.protocolo` (debe coincidir con el generador).
+    creditos: Any
+        Semáforo (opcional) que limita cuántas rondas puede adelantarse este analizador respecto
+        del verificador. Se adquiere antes de cada dato y el verificador lo libera al armar el bloque.
+        Debe permitir al menos `lote` rondas.
+    lote: int
+        Cantidad de resultados por mensaje en la queue (debe coincidir con el lote del generador).
+        Con lote > 1 se envía una lista JSON de resultados y la barrera se hace una vez por lote.
+    metricas: Any
+        Instrumentación del pipeline (`src.metricas.Metricas`, opcional): se anota cuándo se toma y
+        cuándo se termina de procesar cada dato.
+    costo: str
+        Especificación del modelo de costo del cálculo (ver `crear_costo`).
+    entrada: Any
+        Semáforo de créditos de entrada (`src.contrapresion`, opcional): se libera uno por cada
+        mensaje leído del pipe.
+    datos_por_mensaje: int
+        Máximo de datos por mensaje del generador para el buffer binario (por defecto `lote`).
+        Con lote 1, un mensaje con varios datos es una actualización coalescida: todos se agregan
+        a la ventana y se hace un solo análisis.
+    resultados: Any
+        Casillas de resultados en memoria compartida (`src.memoria_compartida.ResultadosCompartidos`,
+        opcional): los resultados se escriben ahí y por la queue solo va un aviso, en lugar del JSON.
     '''
-    if tipo != 'frecuencia' and tipo != 'presion' and tipo != 'oxigeno':
+    if tipo not in TIPOS:
         raise ValueError
     print(f'[{getpid()} - {tipo}] Proceso analizador iniciado.')
-    ventana = []
-    for _ in range(n):
+    indice = TIPOS.index(tipo)
+    costo = crear_costo(costo)
+    ventana = VentanaCircular(ventana_size)
+    # Los tipos de procesamiento de señales usan la ventana completa, no estadísticas incrementales
+    stats = EstadisticaMovil(tipo) if tipo in TIPOS_BASE else None
+    buffer = nuevo_buffer(datos_por_mensaje or lote) if binario else None
+    pendientes = deque()
+    salida = []
+    secuencia = 0
+    while n is None or secuencia < n:
+        if creditos is not None:
+            creditos.acquire()
         if verbose:
             print(f'[{getpid()} - {tipo}] Leyendo datos de la tubería...')
-        leer_datos(canal_entrada=pipe_to_read, ventana=ventana)
+        mensaje = not pendientes # El dato sale de un mensaje nuevo del pipe
+        if not leer_datos(canal_entrada=pipe_to_read, ventana=ventana, stats=stats, buffer=buffer, pendientes=pendientes):
+            break
+        if entrada is not None and mensaje:
+            entrada.release()
+        while lote == 1 and pendientes:
+            # Actualización coalescida: el resto de los datos del mensaje también van a la ventana
+            leer_datos(canal_entrada=pipe_to_read, ventana=ventana, stats=stats, buffer=buffer, pendientes=pendientes)
+        if metricas is not None:
+            metricas.recibido(indice, secuencia)
         if verbose:
             print(f'[{getpid()} - {tipo}] Tamaño de la ventana: {len(ventana)} | Escribiendo datos en la cola...')
-        queue.put(dumps(procesar(tipo=tipo, ventana=ventana, verbose=verbose)))
+        resultado = procesar(tipo=tipo, ventana=ventana, verbose=verbose, stats=stats, costo=costo)
+        resultado['secuencia'] = secuencia
+        if metricas is not None:
+            metricas.procesado(indice, secuencia)
+        salida.append(resultado)
+        secuencia += 1
+        if len(salida) < lote and (n is None or secuencia < n):
+            continue
+        if resultados is not None:
+            resultados.enviar(queue, salida)
+        else:
+            queue.put(dumps(salida if lote > 1 else salida[0]))
+        salida = []
+        if cond is None:
+            # Sin barrera: el verificador reordena por `secuencia`
+            continue
         # Incrementar contador
         with cond:
             done_count.value += 1
@@ -132,3 +358,5 @@ def analizar(
                 cond.notify_all()  # Avisar a los demas que todos terminaron
             else:
                 cond.wait() # Sino esperar a que todos terminen
+    if n is None:
+        queue.put(None if resultados is not None else dumps(None)) # Fin de los resultados de este analizador
@@ -0,0 +1,126 @@
+import asyncio, json, time
+from os import getpid
+from src.analizador import calcular, crear_costo, costo_ninguno, TIPOS, TIPOS_BASE
+from src.generador import generar_dato
+from src.verificador import ReordenadorRondas, abrir_cadena
+from src.blockchain import crear_bloque
+from src.alertas import MotorAlertas, matriz_rondas
+from src.utils import EstadisticaMovil
+from src.ventana import VentanaCircular, registro_desde_dato, extraer
+from typing import Any
+
+# Variante en un solo proceso del pipeline de main.py, con asyncio: el generador, un analizador
+# por tipo y el verificador son corrutinas que se comunican por asyncio.Queue, sin crear procesos
+# ni serializar los datos. Solo el modelo de costo del análisis (lo único que puede bloquear) se
+# corre en el executor del loop. Para tasas bajas evita el costo de arrancar cinco procesos, del
+# pickling y de los cambios de contexto; la cadena que genera es la misma que la de main.py.
+
+async def generar(colas:list, n:int=60, tasa:float=1.0, verbose:bool=False, metricas:Any=None):
+    '''
+    Genera n datos y los pone en la cola de cada analizador (el mismo dict en todas: los
+    analizadores no lo modifican).
+
+    Parameters
+    ----------
+    colas : list
+        asyncio.Queue de entrada de cada analizador. Si son acotadas, el generador espera a
+        que haya lugar.
+    tasa : float
+        Datos por segundo (0 = tan rápido como sea posible).
+    '''
+    if n < 0 or colas == [] or tasa < 0:
+        raise ValueError
+    print(f'[{getpid()}] Generador iniciado.')
+    proximo = time.monotonic()
+    for secuencia in range(n):
+        dato = json.loads(generar_dato())
+        if verbose:
+            print(f'[{getpid()}] Dato generado: {dato}')
+        if metricas is not None:
+            metricas.enviado(secuencia)
+        for cola in colas:
+            await cola.put(dato)
+        if tasa > 0:
+            proximo += 1 / tasa
+            await asyncio.sleep(max(proximo - time.monotonic(), 0))
+        else:
+            await asyncio.sleep(0) # Deja correr a los analizadores entre dato y dato
+
+async def analizar(entrada:asyncio.Queue, salida:asyncio.Queue, tipo:str='frecuencia', n:int=0, ventana_size:int=30, costo:str='aleatorio', verbose:bool=False, metricas:Any=None):
+    '''
+    Analizador de un tipo: lee n datos de `entrada`, los agrega a su ventana y pone cada
+    resultado (con su `secuencia`) en `salida`. El costo del cálculo corre en el executor.
+    '''
+    if tipo not in TIPOS:
+        raise ValueError
+    indice = TIPOS.index(tipo)
+    costo = crear_costo(costo)
+    loop = asyncio.get_running_loop()
+    ventana = VentanaCircular(ventana_size)
+    stats = EstadisticaMovil(tipo) if tipo in TIPOS_BASE else None
+    for secuencia in range(n):
+        registro = registro_desde_dato(await entrada.get())
+        if metricas is not None:
+            metricas.recibido(indice, secuencia)
+        desalojado = ventana.agregar(registro)
+        if stats is not None:
+            stats.agregar(extraer(registro, tipo))
+            if desalojado is not None:
+                stats.quitar(extraer(desalojado, tipo))
+        resultado = calcular(tipo, ventana, stats)
+        if costo is not costo_ninguno:
+            await loop.run_in_executor(None, costo, tipo, ventana)
+        resultado['secuencia'] = secuencia
+        if metricas is not None:
+            metricas.procesado(indice, secuencia)
+        if verbose:
+            print(f'[{getpid()} - {tipo}] Procesado:\n\t{resultado}')
+        await salida.put(resultado)
+
+async def verificar(cola:asyncio.Queue, n:int=0, analizadores:int=3, almacen:str='json', fsync_cada:int=0, checkpoints:int=0, reglas:list=None, verbose:bool=False, metricas:Any=None, reanudar:bool=False, offsets:bool=False):
+    '''
+    Arma las rondas con los resultados de `cola` (en orden de secuencia) y agrega un bloque por
+    ronda a la cadena, igual que `src.verificador.verificar`.
+    '''
+    print(f'[{getpid()}] Verificador iniciado')
+    blockchain, indice = abrir_cadena(almacen, fsync_cada, checkpoints, reanudar, offsets)
+    previos = blockchain.total
+    reordenador = ReordenadorRondas(total=analizadores)
+    motor = MotorAlertas(reglas)
+    prev_hash = blockchain.prev_hash
+    i = 0
+    while i < n:
+        # Todos los resultados que ya están en la cola se procesan juntos
+        rondas = reordenador.agregar(await cola.get())
+        while not cola.empty():
+            rondas.extend(reordenador.agregar(cola.get_nowait()))
+        for datos, alerta in zip(rondas, motor.alertas(matriz_rondas(rondas))):
+            i += 1
+            bloque = crear_bloque(datos, bool(alerta), prev_hash)
+            blockchain.agregar(bloque)
+            if indice is not None:
+                indice.agregar(bloque)
+            prev_hash = bloque.get('hash')
+            if metricas is not None:
+                metricas.bloque(i - 1, cola.qsize())
+            print(f'[{getpid()}] Bloque {previos + i} verificado\n\tHash: {bloque.get("hash")}\n\tAlerta: {bloque.get("alerta")}')
+            if verbose:
+                print(f"\tDatos: {bloque.get('datos')}")
+    blockchain.cerrar()
+    if indice is not None:
+        indice.cerrar()
+
+async def pipeline(n:int=60, tipos:tuple=TIPOS_BASE, tasa:float=1.0, ventana_size:int=30, costo:str='aleatorio', almacen:str='json', fsync_cada:int=0, checkpoints:int=0, reglas:list=None, profundidad:int=8, verbose:bool=False, metricas:Any=None, reanudar:bool=False, offsets:bool=False, cola:int=0):
+    '''
+    Corre el generador, un analizador por cada tipo de `tipos` y el verificador como tareas del
+    mismo loop. `profundidad` acota la cola de entrada de cada analizador (0 = sin límite) y con
+    `reanudar` se siguen agregando bloques a la cadena existente (`offsets`: ver `verificar`).
+    `cola` acota la cola de resultados hacia el verificador (0 = sin límite).
+    '''
+    entradas = [asyncio.Queue(maxsize=profundidad) for _ in tipos]
+    resultados = asyncio.Queue(maxsize=cola)
+    await asyncio.gather(
+        generar(entradas, n, tasa, verbose, metricas),
+        *(analizar(entrada, resultados, tipo, n, ventana_size, costo, verbose, metricas) for entrada, tipo in zip(entradas, tipos)),
+        verificar(resultados, n, len(tipos), almacen, fsync_cada, checkpoints, reglas, verbose, metricas, reanudar, offsets),
+    )
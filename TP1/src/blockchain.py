@@ -1,5 +1,141 @@
+import json, os
 from hashlib import sha256
 from json import dumps
+from struct import Struct
+from typing import Any
+
+# Versión del formato de bloque que genera `crear_bloque`. Los bloques sin campo 'version' son
+# de la versión 1 y se siguen verificando con su formato original. Los bloques que además llevan
+# métricas de procesamiento de señales (`src.senales`) son de la versión 3.
+VERSION = 2
+VERSION_SENALES = 3
+
+# Cuerpo del bloque en la versión 2: 8 floats de 64 bits en orden fijo
+# (frecuencia media/desv, presión media sist./diast., presión desv sist./diast., oxígeno media/desv)
+CUERPO_V2 = Struct('<8d')
+# Tipos con media y desviación del cuerpo de un bloque (también son los analizadores de la
+# consigna, ver `src.analizador.TIPOS`)
+TIPOS_BASE = ('frecuencia', 'presion', 'oxigeno')
+# Métricas adicionales en la versión 3: cada tipo y cada métrica como nombre (largo + UTF-8) y
+# cada valor como float de 64 bits, ordenados por nombre
+LARGO = Struct('<B')
+METRICA = Struct('<d')
+
+def _canales(valor) -> tuple:
+    # None (tipo sin datos) se codifica como NaN; la desviación de presión de una ventana con
+    # un solo dato es el escalar 0 y vale para ambos canales
+    if valor is None:
+        return (float('nan'), float('nan'))
+    if isinstance(valor, list):
+        return (float(valor[0]), float(valor[1]))
+    return (float(valor), float(valor))
+
+def codificar_cuerpo(cuerpo:dict) -> bytes:
+    '''
+    Codificación binaria canónica del cuerpo de un bloque (versión 2): no depende del orden de
+    las claves ni de cómo una versión de Python formatea los floats en JSON.
+    '''
+    frecuencia = cuerpo.get('frecuencia')
+    presion = cuerpo.get('presion')
+    oxigeno = cuerpo.get('oxigeno')
+    frec_media = frecuencia.get('media')
+    ox_media = oxigeno.get('media')
+    return CUERPO_V2.pack(
+        float('nan') if frec_media is None else float(frec_media),
+        _canales(frecuencia.get('desv'))[0],
+        *_canales(presion.get('media')),
+        *_canales(presion.get('desv')),
+        float('nan') if ox_media is None else float(ox_media),
+        _canales(oxigeno.get('desv'))[0],
+    )
+
+def _nombre(nombre:str) -> bytes:
+    codificado = nombre.encode()
+    return LARGO.pack(len(codificado)) + codificado
+
+def codificar_senales(cuerpo:dict) -> bytes:
+    '''
+    Codificación binaria canónica de las métricas del cuerpo que no son de los tipos base
+    (versión 3): tipos y métricas ordenados por nombre, con cada valor como float de 64 bits.
+    '''
+    partes = []
+    for tipo in sorted(t for t in cuerpo if t not in TIPOS_BASE):
+        metricas = cuerpo.get(tipo)
+        partes.append(_nombre(tipo) + LARGO.pack(len(metricas)))
+        for nombre in sorted(metricas):
+            partes.append(_nombre(nombre) + METRICA.pack(float(metricas.get(nombre))))
+    return b''.join(partes)
+
+def calcular_hash(bloque:dict) -> str:
+    '''
+    Calcula el hash de un bloque a partir de su hash previo, su cuerpo y su timestamp, según la
+    versión del bloque:
+        - 1: sha256(prev_hash + dumps(cuerpo, sort_keys=True) + timestamp)
+        - 2: sha256(versión + bytes de prev_hash + `codificar_cuerpo(cuerpo)` + timestamp)
+        - 3: como la 2, agregando `codificar_senales(cuerpo)` después del cuerpo
+    '''
+    version = bloque.get('version', 1)
+    if version == 1:
+        hash_input = bloque.get('prev_hash') + dumps(bloque.get('datos'), sort_keys=True) + bloque.get('timestamp')
+        return sha256(hash_input.encode()).hexdigest()
+    elif version == 2:
+        hash_input = bytes((version,)) + bytes.fromhex(bloque.get('prev_hash')) + codificar_cuerpo(bloque.get('datos')) + bloque.get('timestamp').encode()
+        return sha256(hash_input).hexdigest()
+    elif version == 3:
+        cuerpo = bloque.get('datos')
+        hash_input = bytes((version,)) + bytes.fromhex(bloque.get('prev_hash')) + codificar_cuerpo(cuerpo) + codificar_senales(cuerpo) + bloque.get('timestamp').encode()
+        return sha256(hash_input).hexdigest()
+    raise ValueError(f'Versión de bloque desconocida: {version}')
+
+def _numero(valor) -> bool:
+    return isinstance(valor, (int, float)) and not isinstance(valor, bool)
+
+def _canal_canonico(valor, canales:int, cero:bool=False) -> bool:
+    # None, un número (un canal) o una lista de dos números (presión). La desviación de presión
+    # de una ventana con un solo dato puede ser el escalar 0, pero ningún otro escalar
+    if valor is None:
+        return True
+    if canales == 1:
+        return _numero(valor)
+    if cero and valor == 0 and _numero(valor):
+        return True
+    return isinstance(valor, list) and len(valor) == 2 and all(_numero(v) for v in valor)
+
+def cuerpo_canonico(bloque:dict) -> bool:
+    '''
+    Indica si el cuerpo del bloque tiene exactamente la forma que cubre el hash de su versión.
+    Desde la versión 2 se hashean valores empaquetados y no el JSON del cuerpo: una clave de más
+    (por ejemplo, una sección de señales en un bloque de versión 2) o un escalar donde va una
+    lista quedarían fuera del hash o se codificarían igual que otro cuerpo.
+    '''
+    version = bloque.get('version', 1)
+    if version == 1:
+        return True # Se hashea el JSON completo del cuerpo
+    cuerpo = bloque.get('datos')
+    if not isinstance(cuerpo, dict):
+        return False
+    for tipo in TIPOS_BASE:
+        datos = cuerpo.get(tipo)
+        canales = 2 if tipo == 'presion' else 1
+        if not isinstance(datos, dict) or datos.keys() != {'media', 'desv'}:
+            return False
+        if not _canal_canonico(datos.get('media'), canales) or not _canal_canonico(datos.get('desv'), canales, cero=True):
+            return False
+    senales = [cuerpo.get(tipo) for tipo in cuerpo if tipo not in TIPOS_BASE]
+    if version == VERSION:
+        return not senales
+    return bool(senales) and all(isinstance(metricas, dict) and all(_numero(v) for v in metricas.values()) for metricas in senales)
+
+def hash_valido(bloque:dict) -> bool:
+    '''
+    Indica si el hash guardado del bloque coincide con el recalculado y su cuerpo tiene la forma
+    que cubre el hash (`cuerpo_canonico`). Un bloque alterado que no se puede codificar (por
+    ejemplo, con un `prev_hash` que no es hexadecimal) no es válido.
+    '''
+    try:
+        return cuerpo_canonico(bloque) and calcular_hash(bloque) == bloque.get('hash')
+    except (ValueError, TypeError, AttributeError):
+        return False
 
 def crear_bloque(datos:list, alerta:bool, prev_hash:str) -> dict:
     '''
@@ -8,7 +144,8 @@ def crear_bloque(datos:list, alerta:bool, prev_hash:str) -> dict:
     Parameters
     ----------
     datos : list
-        Lista con tres dicts, uno por cada tipo (frecuencia, presion, oxigeno).
+        Lista con un dict por cada tipo (frecuencia, presion, oxigeno y, opcionalmente, los
+        tipos de `src.senales`, cuyas métricas se guardan tal cual bajo su tipo).
     alerta : bool
         Indica si hay una alerta médica en los datos.
     prev_hash : str
@@ -29,12 +166,16 @@ def crear_bloque(datos:list, alerta:bool, prev_hash:str) -> dict:
 
     for dato in datos:
         tipo = dato.get('tipo')
-        cuerpo[tipo] = {
-            'media': dato.get('media'),
-            'desv': dato.get('desv')
-        }
+        if tipo in TIPOS_BASE:
+            cuerpo[tipo] = {
+                'media': dato.get('media'),
+                'desv': dato.get('desv')
+            }
+        else:
+            cuerpo[tipo] = {clave: valor for clave, valor in dato.items() if clave not in ('tipo', 'timestamp', 'secuencia')}
 
     bloque = {
+        'version': VERSION if len(cuerpo) == len(TIPOS_BASE) else VERSION_SENALES,
         'timestamp': timestamp,
         'datos': cuerpo,
         'alerta': alerta,
@@ -42,7 +183,169 @@ def crear_bloque(datos:list, alerta:bool, prev_hash:str) -> dict:
     }
 
     # Calcular el hash del bloque
-    hash_input = prev_hash + dumps(cuerpo, sort_keys=True) + timestamp
-    bloque['hash'] = sha256(hash_input.encode()).hexdigest()
+    bloque['hash'] = calcular_hash(bloque)
 
     return bloque
+
+# Árbol de Merkle sobre los hashes de los bloques. Cada hoja es el hash de un bloque y cada nodo
+# interno es sha256(izquierdo + derecho) sobre los bytes de los hashes. Si un nivel tiene una
+# cantidad impar de nodos, el último se combina consigo mismo.
+
+def _nivel_siguiente(nivel:list) -> list:
+    if len(nivel) % 2:
+        nivel = nivel + [nivel[-1]]
+    return [sha256(nivel[i] + nivel[i + 1]).digest() for i in range(0, len(nivel), 2)]
+
+def raiz_merkle(hashes:list) -> str:
+    '''
+    Calcula la raíz del árbol de Merkle de una lista de hashes (hex). Para una lista vacía
+    devuelve el hash génesis ("0"*64).
+    '''
+    if not hashes:
+        return '0' * 64
+    nivel = [bytes.fromhex(h) for h in hashes]
+    while len(nivel) > 1:
+        nivel = _nivel_siguiente(nivel)
+    return nivel[0].hex()
+
+def prueba_merkle(hashes:list, indice:int) -> list:
+    '''
+    Devuelve la prueba de inclusión del hash `indice`: la lista de hashes hermanos desde la hoja
+    hasta la raíz, cada uno con el lado en el que se combina ('izq' o 'der'). Tiene O(log n) elementos.
+    '''
+    if not 0 <= indice < len(hashes):
+        raise IndexError
+    prueba = []
+    nivel = [bytes.fromhex(h) for h in hashes]
+    while len(nivel) > 1:
+        hermano = indice ^ 1
+        if hermano >= len(nivel):
+            hermano = indice # Nodo impar: se combina consigo mismo
+        prueba.append((nivel[hermano].hex(), 'izq' if hermano < indice else 'der'))
+        nivel = _nivel_siguiente(nivel)
+        indice //= 2
+    return prueba
+
+def verificar_prueba_merkle(hoja:str, prueba:list, raiz:str) -> bool:
+    '''
+    Comprueba en O(log n) que el hash `hoja` pertenece al árbol de Merkle con raíz `raiz`.
+    '''
+    actual = bytes.fromhex(hoja)
+    for hermano, lado in prueba:
+        hermano = bytes.fromhex(hermano)
+        actual = sha256(hermano + actual if lado == 'izq' else actual + hermano).digest()
+    return actual.hex() == raiz
+
+def verificar_segmento(bloques:list, checkpoint:dict) -> bool:
+    '''
+    Verifica un tramo completo de bloques contra su checkpoint: el hash recalculado de cada
+    bloque, los enlaces `prev_hash` dentro del tramo y la raíz de Merkle.
+    '''
+    if len(bloques) != checkpoint.get('bloque') - checkpoint.get('inicio') + 1:
+        return False
+    for i, bloque in enumerate(bloques):
+        # El enlace primero: un `prev_hash` alterado puede no ser hexadecimal
+        if i > 0 and bloque.get('prev_hash') != bloques[i - 1].get('hash'):
+            return False
+        if not hash_valido(bloque):
+            return False
+    return bloques[-1].get('hash') == checkpoint.get('hash') and raiz_merkle([b.get('hash') for b in bloques]) == checkpoint.get('merkle')
+
+def verificar_bloque(bloque:dict, prueba:list, checkpoint:dict) -> bool:
+    '''
+    Verifica un único bloque en O(log n): su hash recalculado y su prueba de inclusión en la
+    raíz de Merkle del checkpoint que lo cubre.
+    '''
+    return hash_valido(bloque) and verificar_prueba_merkle(bloque.get('hash'), prueba, checkpoint.get('merkle'))
+
+class IndiceCheckpoints:
+    '''
+    Índice lateral de checkpoints de la cadena. Cada `intervalo` bloques se guarda un checkpoint
+    (una línea JSON) con el tramo que cubre, el hash de su último bloque y la raíz de Merkle de
+    los hashes del tramo:
+        {"inicio": 0, "bloque": 99, "hash": "...", "merkle": "..."}
+
+    Con los checkpoints se puede verificar un bloque o un tramo sin recorrer toda la cadena, y
+    verificar_cadena.py puede volver a verificar solo la cola posterior al último checkpoint.
+
+    Parameters
+    ----------
+    ruta : str
+        Archivo del índice (JSON Lines).
+    intervalo : int
+        Cantidad de bloques por checkpoint.
+    previos : list
+        Checkpoints que se conservan de una cadena que se reanuda. Se escriben en un archivo
+        temporal que reemplaza al índice de una vez, así un corte mientras se reescriben no
+        pierde los checkpoints anteriores.
+    '''
+    def __init__(self, ruta:str='blockchain.checkpoints.jsonl', intervalo:int=100, previos:list=None):
+        if intervalo < 1:
+            raise ValueError
+        self.intervalo = intervalo
+        self.cantidad = 0
+        self.hashes = [] # Hashes del tramo actual (a lo sumo `intervalo`)
+        if previos is None:
+            self.archivo = open(ruta, 'w', encoding='utf-8')
+            return
+        temporal = ruta + '.tmp'
+        with open(temporal, 'w', encoding='utf-8') as f:
+            for checkpoint in previos:
+                f.write(json.dumps(checkpoint) + '\n')
+        os.replace(temporal, ruta)
+        self.archivo = open(ruta, 'a', encoding='utf-8')
+        self.cantidad = previos[-1].get('bloque') + 1 if previos else 0
+
+    def agregar(self, bloque:dict):
+        self.hashes.append(bloque.get('hash'))
+        self.cantidad += 1
+        if len(self.hashes) == self.intervalo:
+            checkpoint = {
+                'inicio': self.cantidad - self.intervalo,
+                'bloque': self.cantidad - 1,
+                'hash': bloque.get('hash'),
+                'merkle': raiz_merkle(self.hashes),
+            }
+            self.archivo.write(json.dumps(checkpoint) + '\n')
+            self.archivo.flush()
+            self.hashes = []
+
+    def cerrar(self):
+        self.archivo.close()
+
+def leer_checkpoints(ruta:str='blockchain.checkpoints.jsonl') -> list:
+    '''
+    Lee el índice de checkpoints escrito por `IndiceCheckpoints`, ordenado por bloque.
+
+    Una última línea incompleta (el proceso murió mientras la escribía) se descarta, igual que
+    en `src.almacenamiento.recuperar_jsonl`. Lanza ValueError si una línea anterior es ilegible.
+    '''
+    with open(ruta, 'r', encoding='utf-8') as f:
+        lineas = f.readlines()
+    checkpoints = []
+    for i, linea in enumerate(lineas):
+        if not linea.strip():
+            continue
+        try:
+            checkpoint = json.loads(linea) if linea.endswith('\n') else None
+        except ValueError:
+            checkpoint = None
+        if checkpoint is None:
+            if i < len(lineas) - 1:
+                raise ValueError(f'Checkpoint {len(checkpoints)} ilegible en {ruta}')
+            break # Escritura incompleta al final
+        checkpoints.append(checkpoint)
+    return checkpoints
+
+def reanudar_checkpoints(ultimos_hashes:Any, bloques:int, ruta:str='blockchain.checkpoints.jsonl', intervalo:int=100) -> IndiceCheckpoints:
+    '''
+    Abre el índice de checkpoints de una cadena que se reanuda con `bloques` bloques. Se conservan
+    los checkpoints que cubren bloques existentes y se vuelven a agregar los hashes posteriores al
+    último, que se piden con `ultimos_hashes(cantidad)` (ver `AlmacenJSONL.ultimos_hashes`).
+    '''
+    previos = [c for c in leer_checkpoints(ruta) if c.get('bloque') < bloques] if os.path.exists(ruta) else []
+    indice = IndiceCheckpoints(ruta, intervalo, previos)
+    for hash_bloque in ultimos_hashes(bloques - indice.cantidad):
+        indice.agregar({'hash': hash_bloque})
+    indice.archivo.flush()
+    return indice
@@ -0,0 +1,140 @@
+import json, os, shutil
+from array import array
+import numpy as np
+from src.almacenamiento import iterar_bloques
+from src.blockchain import hash_valido, TIPOS_BASE
+
+# Archivo columnar de una cadena verificada, para análisis: un directorio con un .npy por columna
+# (una métrica de todos los bloques, contigua en disco) y un metadatos.json. Los .npy se abren con
+# `np.load(mmap_mode='r')`, así que leer una columna no decodifica JSON ni carga el resto.
+#
+# Columnas:
+#   - timestamp:        int64, segundos desde epoch del timestamp de cada bloque.
+#   - alerta:           bool.
+#   - <canal>.<campo>:  float64, media y desviación de frecuencia, sistolica, diastolica y oxigeno
+#                       (por ejemplo 'sistolica.media').
+#   - <tipo>.<métrica>: float64, métricas de los tipos de procesamiento de señales (por ejemplo
+#                       'espectro.lf'); NaN en los bloques que no las tienen.
+
+METADATOS = 'metadatos.json'
+FORMATO = 1
+CANALES_PRESION = ('sistolica', 'diastolica')
+# Columnas que tiene todo archivo, aunque no haya bloques válidos
+COLUMNAS_BASE = tuple(f'{canal}.{campo}' for campo in ('media', 'desv') for canal in ('frecuencia', *CANALES_PRESION, 'oxigeno'))
+
+def _valor(valor) -> float:
+    return float('nan') if valor is None else float(valor)
+
+def fila_bloque(bloque:dict) -> dict:
+    '''
+    Aplana el cuerpo de un bloque en {nombre de columna: valor}.
+    '''
+    fila = {}
+    for tipo, valores in bloque.get('datos').items():
+        if tipo not in TIPOS_BASE:
+            fila.update({f'{tipo}.{metrica}': _valor(valor) for metrica, valor in valores.items()})
+            continue
+        for campo in ('media', 'desv'):
+            valor = valores.get(campo)
+            if tipo == 'presion':
+                # La desviación de una ventana con un solo dato se guarda como 0 para ambos canales
+                for i, canal in enumerate(CANALES_PRESION):
+                    fila[f'{canal}.{campo}'] = _valor(valor[i] if isinstance(valor, list) else valor)
+            else:
+                fila[f'{tipo}.{campo}'] = _valor(valor)
+    return fila
+
+def exportar_columnas(origen:str='blockchain.json', destino:str='blockchain.columnas') -> dict:
+    '''
+    Verifica una cadena (blockchain.json o .jsonl) recorriéndola de a un bloque y guarda sus
+    bloques válidos (los anteriores al primero inválido) en formato columnar en `destino`.
+
+    Se escribe en un directorio temporal que reemplaza a `destino` al terminar: una exportación
+    anterior no deja columnas viejas mezcladas con las nuevas, y un corte a mitad de camino la
+    deja intacta.
+
+    Returns
+    -------
+    dict
+        Los metadatos guardados: cantidad de bloques leídos, válidos e inválidos, índice del
+        primer inválido (o None), hash del último bloque válido y nombres de las columnas.
+    '''
+    destino = os.path.normpath(destino)
+    temporal = destino + '.tmp'
+    shutil.rmtree(temporal, ignore_errors=True)
+    os.makedirs(temporal)
+    timestamps = array('q')
+    alertas = array('b')
+    valores = {nombre: array('d') for nombre in COLUMNAS_BASE}
+    prev_hash = '0' * 64
+    leidos = 0
+    primer_invalido = None
+    for bloque in iterar_bloques(origen):
+        leidos += 1
+        if primer_invalido is not None:
+            continue
+        if bloque.get('prev_hash') != prev_hash or not hash_valido(bloque):
+            primer_invalido = leidos - 1
+            continue
+        prev_hash = bloque.get('hash')
+        fila = fila_bloque(bloque)
+        for nombre in fila.keys() - valores.keys():
+            # Una columna que aparece después (por ejemplo, otro tipo de señales) vale NaN antes
+            valores[nombre] = array('d', [float('nan')]) * len(timestamps)
+        for nombre, columna in valores.items():
+            columna.append(fila.get(nombre, float('nan')))
+        timestamps.append(int(np.datetime64(bloque.get('timestamp'), 's').astype(np.int64)))
+        alertas.append(bool(bloque.get('alerta')))
+
+    np.save(os.path.join(temporal, 'timestamp.npy'), np.frombuffer(timestamps, dtype=np.int64))
+    np.save(os.path.join(temporal, 'alerta.npy'), np.frombuffer(alertas, dtype=np.int8).astype(bool))
+    for nombre, columna in valores.items():
+        np.save(os.path.join(temporal, f'{nombre}.npy'), np.frombuffer(columna, dtype=np.float64))
+    metadatos = {
+        'formato': FORMATO,
+        'bloques': leidos,
+        'validos': len(timestamps),
+        'invalidos': leidos - len(timestamps),
+        'primer_invalido': primer_invalido,
+        'ultimo_hash': prev_hash,
+        'columnas': sorted(valores),
+    }
+    # Los metadatos se escriben al final: si faltan, la exportación no terminó
+    with open(os.path.join(temporal, METADATOS), 'w', encoding='utf-8') as f:
+        json.dump(metadatos, f, indent=2)
+    # Un directorio no se puede reemplazar con os.replace si existe: el anterior se aparta primero
+    anterior = destino + '.anterior'
+    shutil.rmtree(anterior, ignore_errors=True)
+    if os.path.exists(destino):
+        os.rename(destino, anterior)
+    os.rename(temporal, destino)
+    shutil.rmtree(anterior, ignore_errors=True)
+    return metadatos
+
+def cargar_columnas(directorio:str='blockchain.columnas', nombres:list=None) -> tuple:
+    '''
+    Abre un archivo columnar de `exportar_columnas` sin leer los datos: cada columna es un arreglo
+    de solo lectura mapeado en memoria (`np.memmap`).
+
+    Parameters
+    ----------
+    nombres : list
+        Columnas a abrir (además de 'timestamp' y 'alerta'). Por defecto, todas.
+
+    Returns
+    -------
+    tuple
+        (metadatos, {nombre: arreglo})
+    '''
+    with open(os.path.join(directorio, METADATOS), 'r', encoding='utf-8') as f:
+        metadatos = json.load(f)
+    if metadatos.get('formato') != FORMATO:
+        raise ValueError(f'Formato de archivo columnar desconocido: {metadatos.get("formato")}')
+    nombres = metadatos.get('columnas') if nombres is None else nombres
+    # Un arreglo vacío no se puede mapear en memoria
+    modo = 'r' if metadatos.get('validos') > 0 else None
+    columnas = {
+        nombre: np.load(os.path.join(directorio, f'{nombre}.npy'), mmap_mode=modo)
+        for nombre in ('timestamp', 'alerta', *nombres)
+    }
+    return metadatos, columnas
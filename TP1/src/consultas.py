@@ -0,0 +1,139 @@
+import json, mmap, os
+from bisect import bisect_left, bisect_right
+from struct import Struct
+import numpy as np
+
+# Índice de offsets de una cadena (<cadena>.offsets), que el verificador mantiene mientras
+# escribe: un registro binario de tamaño fijo por bloque, en orden, con el offset (en bytes) del
+# bloque dentro del archivo de la cadena, su largo y su timestamp (epoch). El bloque N está en la
+# posición N del índice, y como los bloques se agregan en orden cronológico los timestamps quedan
+# ordenados y se buscan con búsqueda binaria. Sirve tanto para blockchain.jsonl como para
+# blockchain.json (el texto de cada bloque no cambia cuando se agregan otros).
+
+REGISTRO_OFFSET = Struct('<qqq') # offset, largo, timestamp
+DTYPE_OFFSET = np.dtype([('offset', '<i8'), ('largo', '<i8'), ('timestamp', '<i8')])
+
+def ruta_offsets(ruta:str) -> str:
+    return ruta + '.offsets'
+
+def epoch(timestamp:str) -> int:
+    '''
+    Convierte un timestamp ISO ("YYYY-MM-DDTHH:MM:SS") a segundos desde epoch, sin zona horaria
+    (la misma conversión que `numpy.datetime64`).
+    '''
+    return int(np.datetime64(timestamp, 's').astype(np.int64))
+
+class IndiceOffsets:
+    '''
+    Escritor del índice de offsets de una cadena.
+
+    Parameters
+    ----------
+    ruta_cadena : str
+        Archivo de la cadena; el índice se guarda en `ruta_offsets(ruta_cadena)`.
+    bloques : int
+        Si se continúa una cadena existente, su cantidad de bloques: el índice se conserva hasta
+        ese bloque (`cantidad` dice cuántos registros tiene y faltan los demás). Por defecto se
+        empieza un índice nuevo.
+    '''
+    def __init__(self, ruta_cadena:str, bloques:int=None):
+        self.ruta = ruta_offsets(ruta_cadena)
+        if bloques is None or not os.path.exists(self.ruta):
+            self.archivo = open(self.ruta, 'wb')
+            self.cantidad = 0
+        else:
+            self.archivo = open(self.ruta, 'r+b')
+            self.cantidad = min(bloques, os.path.getsize(self.ruta) // REGISTRO_OFFSET.size)
+            self.archivo.truncate(self.cantidad * REGISTRO_OFFSET.size)
+            self.archivo.seek(0, os.SEEK_END)
+
+    def ultimo(self) -> tuple:
+        '''
+        Devuelve (offset, largo) del último bloque del índice, o None si está vacío.
+        '''
+        if self.cantidad == 0:
+            return None
+        with open(self.ruta, 'rb') as f:
+            f.seek((self.cantidad - 1) * REGISTRO_OFFSET.size)
+            offset, largo, _ = REGISTRO_OFFSET.unpack(f.read(REGISTRO_OFFSET.size))
+        return offset, largo
+
+    def agregar(self, offset:int, largo:int, timestamp:str):
+        self.archivo.write(REGISTRO_OFFSET.pack(offset, largo, epoch(timestamp)))
+        self.archivo.flush()
+        self.cantidad += 1
+
+    def cerrar(self):
+        self.archivo.close()
+
+class CadenaIndexada:
+    '''
+    Acceso aleatorio a los bloques de una cadena con su índice de offsets: el archivo de la cadena
+    y el índice se mapean en memoria (`mmap`), así que leer un bloque decodifica solo ese bloque y
+    buscar por timestamp es O(log n), sin importar el tamaño de la cadena.
+
+    Se usa como context manager:
+
+        with CadenaIndexada('blockchain.jsonl') as cadena:
+            bloque = cadena.bloque(41)
+            inicio, fin = cadena.rango('2025-08-05T12:00:00', '2025-08-05T12:59:59')
+    '''
+    def __init__(self, ruta:str='blockchain.json'):
+        self.archivo = open(ruta, 'rb')
+        tamanio = os.path.getsize(ruta)
+        self.mapa = mmap.mmap(self.archivo.fileno(), 0, access=mmap.ACCESS_READ) if tamanio else b''
+        cantidad = os.path.getsize(ruta_offsets(ruta)) // DTYPE_OFFSET.itemsize
+        # Un arreglo vacío no se puede mapear en memoria
+        self.indice = np.memmap(ruta_offsets(ruta), dtype=DTYPE_OFFSET, mode='r', shape=(cantidad,)) if cantidad else np.zeros(0, dtype=DTYPE_OFFSET)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.cerrar()
+
+    def __len__(self):
+        return len(self.indice)
+
+    def bloque(self, numero:int) -> dict:
+        '''
+        Devuelve el bloque `numero` (desde 0). Lanza IndexError si no existe.
+        '''
+        if not 0 <= numero < len(self.indice):
+            raise IndexError(numero)
+        offset, largo, _ = (int(v) for v in self.indice[numero])
+        if offset + largo > len(self.mapa):
+            raise IndexError(numero) # El índice apunta más allá del final de la cadena
+        return json.loads(self.mapa[offset:offset + largo])
+
+    def bloques(self, inicio:int=0, fin:int=None):
+        '''
+        Genera los bloques del rango [inicio, fin).
+        '''
+        fin = len(self.indice) if fin is None else min(fin, len(self.indice))
+        for numero in range(max(inicio, 0), fin):
+            yield self.bloque(numero)
+
+    def buscar(self, timestamp:str) -> int:
+        '''
+        Número del último bloque con timestamp anterior o igual a `timestamp` (-1 si no hay).
+        '''
+        # bisect sobre la vista del memmap lee solo O(log n) registros (np.searchsorted copiaría
+        # la columna completa, que no es contigua)
+        return bisect_right(self.indice['timestamp'], epoch(timestamp)) - 1
+
+    def rango(self, desde:str=None, hasta:str=None) -> tuple:
+        '''
+        Devuelve (inicio, fin): los bloques [inicio, fin) tienen timestamp entre `desde` y `hasta`
+        (ambos incluidos; None = sin límite).
+        '''
+        timestamps = self.indice['timestamp']
+        inicio = 0 if desde is None else bisect_left(timestamps, epoch(desde))
+        fin = len(timestamps) if hasta is None else bisect_right(timestamps, epoch(hasta))
+        return inicio, max(inicio, fin)
+
+    def cerrar(self):
+        self.indice = None
+        if isinstance(self.mapa, mmap.mmap):
+            self.mapa.close()
+        self.archivo.close()
@@ -0,0 +1,128 @@
+from collections import deque
+from multiprocessing import Array, Semaphore
+from typing import Any
+
+# Contrapresión entre el generador y los analizadores. Cada analizador tiene un semáforo de
+# créditos de entrada con `capacidad` mensajes: el generador toma un crédito de cada analizador
+# antes de enviar un mensaje y el analizador lo devuelve al leerlo, así que en cada pipe nunca hay
+# más de `capacidad` mensajes sin leer (en lugar del límite en bytes, implícito, del buffer del
+# pipe). Cuando algún analizador no tiene lugar, la política decide qué hace el generador:
+#   - 'bloquear':  espera a que haya lugar (el comportamiento de siempre, ahora con un límite explícito).
+#   - 'descartar': guarda el dato en un buffer local de `capacidad` datos y sigue; si el buffer se
+#                  llena descarta el más viejo. Los datos descartados no llegan a ningún analizador.
+#   - 'coalescer': junta los datos pendientes y los envía en un solo mensaje en cuanto hay lugar;
+#                  cada analizador agrega todos a su ventana pero hace un solo análisis (una ronda,
+#                  un bloque). Si se juntan `capacidad` datos espera, para no perder ninguno.
+# Un dato descartado o coalescido no genera bloque, así que con 'descartar' y 'coalescer' la
+# cantidad de rondas no se conoce de antemano: el generador termina con un mensaje vacío y cada
+# analizador lo reenvía al verificador (ver `src.analizador.analizar`).
+
+POLITICAS = ('bloquear', 'descartar', 'coalescer')
+
+class Contrapresion:
+    '''
+    Créditos de entrada de los analizadores y política del generador cuando no hay lugar.
+
+    Parameters
+    ----------
+    lectores : int
+        Cantidad de procesos que leen lo que envía el generador (uno por pipe).
+    politica : str
+        Una de `POLITICAS`.
+    capacidad : int
+        Mensajes sin leer que puede tener cada pipe (0 = sin límite explícito; solo con 'bloquear').
+
+    Los contadores (datos descartados, datos coalescidos y mensajes enviados) están en memoria
+    compartida: los escribe el generador y el proceso principal puede leerlos al terminar.
+    '''
+    def __init__(self, lectores:int=3, politica:str='bloquear', capacidad:int=0):
+        if politica not in POLITICAS or capacidad < 0 or lectores < 1 or (politica != 'bloquear' and capacidad == 0):
+            raise ValueError
+        self.politica = politica
+        self.capacidad = capacidad
+        self.creditos = [Semaphore(capacidad) for _ in range(lectores)] if capacidad else []
+        self.contadores = Array('q', 3)
+        self.pendientes = deque()
+
+    @property
+    def fin_explicito(self) -> bool:
+        '''
+        Si la cantidad de rondas depende de los datos descartados o coalescidos (y el generador
+        tiene que avisar el final con un mensaje vacío).
+        '''
+        return self.politica != 'bloquear'
+
+    @property
+    def descartados(self) -> int:
+        return self.contadores[0]
+
+    @property
+    def coalescidos(self) -> int:
+        return self.contadores[1]
+
+    @property
+    def mensajes(self) -> int:
+        return self.contadores[2]
+
+    def entrada(self, lector:int) -> Any:
+        '''
+        Semáforo de créditos que el lector `lector` libera cada vez que lee un mensaje (o None si
+        no hay límite).
+        '''
+        return self.creditos[lector] if self.creditos else None
+
+    def reservar(self, bloquear:bool=True) -> bool:
+        '''
+        Toma un crédito de cada lector, todos o ninguno. Sin `bloquear` devuelve False si alguno
+        no tiene lugar.
+        '''
+        for i, credito in enumerate(self.creditos):
+            if not credito.acquire(bloquear):
+                for tomado in self.creditos[:i]:
+                    tomado.release()
+                return False
+        return True
+
+    def agregar(self, datos:list) -> list:
+        '''
+        Recibe los datos de un mensaje del generador y devuelve la lista de mensajes (listas de
+        datos) que se pueden enviar ahora, según la política.
+        '''
+        if self.politica == 'bloquear':
+            self.reservar()
+            return self._enviados([datos])
+        self.pendientes.append(datos)
+        if self.politica == 'descartar':
+            if len(self.pendientes) > self.capacidad:
+                self.contadores[0] += len(self.pendientes.popleft())
+            mensajes = []
+            while self.pendientes and self.reservar(False):
+                mensajes.append(self.pendientes.popleft())
+            return self._enviados(mensajes)
+        # Con el buffer lleno se espera lugar en lugar de descartar
+        if self.reservar(len(self.pendientes) >= self.capacidad):
+            return self._enviados([self._coalescer()])
+        return []
+
+    def vaciar(self):
+        '''
+        Genera los mensajes que quedan pendientes al terminar, esperando lugar para cada uno.
+        '''
+        if self.politica == 'coalescer':
+            mensajes = [self._coalescer()] if self.pendientes else []
+        else:
+            mensajes = list(self.pendientes)
+            self.pendientes.clear()
+        for mensaje in mensajes:
+            self.reservar()
+            yield from self._enviados([mensaje])
+
+    def _coalescer(self) -> list:
+        datos = [dato for pendiente in self.pendientes for dato in pendiente]
+        self.contadores[1] += len(datos) - 1
+        self.pendientes.clear()
+        return datos
+
+    def _enviados(self, mensajes:list) -> list:
+        self.contadores[2] += len(mensajes)
+        return mensajes
@@ -1,11 +1,14 @@
 from datetime import datetime
 import random, json, time
 from os import getpid
+from src.protocolo import codificar
+from typing import Any
 
-def generar_dato():
+def generar_dato(paciente:int=None):
     '''
     Genera un diccionario por segundo:
     {
+       "paciente": int (solo si se indica `paciente`),
        "timestamp": "YYYY-MM-DDTHH:MM:SS",
        "frecuencia": int(60-180),
        "presion": [int(110-180), int(70-110)],
@@ -14,14 +17,29 @@ def generar_dato():
     '''
     # Devuelve un diccionario con los campos frecuencia, presión y oxígeno
     # {"timestamp": "2025-06-11T15:32:09", "frecuencia": 122, "presion": [166, 99], "oxigeno": 100}
-    return json.dumps({
+    dato = {} if paciente is None else {"paciente": paciente}
+    dato.update({
         "timestamp": datetime.now().isoformat(timespec='seconds'),
         "frecuencia": random.randint(40, 220),
         "presion": [random.randint(110, 220), random.randint(40, 110)], # [sistolica, diastolica]
         "oxigeno": random.randint(89, 100)
     })
+    return json.dumps(dato)
 
-def generar(n:int=60,pipes:list=[],verbose:bool=False):
+def generar_registro():
+    '''
+    Igual que `generar_dato`, pero devuelve un registro para el formato binario de `src.protocolo`:
+    (timestamp_epoch, frecuencia, sistólica, diastólica, oxígeno)
+    '''
+    return (
+        int(time.time()),
+        random.randint(40, 220),
+        random.randint(110, 220),
+        random.randint(40, 110),
+        random.randint(89, 100)
+    )
+
+def generar(n:int=60,pipes:list=[],verbose:bool=False,binario:bool=False,tasa:float=1.0,lote:int=1,metricas:Any=None,contrapresion:Any=None):
     '''
     Genera n datos y los escribe en los pipes pipe_frec, pipe_press y pipe_ox.
     
@@ -37,14 +55,67 @@ def generar(n:int=60,pipes:list=[],verbose:bool=False):
         Extremo de escritura del pipe para el oxígeno.
     verbose : bool
         Imprime en stdout los datos generados si es True.
+    binario : bool
+        Si es True cada dato se envía como un registro binario de tamaño fijo (`src.protocolo`)
+        con `send_bytes`, en lugar de un string JSON.
+    tasa : float
+        Datos por segundo (por defecto 1). Con 0 se generan tan rápido como sea posible.
+    lote : int
+        Cantidad de datos por mensaje. Con lote > 1 cada mensaje es un arreglo JSON de datos o
+        la concatenación de `lote` registros binarios (el último lote puede ser más chico).
+    metricas : Metricas
+        Instrumentación del pipeline (`src.metricas`, opcional): se anota el envío de cada dato.
+    contrapresion : Contrapresion
+        Créditos de entrada de los analizadores y política cuando alguno no tiene lugar
+        (`src.contrapresion`, opcional). Con 'descartar' o 'coalescer' (que requieren lote 1) los
+        datos pueden descartarse o enviarse juntos, y al final se envía un mensaje vacío.
     '''
-    if n < 0 or pipes==[]:
+    if n < 0 or pipes==[] or tasa < 0 or lote < 1:
+        raise ValueError
+    if contrapresion is not None and contrapresion.fin_explicito and lote > 1:
         raise ValueError
     print(f'[{getpid()}] Proceso generador iniciado.')
-    for i in range(n):
-        dato = generar_dato()
-        for pipe in pipes:
-            pipe.send(dato)
+    ronda = 0 # Número de mensajes enviados: cada uno es una ronda de los analizadores
+
+    def enviar(dato:list):
+        nonlocal ronda
+        if binario:
+            payload = b''.join(codificar(registro) for registro in dato)
+            for pipe in pipes:
+                pipe.send_bytes(payload)
+        else:
+            # Un solo dato se envía tal cual, para mantener el formato original
+            payload = dato[0] if len(dato) == 1 and lote == 1 else '[' + ','.join(dato) + ']'
+            for pipe in pipes:
+                pipe.send(payload)
+        if metricas is not None:
+            # Con lotes cada dato es una ronda; un mensaje coalescido es una sola
+            for secuencia in range(ronda, ronda + (len(dato) if lote > 1 else 1)):
+                metricas.enviado(secuencia)
+        ronda += len(dato) if lote > 1 else 1
+
+    proximo = time.monotonic()
+    for i in range(0, n, lote):
+        cantidad = min(lote, n - i)
+        dato = [generar_registro() if binario else generar_dato() for _ in range(cantidad)]
+        for mensaje in ([dato] if contrapresion is None else contrapresion.agregar(dato)):
+            enviar(mensaje)
         if verbose:
-            print(f'[{getpid()}] Proceso generador: dato {i+1} generado; escribiendo en pipes: \n\t{dato}')
-        time.sleep(1)
+            print(f'[{getpid()}] Proceso generador: datos {i+1} a {i+cantidad} generados; escribiendo en pipes: \n\t{dato}')
+        if tasa > 0:
+            # Se duerme hasta el próximo instante programado, así el costo de generar y
+            # enviar no se suma al período y la tasa se mantiene aun con tasas altas
+            proximo += cantidad / tasa
+            espera = proximo - time.monotonic()
+            if espera > 0:
+                time.sleep(espera)
+    if contrapresion is not None:
+        for mensaje in contrapresion.vaciar():
+            enviar(mensaje)
+        if contrapresion.fin_explicito:
+            # Mensaje vacío: no hay más datos
+            for pipe in pipes:
+                if binario:
+                    pipe.send_bytes(b'')
+                else:
+                    pipe.send('null')
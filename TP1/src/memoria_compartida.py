@@ -0,0 +1,196 @@
+from multiprocessing import Semaphore
+from multiprocessing.shared_memory import SharedMemory
+from struct import Struct
+from time import sleep
+from src.protocolo import REGISTRO, RESULTADO, codificar_resultado_en, decodificar_resultado
+
+# Cabecera del segmento: número de secuencia del próximo registro a escribir (uint64)
+CABECERA = Struct('<Q')
+# Contador de resultados leídos de un tipo en `ResultadosCompartidos` (int64)
+CONTADOR = Struct('<q')
+
+class AnilloCompartido:
+    '''
+    Buffer circular en memoria compartida para repartir los datos del generador a varios
+    analizadores. El generador escribe cada registro una sola vez y todos los lectores lo
+    leen desde el mismo segmento, de forma que agregar analizadores no multiplica las copias
+    ni las escrituras en pipes.
+
+    Cada lector tiene su propio cursor (número de secuencia del próximo registro que le toca
+    leer) y un par de semáforos:
+        - disponibles[i]: registros escritos que el lector i todavía no leyó.
+        - libres[i]: posiciones que el lector i ya liberó y el generador puede sobrescribir.
+    El generador se bloquea si el lector más lento tiene el anillo lleno.
+
+    Parameters
+    ----------
+    lectores : int
+        Cantidad de procesos que leen del anillo.
+    capacidad : int
+        Cantidad de registros que entran en el anillo.
+    '''
+    def __init__(self, lectores:int=3, capacidad:int=1024):
+        if lectores < 1 or capacidad < 1:
+            raise ValueError
+        self.lectores = lectores
+        self.capacidad = capacidad
+        self.shm = SharedMemory(create=True, size=CABECERA.size + capacidad * REGISTRO.size)
+        CABECERA.pack_into(self.shm.buf, 0, 0)
+        self.disponibles = [Semaphore(0) for _ in range(lectores)]
+        self.libres = [Semaphore(capacidad) for _ in range(lectores)]
+
+    def posicion(self, secuencia:int) -> int:
+        '''
+        Devuelve el offset dentro del segmento del registro con número de secuencia `secuencia`.
+        '''
+        return CABECERA.size + (secuencia % self.capacidad) * REGISTRO.size
+
+    def escritor(self):
+        return EscritorAnillo(self)
+
+    def lector(self, indice:int):
+        if not 0 <= indice < self.lectores:
+            raise ValueError
+        return LectorAnillo(self, indice)
+
+    def liberar(self):
+        '''
+        Cierra y elimina el segmento de memoria compartida. Debe llamarlo el proceso que lo creó
+        una vez que terminaron el generador y los lectores.
+        '''
+        self.shm.close()
+        self.shm.unlink()
+
+class EscritorAnillo:
+    '''
+    Extremo de escritura del anillo. Tiene la misma interfaz que `Connection.send_bytes`, así
+    que el generador lo usa igual que a un pipe en modo binario.
+    '''
+    def __init__(self, anillo:AnilloCompartido):
+        self.anillo = anillo
+        self.secuencia = 0
+
+    def send_bytes(self, payload:bytes):
+        '''
+        Escribe uno o más registros de `src.protocolo` (len(payload) debe ser múltiplo de REGISTRO.size).
+        '''
+        anillo = self.anillo
+        buf = anillo.shm.buf
+        for inicio in range(0, len(payload), REGISTRO.size):
+            # Esperar a que todos los lectores hayan liberado la posición a sobrescribir
+            for libre in anillo.libres:
+                libre.acquire()
+            offset = anillo.posicion(self.secuencia)
+            buf[offset:offset + REGISTRO.size] = payload[inicio:inicio + REGISTRO.size]
+            self.secuencia += 1
+            CABECERA.pack_into(buf, 0, self.secuencia)
+            for disponible in anillo.disponibles:
+                disponible.release()
+
+class LectorAnillo:
+    '''
+    Extremo de lectura del anillo para el lector `indice`. Tiene la misma interfaz que
+    `Connection.recv_bytes_into`, así que el analizador lo usa igual que a un pipe en modo binario.
+    '''
+    def __init__(self, anillo:AnilloCompartido, indice:int):
+        self.anillo = anillo
+        self.indice = indice
+        self.secuencia = 0 # Cursor: próximo registro a leer
+
+    def recv_bytes_into(self, buffer) -> int:
+        '''
+        Copia en `buffer` el próximo registro (bloquea si no hay ninguno). Si el buffer tiene
+        lugar para más registros y ya están escritos, los copia también sin volver a bloquear.
+
+        Returns
+        -------
+        int
+            Cantidad de bytes copiados en el buffer.
+        '''
+        anillo = self.anillo
+        disponible = anillo.disponibles[self.indice]
+        libre = anillo.libres[self.indice]
+        buf = anillo.shm.buf
+        maximo = len(buffer) // REGISTRO.size
+        leidos = 0
+        while leidos < maximo and disponible.acquire(leidos == 0):
+            offset = anillo.posicion(self.secuencia)
+            destino = leidos * REGISTRO.size
+            buffer[destino:destino + REGISTRO.size] = buf[offset:offset + REGISTRO.size]
+            self.secuencia += 1
+            leidos += 1
+            libre.release()
+        return leidos * REGISTRO.size
+
+class ResultadosCompartidos:
+    '''
+    Arreglo de casillas en memoria compartida para pasar los resultados de los analizadores al
+    verificador sin serializarlos: cada analizador escribe sus resultados como registros
+    `src.protocolo.RESULTADO` en la casilla (ronda, tipo) y por la Queue solo envía un aviso
+    pequeño (posición del tipo, primera secuencia, cantidad), en lugar de un string JSON que se
+    vuelve a serializar con pickle en el hilo de la Queue y se decodifica en el verificador.
+
+    Cada tipo tiene `capacidad` casillas, usadas en forma circular. Al principio del segmento hay
+    un contador por tipo con los resultados que el verificador ya leyó (lo escribe solo el
+    verificador, sin locks, como en `src.metricas`): el analizador no escribe un resultado hasta
+    que su casilla esté leída, y espera si el verificador está `capacidad` resultados atrás.
+
+    Parameters
+    ----------
+    tipos : tuple
+        Tipos de analizador de la corrida (uno por proceso analizador).
+    capacidad : int
+        Resultados de cada tipo que pueden estar escritos y sin leer (al menos el lote).
+    espera : float
+        Segundos entre cada revisión del contador cuando no hay casillas libres.
+    '''
+    def __init__(self, tipos:tuple=('frecuencia', 'presion', 'oxigeno'), capacidad:int=1024, espera:float=0.001):
+        if not tipos or capacidad < 1:
+            raise ValueError
+        self.tipos = tuple(tipos)
+        self.capacidad = capacidad
+        self.espera = espera
+        self.shm = SharedMemory(create=True, size=CONTADOR.size * len(self.tipos) + capacidad * len(self.tipos) * RESULTADO.size)
+        self.shm.buf[:CONTADOR.size * len(self.tipos)] = bytes(CONTADOR.size * len(self.tipos))
+
+    def offset(self, posicion:int, secuencia:int) -> int:
+        '''
+        Offset dentro del segmento de la casilla del resultado `secuencia` del tipo `posicion`.
+        '''
+        return CONTADOR.size * len(self.tipos) + ((secuencia % self.capacidad) * len(self.tipos) + posicion) * RESULTADO.size
+
+    def leidos(self, posicion:int) -> int:
+        return CONTADOR.unpack_from(self.shm.buf, posicion * CONTADOR.size)[0]
+
+    def enviar(self, queue, resultados:list):
+        '''
+        Escribe los resultados (todos del mismo tipo, con secuencias consecutivas) en sus casillas
+        y pone el aviso en la cola. Espera si el tipo no tiene casillas libres.
+        '''
+        posicion = self.tipos.index(resultados[0].get('tipo'))
+        ultima = resultados[-1].get('secuencia')
+        while ultima - self.leidos(posicion) >= self.capacidad:
+            sleep(self.espera)
+        for resultado in resultados:
+            codificar_resultado_en(self.shm.buf, self.offset(posicion, resultado.get('secuencia')), resultado)
+        queue.put((posicion, resultados[0].get('secuencia'), len(resultados)))
+
+    def leer(self, aviso:tuple) -> list:
+        '''
+        Devuelve los resultados de un aviso de `enviar` y libera sus casillas. Un aviso None (fin
+        de un analizador) devuelve None.
+        '''
+        if aviso is None:
+            return None
+        posicion, primera, cantidad = aviso
+        tipo = self.tipos[posicion]
+        resultados = [decodificar_resultado(self.shm.buf, self.offset(posicion, secuencia), tipo) for secuencia in range(primera, primera + cantidad)]
+        CONTADOR.pack_into(self.shm.buf, posicion * CONTADOR.size, primera + cantidad)
+        return resultados
+
+    def liberar(self):
+        '''
+        Cierra y elimina el segmento de memoria compartida (lo llama el proceso que lo creó).
+        '''
+        self.shm.close()
+        self.shm.unlink()
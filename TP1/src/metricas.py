@@ -0,0 +1,247 @@
+from math import log2
+from time import monotonic
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+
+# Latencias que se miden para cada dato (en segundos, con time.monotonic, que es el mismo reloj
+# en todos los procesos):
+#   - transporte: desde que el generador envía el dato hasta que el analizador lo toma.
+#   - analisis:   desde que el analizador toma el dato hasta que tiene el resultado.
+#   - cola:       desde el último resultado de la ronda hasta que el verificador escribe el bloque.
+#   - total:      desde que el generador envía el dato hasta que se escribe su bloque.
+ETAPAS = ('transporte', 'analisis', 'cola', 'total')
+
+# Histogramas logarítmicos: SUBDIVISIONES buckets por cada potencia de 2 de microsegundos (error
+# relativo menor al 20%), hasta 2**(BUCKETS / SUBDIVISIONES) us (~70 minutos).
+BUCKETS = 128
+SUBDIVISIONES = 4
+# Histogramas lineales de profundidad (datos pendientes en cada pipe y resultados en la cola)
+PROFUNDIDAD_MAXIMA = 256
+
+PERCENTILES = (50, 95, 99)
+
+def bucket(segundos:float) -> int:
+    '''
+    Devuelve el bucket del histograma logarítmico para una latencia.
+    '''
+    microsegundos = segundos * 1e6
+    if microsegundos <= 1:
+        return 0
+    return min(int(log2(microsegundos) * SUBDIVISIONES), BUCKETS - 1)
+
+def limite_bucket(indice:int) -> float:
+    '''
+    Devuelve el límite superior (en segundos) del bucket `indice`.
+    '''
+    return 2 ** ((indice + 1) / SUBDIVISIONES) / 1e6
+
+def percentiles(histograma:np.ndarray, limites:np.ndarray) -> list:
+    '''
+    Calcula los percentiles de `PERCENTILES` de un histograma, como el límite superior del bucket
+    donde cae cada uno. Devuelve None para cada percentil si el histograma está vacío.
+    '''
+    total = int(histograma.sum())
+    if total == 0:
+        return [None] * len(PERCENTILES)
+    acumulado = np.cumsum(histograma)
+    return [float(limites[np.searchsorted(acumulado, total * p / 100)]) for p in PERCENTILES]
+
+class Metricas:
+    '''
+    Instrumentación del pipeline en memoria compartida, con costo bajo por dato: cada etapa anota
+    el instante en que pasa cada dato y suma la latencia en un histograma, sin locks ni mensajes
+    extra. Cada fila de los histogramas la escribe un único proceso (hay filas por analizador), así
+    que no hay carreras; el proceso principal puede leerlos en cualquier momento con `reporte`.
+
+    Los instantes se guardan en un anillo de `capacidad` datos indexado por número de secuencia,
+    junto con el dato para el que se escribió cada columna. Si un dato queda más de `capacidad`
+    posiciones por detrás del generador (por ejemplo, con la cola sin límite y `--tasa 0`) su
+    posición ya se reescribió: sus mediciones (y las que dependen de ellas en las etapas
+    siguientes) se descartan y se cuentan en `descartadas` en lugar de registrar latencias de otro dato.
+
+    Parameters
+    ----------
+    analizadores : int
+        Cantidad de procesos analizadores.
+    capacidad : int
+        Cantidad de datos en vuelo cuyos instantes se recuerdan.
+    '''
+    def __init__(self, analizadores:int=3, capacidad:int=4096):
+        if analizadores < 1 or capacidad < 1:
+            raise ValueError
+        self.analizadores = analizadores
+        self.capacidad = capacidad
+        self.shm = SharedMemory(create=True, size=self._tamanio())
+        self._crear_vistas()
+        self.shm.buf[:self._tamanio()] = bytes(self._tamanio())
+        self.secuencias[:] = -1
+
+    def _formas(self):
+        a = self.analizadores
+        return (
+            ('tiempos', np.float64, (self.capacidad, 1 + 2 * a)), # envío, recibido[a], procesado[a]
+            ('contadores', np.float64, (4,)),                       # enviados, inicio, fin, bloques
+            ('latencias', np.uint64, (2 * a + 2, BUCKETS)),         # transporte[a], analisis[a], cola, total
+            ('profundidades', np.uint64, (a + 1, PROFUNDIDAD_MAXIMA)), # pendientes[a], cola
+            ('secuencias', np.int64, (self.capacidad, 1 + a)),      # dato de cada columna de `tiempos`: generador, analizador[a]
+            ('descartadas', np.uint64, (a + 1,)),                   # mediciones descartadas: analizador[a], verificador
+        )
+
+    def _tamanio(self) -> int:
+        return sum(np.dtype(tipo).itemsize * int(np.prod(forma)) for _, tipo, forma in self._formas())
+
+    def _crear_vistas(self):
+        offset = 0
+        for nombre, tipo, forma in self._formas():
+            cantidad = int(np.prod(forma))
+            setattr(self, nombre, np.ndarray(forma, dtype=tipo, buffer=self.shm.buf, offset=offset))
+            offset += np.dtype(tipo).itemsize * cantidad
+
+    def __getstate__(self):
+        # Las vistas de NumPy no se copian: cada proceso las vuelve a crear sobre el segmento
+        return {'analizadores': self.analizadores, 'capacidad': self.capacidad, 'shm': self.shm}
+
+    def __setstate__(self, estado):
+        self.__dict__.update(estado)
+        self._crear_vistas()
+
+    def enviado(self, secuencia:int):
+        '''
+        El generador envió el dato `secuencia`.
+        '''
+        ahora = monotonic()
+        posicion = secuencia % self.capacidad
+        # La posición queda inválida mientras se reescribe (ver `_vigente`)
+        self.secuencias[posicion, 0] = -1
+        self.tiempos[posicion, 0] = ahora
+        self.secuencias[posicion, 0] = secuencia
+        if secuencia == 0:
+            self.contadores[1] = ahora
+        self.contadores[0] = secuencia + 1
+
+    def recibido(self, analizador:int, secuencia:int):
+        '''
+        El analizador `analizador` tomó el dato `secuencia`.
+        '''
+        ahora = monotonic()
+        fila = self.tiempos[secuencia % self.capacidad]
+        latencia = ahora - fila[0]
+        if self._vigente(secuencia, analizador):
+            fila[1 + analizador] = ahora
+            self.secuencias[secuencia % self.capacidad, 1 + analizador] = secuencia
+            self.latencias[analizador, bucket(latencia)] += 1
+        pendientes = int(self.contadores[0]) - secuencia - 1
+        self.profundidades[analizador, min(max(pendientes, 0), PROFUNDIDAD_MAXIMA - 1)] += 1
+
+    def procesado(self, analizador:int, secuencia:int):
+        '''
+        El analizador `analizador` terminó de procesar el dato `secuencia`. Si `recibido` descartó
+        el dato, su columna todavía tiene el instante de otro dato: la medición también se descarta.
+        '''
+        ahora = monotonic()
+        fila = self.tiempos[secuencia % self.capacidad]
+        latencia = ahora - fila[1 + analizador]
+        if self._vigente(secuencia, analizador, (analizador,)):
+            fila[1 + self.analizadores + analizador] = ahora
+            self.latencias[self.analizadores + analizador, bucket(latencia)] += 1
+
+    def bloque(self, secuencia:int, en_cola:int=0):
+        '''
+        El verificador escribió el bloque del dato `secuencia`; `en_cola` es la cantidad de
+        mensajes que quedaban en la cola.
+        '''
+        ahora = monotonic()
+        fila = self.tiempos[secuencia % self.capacidad]
+        a = self.analizadores
+        cola, total = ahora - fila[1 + a:].max(), ahora - fila[0]
+        # Las columnas de analizadores que no corren (por ejemplo, sin --senales) nunca se escriben
+        en_uso = [i for i in range(a) if self.secuencias[secuencia % self.capacidad, 1 + i] >= 0]
+        if self._vigente(secuencia, a, en_uso):
+            self.latencias[2 * a, bucket(cola)] += 1
+            self.latencias[2 * a + 1, bucket(total)] += 1
+        self.profundidades[a, min(max(en_cola, 0), PROFUNDIDAD_MAXIMA - 1)] += 1
+        self.contadores[2] = ahora
+        self.contadores[3] = secuencia + 1
+
+    def _vigente(self, secuencia:int, escritor:int, analizadores:tuple=()) -> bool:
+        '''
+        Indica si la posición de `secuencia` en el anillo todavía es de ese dato, y si las columnas
+        de los `analizadores` indicados las escribieron para ese dato (y no para uno anterior que
+        ocupó la posición). Se consulta después de leer la fila: si el generador la reescribió
+        mientras tanto, lo leído no sirve. Si no, se cuenta una medición descartada en la fila
+        `escritor` (cada proceso escribe la suya).
+        '''
+        duenios = self.secuencias[secuencia % self.capacidad]
+        if duenios[0] == secuencia and all(duenios[1 + i] == secuencia for i in analizadores):
+            return True
+        self.descartadas[escritor] += 1
+        return False
+
+    def reporte(self) -> dict:
+        '''
+        Resume las métricas hasta el momento.
+
+        Returns
+        -------
+        dict
+            {
+                'bloques': int, 'segundos': float, 'bloques_por_segundo': float,
+                'latencias': {etapa: {'p50': s, 'p95': s, 'p99': s, 'cantidad': int}},
+                'profundidades': {'pipes': {...}, 'cola': {...}},
+                'descartadas': int
+            }
+            Las latencias están en segundos (None si todavía no hay datos). `descartadas` es la
+            cantidad de mediciones que no se registraron porque su dato salió del anillo.
+        '''
+        a = self.analizadores
+        limites = np.array([limite_bucket(i) for i in range(BUCKETS)])
+        niveles = np.arange(PROFUNDIDAD_MAXIMA, dtype=np.float64)
+        latencias = (
+            self.latencias[:a].sum(axis=0),
+            self.latencias[a:2 * a].sum(axis=0),
+            self.latencias[2 * a],
+            self.latencias[2 * a + 1],
+        )
+        resumen = lambda histograma, limites: dict(
+            zip((f'p{p}' for p in PERCENTILES), percentiles(histograma, limites)),
+            cantidad=int(histograma.sum())
+        )
+        enviados, inicio, fin, bloques = self.contadores
+        segundos = float(fin - inicio) if bloques else 0.0
+        return {
+            'bloques': int(bloques),
+            'segundos': segundos,
+            'bloques_por_segundo': bloques / segundos if segundos > 0 else None,
+            'latencias': {etapa: resumen(histograma, limites) for etapa, histograma in zip(ETAPAS, latencias)},
+            'profundidades': {
+                'pipes': resumen(self.profundidades[:a].sum(axis=0), niveles),
+                'cola': resumen(self.profundidades[a], niveles),
+            },
+            'descartadas': int(self.descartadas.sum()),
+        }
+
+    def liberar(self):
+        '''
+        Cierra y elimina el segmento de memoria compartida (lo llama el proceso que lo creó).
+        '''
+        for nombre, _, _ in self._formas():
+            setattr(self, nombre, None)
+        self.shm.close()
+        self.shm.unlink()
+
+def formatear_reporte(reporte:dict) -> str:
+    '''
+    Devuelve el reporte de `Metricas.reporte` como texto para mostrar en la salida estándar.
+    '''
+    ms = lambda valor: '-' if valor is None else f'{valor * 1000:.2f} ms'
+    entero = lambda valor: '-' if valor is None else f'{valor:.0f}'
+    tasa = reporte.get('bloques_por_segundo')
+    lineas = [f"[stats] {reporte.get('bloques')} bloques en {reporte.get('segundos'):.2f} s"
+              + (f" ({tasa:.2f} bloques/s)" if tasa is not None else '')]
+    for etapa, valores in reporte.get('latencias').items():
+        lineas.append(f"\t{etapa:<11} " + '  '.join(f'p{p} {ms(valores.get(f"p{p}"))}' for p in PERCENTILES) + f"  (n={valores.get('cantidad')})")
+    for nombre, valores in reporte.get('profundidades').items():
+        lineas.append(f"\tpendientes en {nombre:<5} " + '  '.join(f'p{p} {entero(valores.get(f"p{p}"))}' for p in PERCENTILES))
+    if reporte.get('descartadas'):
+        lineas.append(f"\t{reporte.get('descartadas')} mediciones descartadas: hubo más datos en vuelo que la capacidad del anillo de instantes")
+    return '\n'.join(lineas)
@@ -0,0 +1,240 @@
+import json, os, time
+from os import getpid
+from src.analizador import calcular
+from src.alertas import MotorAlertas, matriz_rondas
+from src.blockchain import crear_bloque, TIPOS_BASE
+from src.almacenamiento import AlmacenJSONL
+from src.generador import generar_dato
+from src.utils import EstadisticaMovil
+from src.ventana import VentanaCircular, registro_desde_dato, extraer
+
+# Imports para mejorar el tipado
+from multiprocessing.connection import Connection
+from multiprocessing.queues import Queue
+from typing import Any
+
+# Topología con muchos pacientes: el supervisor genera los datos de todos los pacientes y los
+# reparte entre `workers` procesos trabajadores. Cada trabajador atiende a varios pacientes y
+# guarda, por paciente, su ventana, sus estadísticas y su propia cadena de bloques.
+#
+# Mensajes del supervisor a cada trabajador (por su Pipe):
+#   ('datos', '[...]')      arreglo JSON con datos (cada uno con su 'paciente')
+#   ('exportar', paciente)  entregar el estado del paciente por la cola de respuestas
+#   ('importar', estado)    tomar un paciente que atendía otro trabajador
+#   ('fin', None)           cerrar las cadenas y terminar
+# Respuestas de los trabajadores al supervisor (por una Queue compartida):
+#   ('estado', paciente, estado)
+#   ('resumen', indice, {paciente: bloques})
+
+def ruta_cadena(directorio:str, paciente:int) -> str:
+    return os.path.join(directorio, f'paciente_{paciente}.jsonl')
+
+class EstadoPaciente:
+    '''
+    Estado de un paciente dentro de un trabajador: la ventana de sus últimos datos, las
+    estadísticas incrementales de cada tipo, el motor de alertas y el final de su cadena.
+
+    Se puede pasar a otro proceso (pickle) después de `suspender`, y seguir con `reanudar`.
+
+    Parameters
+    ----------
+    paciente : int
+        Identificador del paciente.
+    directorio : str
+        Directorio donde se guarda la cadena del paciente (`paciente_<id>.jsonl`).
+    ventana_size : int
+        Capacidad de la ventana del paciente.
+    reglas : list
+        Reglas de alerta (ver `src.alertas.MotorAlertas`).
+    '''
+    def __init__(self, paciente:int, directorio:str='cadenas', ventana_size:int=30, reglas:list=None):
+        self.paciente = paciente
+        self.ruta = ruta_cadena(directorio, paciente)
+        self.ventana = VentanaCircular(ventana_size)
+        self.stats = {tipo: EstadisticaMovil(tipo) for tipo in TIPOS_BASE}
+        self.motor = MotorAlertas(reglas)
+        self.prev_hash = '0' * 64
+        self.bloques = 0
+        self.almacen = AlmacenJSONL(self.ruta)
+
+    def procesar(self, dato:dict) -> dict:
+        '''
+        Agrega un dato a la ventana, calcula los resultados de los tres tipos y agrega el bloque
+        a la cadena del paciente.
+        '''
+        registro = registro_desde_dato(dato)
+        desalojado = self.ventana.agregar(registro)
+        for stats in self.stats.values():
+            stats.agregar(extraer(registro, stats.tipo))
+            if desalojado is not None:
+                stats.quitar(extraer(desalojado, stats.tipo))
+        ronda = [calcular(tipo, self.ventana, self.stats[tipo]) for tipo in TIPOS_BASE]
+        alerta = bool(self.motor.alertas(matriz_rondas([ronda]))[0])
+        bloque = crear_bloque(ronda, alerta, self.prev_hash)
+        self.almacen.agregar(bloque)
+        self.prev_hash = bloque.get('hash')
+        self.bloques += 1
+        return bloque
+
+    def suspender(self):
+        '''
+        Cierra la cadena del paciente para poder pasar el estado a otro proceso.
+        '''
+        self.almacen.cerrar()
+        self.almacen = None
+        return self
+
+    def reanudar(self):
+        '''
+        Vuelve a abrir la cadena del paciente para seguir agregando bloques al final.
+        '''
+        self.almacen = AlmacenJSONL(self.ruta, continuar=True)
+        return self
+
+def trabajar(conexion:Connection, respuestas:Queue, indice:int=0, cpu:Any=None, directorio:str='cadenas', ventana_size:int=30, reglas:list=None, verbose:bool=False):
+    '''
+    Proceso trabajador: atiende a los pacientes que le asigna el supervisor.
+
+    Parameters
+    ----------
+    conexion : Connection
+        Extremo de lectura del Pipe por el que llegan los mensajes del supervisor.
+    respuestas : Queue
+        Cola compartida por la que se responde al supervisor.
+    indice : int
+        Número de trabajador.
+    cpu : Any
+        Array compartido ('d') donde cada trabajador publica su tiempo de CPU acumulado, que el
+        supervisor usa para balancear.
+    '''
+    print(f'[{getpid()}] Trabajador {indice} iniciado.')
+    pacientes = {}
+    while True:
+        tipo, contenido = conexion.recv()
+        if tipo == 'datos':
+            for dato in json.loads(contenido):
+                paciente = dato.get('paciente')
+                if paciente not in pacientes:
+                    pacientes[paciente] = EstadoPaciente(paciente, directorio, ventana_size, reglas)
+                bloque = pacientes[paciente].procesar(dato)
+                if verbose:
+                    print(f'[{getpid()}] Paciente {paciente}: bloque {pacientes[paciente].bloques}, alerta: {bloque.get("alerta")}')
+        elif tipo == 'exportar':
+            respuestas.put(('estado', contenido, pacientes.pop(contenido).suspender()))
+        elif tipo == 'importar':
+            pacientes[contenido.paciente] = contenido.reanudar()
+        elif tipo == 'fin':
+            break
+        else:
+            raise ValueError
+        if cpu is not None:
+            cpu[indice] = time.process_time()
+    for estado in pacientes.values():
+        estado.suspender()
+    respuestas.put(('resumen', indice, {paciente: estado.bloques for paciente, estado in pacientes.items()}))
+
+def elegir_trabajador(cargas:list, asignados:list) -> int:
+    '''
+    Devuelve el trabajador con menos carga de CPU; a igual carga, el que atiende menos pacientes.
+    '''
+    return min(range(len(cargas)), key=lambda i: (cargas[i], len(asignados[i])))
+
+def elegir_migracion(cargas:list, asignados:list, umbral:float=1.5):
+    '''
+    Decide si conviene mover un paciente del trabajador más cargado al menos cargado.
+
+    Returns
+    -------
+    tuple or None
+        (paciente, origen, destino), o None si la carga del más cargado no supera `umbral` veces
+        la del menos cargado, o si el más cargado atiende a un solo paciente.
+    '''
+    origen = max(range(len(cargas)), key=lambda i: cargas[i])
+    destino = elegir_trabajador(cargas, asignados)
+    if origen == destino or len(asignados[origen]) <= 1 or cargas[origen] <= umbral * cargas[destino]:
+        return None
+    return asignados[origen][-1], origen, destino
+
+def supervisar(conexiones:list, respuestas:Queue, cpu:Any, pacientes:int=1, n:int=60, tasa:float=1.0, rebalanceo:float=5.0, verbose:bool=False) -> dict:
+    '''
+    Genera n datos por paciente y los reparte entre los trabajadores. Cada paciente se asigna
+    la primera vez al trabajador con menos carga de CPU; cada `rebalanceo` segundos se compara el
+    CPU usado por cada trabajador en el último período y, si está desbalanceado, se mueve un
+    paciente del más cargado al menos cargado (con su ventana y el final de su cadena).
+
+    Parameters
+    ----------
+    conexiones : list
+        Extremos de escritura de los Pipes de cada trabajador.
+    respuestas : Queue
+        Cola por la que responden los trabajadores.
+    cpu : Any
+        Array compartido con el tiempo de CPU de cada trabajador (ver `trabajar`).
+    pacientes : int
+        Cantidad de pacientes.
+    n : int
+        Datos a generar por paciente.
+    tasa : float
+        Datos por segundo de cada paciente (0 = tan rápido como sea posible).
+    rebalanceo : float
+        Cada cuántos segundos se revisa el balance (0 = sin rebalanceo).
+
+    Returns
+    -------
+    dict
+        {paciente: bloques en su cadena}.
+    '''
+    if pacientes < 1 or n < 0 or tasa < 0 or rebalanceo < 0 or conexiones == []:
+        raise ValueError
+    workers = len(conexiones)
+    asignacion = {}
+    asignados = [[] for _ in range(workers)]
+    cpu_anterior = list(cpu)
+    cargas = [0.0] * workers
+    proximo = time.monotonic()
+    proximo_balance = proximo + rebalanceo
+    for _ in range(n):
+        por_trabajador = [[] for _ in range(workers)]
+        for paciente in range(pacientes):
+            if paciente not in asignacion:
+                trabajador = elegir_trabajador(cargas, asignados)
+                asignacion[paciente] = trabajador
+                asignados[trabajador].append(paciente)
+            por_trabajador[asignacion[paciente]].append(generar_dato(paciente))
+        # Un mensaje por trabajador con todos sus datos de este instante
+        for trabajador, datos in enumerate(por_trabajador):
+            if datos:
+                conexiones[trabajador].send(('datos', '[' + ','.join(datos) + ']'))
+
+        if rebalanceo > 0 and time.monotonic() >= proximo_balance:
+            proximo_balance += rebalanceo
+            actual = list(cpu)
+            cargas = [actual[i] - cpu_anterior[i] for i in range(workers)]
+            cpu_anterior = actual
+            migracion = elegir_migracion(cargas, asignados)
+            if migracion is not None:
+                paciente, origen, destino = migracion
+                conexiones[origen].send(('exportar', paciente))
+                # Los datos ya enviados al origen se procesan antes de exportar el estado, y los
+                # siguientes van al destino después de importarlo: el orden de la cadena se mantiene
+                _, _, estado = respuestas.get()
+                conexiones[destino].send(('importar', estado))
+                asignados[origen].remove(paciente)
+                asignados[destino].append(paciente)
+                asignacion[paciente] = destino
+                if verbose:
+                    print(f'[{getpid()}] Paciente {paciente} movido del trabajador {origen} al {destino} (cargas: {cargas})')
+
+        if tasa > 0:
+            proximo += 1 / tasa
+            espera = proximo - time.monotonic()
+            if espera > 0:
+                time.sleep(espera)
+
+    for conexion in conexiones:
+        conexion.send(('fin', None))
+    bloques = {}
+    for _ in range(workers):
+        _, _, resumen = respuestas.get()
+        bloques.update(resumen)
+    return bloques
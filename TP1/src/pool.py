@@ -0,0 +1,125 @@
+from json import dumps
+from copy import deepcopy
+from os import getpid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from src.analizador import leer_datos, procesar, crear_costo, TIPOS
+from src.protocolo import nuevo_buffer
+from src.ventana import VentanaCircular
+
+# Imports para mejorar el tipado
+from multiprocessing.connection import Connection
+from multiprocessing.queues import Queue
+from typing import Any
+
+# Modo con pool de procesos: en lugar de un proceso dedicado por tipo de analizador (que queda
+# ocioso mientras los demás trabajan), un coordinador lee los datos del generador, mantiene una
+# única ventana y por cada dato envía una tarea (tipo, ventana) por tipo a un ProcessPoolExecutor
+# con tantos procesos como CPUs. Así la cantidad de tipos no depende de la cantidad de procesos y
+# los analizadores costosos comparten los núcleos.
+
+# Modelo de costo de cada proceso del pool (lo crea `_iniciar` una sola vez por proceso)
+_costo = None
+
+def _iniciar(costo:str):
+    global _costo
+    _costo = crear_costo(costo)
+
+def _tarea(tipo:str, ventana:VentanaCircular, secuencia:int, verbose:bool=False) -> dict:
+    # Se calcula sobre la ventana completa: las estadísticas incrementales viven en un solo proceso
+    resultado = procesar(tipo=tipo, ventana=ventana, verbose=verbose, costo=_costo)
+    resultado['secuencia'] = secuencia
+    return resultado
+
+def coordinar(
+        pipe_to_read:Connection,
+        queue:Queue,
+        tipos:tuple=('frecuencia', 'presion', 'oxigeno'),
+        n:int=0,
+        workers:int=1,
+        verbose:bool=False,
+        ventana_size:int=30,
+        binario:bool=False,
+        lote:int=1,
+        metricas:Any=None,
+        costo:str='aleatorio',
+        profundidad:int=8,
+        entrada:Any=None
+    ):
+    '''
+    Lee n datos del generador y reparte el cálculo de todos los tipos entre un pool de procesos.
+    Los resultados de cada ronda se envían juntos a la queue, en orden de secuencia.
+
+    Parameters
+    ----------
+    pipe_to_read : Connection
+        Extremo de lectura del generador (Pipe o lector del anillo compartido).
+    queue : Queue
+        Cola del verificador.
+    tipos : tuple
+        Tipos de analizador a calcular por cada dato (ver `src.analizador.TIPOS`).
+    n : int
+        Cantidad de datos a leer.
+    workers : int
+        Cantidad de procesos del pool.
+    binario : bool
+        Leer los datos en el formato binario de `src.protocolo`.
+    lote : int
+        Cantidad de datos por mensaje del generador y de rondas por mensaje al verificador.
+    metricas : Any
+        Instrumentación (`src.metricas.Metricas`). La anota el coordinador, con la fila de cada tipo.
+    costo : str
+        Especificación del modelo de costo del cálculo (ver `src.analizador.crear_costo`).
+    profundidad : int
+        Cantidad máxima de rondas en vuelo (enviadas al pool y todavía no escritas en la cola).
+        0 = sin límite.
+    entrada : Any
+        Semáforo de créditos de entrada (`src.contrapresion`, opcional): se libera uno por cada
+        mensaje leído del generador.
+    '''
+    if workers < 1 or profundidad < 0 or any(tipo not in TIPOS for tipo in tipos):
+        raise ValueError
+    print(f'[{getpid()}] Coordinador iniciado con un pool de {workers} procesos para {len(tipos)} tipos.')
+    crear_costo(costo) # Una especificación inválida falla acá y no en cada proceso del pool
+    ventana = VentanaCircular(ventana_size)
+    buffer = nuevo_buffer(lote) if binario else None
+    pendientes = deque()
+    en_vuelo = deque() # (secuencia, futuros de la ronda)
+    salida = []
+
+    def anotar(indice, secuencia):
+        # Se ejecuta en el hilo del pool que recibe los resultados; cada tipo escribe solo su fila
+        return lambda futuro: metricas.procesado(indice, secuencia)
+
+    def entregar(bloquear):
+        # Envía las rondas terminadas del principio, en orden; con `bloquear` espera a la primera
+        while en_vuelo and (bloquear or all(futuro.done() for futuro in en_vuelo[0][1])):
+            _, futuros = en_vuelo.popleft()
+            salida.extend(futuro.result() for futuro in futuros)
+            bloquear = False
+            if len(salida) >= lote * len(tipos):
+                queue.put(dumps(salida))
+                salida.clear()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_iniciar, initargs=(costo,)) as pool:
+        for secuencia in range(n):
+            mensaje = not pendientes
+            leer_datos(canal_entrada=pipe_to_read, ventana=ventana, buffer=buffer, pendientes=pendientes)
+            if entrada is not None and mensaje:
+                entrada.release()
+            # El pool serializa las tareas en otro hilo, más tarde: cada ronda lleva su propia copia
+            copia = deepcopy(ventana)
+            futuros = []
+            for tipo in tipos:
+                if metricas is not None:
+                    metricas.recibido(TIPOS.index(tipo), secuencia)
+                futuro = pool.submit(_tarea, tipo, copia, secuencia, verbose)
+                if metricas is not None:
+                    futuro.add_done_callback(anotar(TIPOS.index(tipo), secuencia))
+                futuros.append(futuro)
+            en_vuelo.append((secuencia, futuros))
+            entregar(bloquear=profundidad > 0 and len(en_vuelo) >= profundidad)
+        while en_vuelo:
+            entregar(bloquear=True)
+    if salida:
+        queue.put(dumps(salida))
@@ -0,0 +1,86 @@
+from struct import Struct
+from src.senales import METRICAS
+
+# Formato binario de un dato del generador (16 bytes, little-endian, tamaño fijo):
+#   q -> timestamp epoch en segundos (int64)
+#   H -> frecuencia, sistólica, diastólica y oxígeno (uint16 cada uno)
+# El orden de los campos es el mismo que el de un registro de `src.ventana.CAMPOS`.
+REGISTRO = Struct('<qHHHH')
+
+def codificar(registro:tuple) -> bytes:
+    '''
+    Codifica un registro (timestamp_epoch, frecuencia, sistólica, diastólica, oxígeno) en bytes.
+    '''
+    return REGISTRO.pack(*registro)
+
+def decodificar(buffer, offset:int=0) -> tuple:
+    '''
+    Decodifica un registro desde `buffer` (bytes, bytearray o memoryview) a partir de `offset`,
+    sin copiar el buffer.
+    '''
+    return REGISTRO.unpack_from(buffer, offset)
+
+def nuevo_buffer(registros:int=1) -> bytearray:
+    '''
+    Crea un buffer reutilizable con lugar para `registros` registros, para usar con
+    `Connection.recv_bytes_into` (con lotes debe tener lugar para el lote completo).
+    '''
+    return bytearray(REGISTRO.size * registros)
+
+# Formato binario de un resultado de un analizador (66 bytes, little-endian, tamaño fijo), para
+# pasarlo al verificador por memoria compartida (`src.memoria_compartida.ResultadosCompartidos`):
+#   q   -> secuencia (int64)
+#   24s -> timestamp ISO en ASCII, completado con ceros
+#   B   -> clase de la media y de la desviación (ver `CLASES`); 0 para los tipos de señales
+#   B
+#   4d  -> tipos base: media y desviación con dos canales cada una (NaN si sobra);
+#          tipos de señales: sus métricas en el orden de `src.senales.METRICAS`
+# Se guarda la clase de cada valor para devolver exactamente lo que calculó el analizador (por
+# ejemplo, la desviación entera 0 de una ventana con un solo dato).
+RESULTADO = Struct('<q24sBB4d')
+NINGUNO, ENTERO, REAL, CANALES = range(4)
+
+def _clase(valor) -> tuple:
+    if valor is None:
+        return NINGUNO, (float('nan'), float('nan'))
+    if isinstance(valor, list):
+        return CANALES, (float(valor[0]), float(valor[1]))
+    return (ENTERO if isinstance(valor, int) else REAL), (float(valor), float('nan'))
+
+def _valor(clase:int, valores:tuple):
+    if clase == NINGUNO:
+        return None
+    if clase == CANALES:
+        return list(valores)
+    return int(valores[0]) if clase == ENTERO else valores[0]
+
+def codificar_resultado_en(buffer, offset:int, resultado:dict):
+    '''
+    Escribe `resultado` (un dict de `src.analizador.calcular` con su `secuencia`) en `buffer` a
+    partir de `offset`, en el formato `RESULTADO`.
+    '''
+    tipo = resultado.get('tipo')
+    timestamp = resultado.get('timestamp').encode('ascii')
+    if tipo in METRICAS:
+        valores = [resultado.get(nombre) for nombre in METRICAS[tipo]]
+        valores += [float('nan')] * (4 - len(valores))
+        RESULTADO.pack_into(buffer, offset, resultado.get('secuencia'), timestamp, 0, 0, *valores)
+        return
+    clase_media, media = _clase(resultado.get('media'))
+    clase_desv, desv = _clase(resultado.get('desv'))
+    RESULTADO.pack_into(buffer, offset, resultado.get('secuencia'), timestamp, clase_media, clase_desv, *media, *desv)
+
+def decodificar_resultado(buffer, offset:int, tipo:str) -> dict:
+    '''
+    Lee un resultado del tipo `tipo` escrito con `codificar_resultado_en`, con las mismas claves
+    (y en el mismo orden) que el original.
+    '''
+    secuencia, timestamp, clase_media, clase_desv, *valores = RESULTADO.unpack_from(buffer, offset)
+    resultado = {'tipo': tipo, 'timestamp': timestamp.rstrip(b'\0').decode('ascii')}
+    if tipo in METRICAS:
+        resultado.update(zip(METRICAS[tipo], valores))
+    else:
+        resultado['media'] = _valor(clase_media, valores[:2])
+        resultado['desv'] = _valor(clase_desv, valores[2:])
+    resultado['secuencia'] = secuencia
+    return resultado
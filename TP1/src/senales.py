@@ -0,0 +1,94 @@
+import numpy as np
+
+# Procesamiento de señales sobre la ventana completa de un analizador. Cada función recibe los
+# registros de la ventana (`VentanaCircular.registros()`: timestamp, frecuencia, sistólica,
+# diastólica, oxígeno) en orden cronológico y devuelve un dict de métricas escalares, que el
+# verificador guarda en el cuerpo del bloque bajo el tipo del analizador.
+
+# Bandas de potencia de la variabilidad de la frecuencia cardíaca (Hz)
+BANDAS = {
+    'vlf': (0.0033, 0.04),
+    'lf': (0.04, 0.15),
+    'hf': (0.15, 0.4),
+}
+# Frecuencia de remuestreo de la serie de intervalos RR para el espectro (Hz)
+MUESTREO = 1.0
+
+def intervalos_rr(frecuencias:np.ndarray) -> np.ndarray:
+    '''
+    Convierte frecuencias cardíacas (latidos por minuto) en intervalos RR (milisegundos).
+    '''
+    return 60000.0 / np.maximum(np.asarray(frecuencias, dtype=np.float64), 1.0)
+
+def variabilidad(registros:np.ndarray) -> dict:
+    '''
+    Métricas de variabilidad de la frecuencia cardíaca en el dominio del tiempo sobre los
+    intervalos RR de la ventana:
+        - sdnn: desviación estándar de los intervalos RR (ms).
+        - rmssd: raíz cuadrática media de las diferencias sucesivas (ms).
+    Con menos de dos datos ambas valen 0.
+    '''
+    rr = intervalos_rr(registros[:, 1])
+    if len(rr) < 2:
+        return {'rmssd': 0.0, 'sdnn': 0.0}
+    return {
+        'rmssd': float(np.sqrt(np.mean(np.diff(rr) ** 2))),
+        'sdnn': float(rr.std(ddof=1)),
+    }
+
+def tendencia(registros:np.ndarray) -> dict:
+    '''
+    Pendiente por minuto de cada canal (frecuencia, sistólica, diastólica y oxígeno) en la ventana,
+    por cuadrados mínimos contra el timestamp, para todos los canales a la vez. Si todos los datos
+    tienen el mismo timestamp las pendientes valen 0.
+    '''
+    tiempos = registros[:, 0].astype(np.float64)
+    valores = registros[:, 1:].astype(np.float64)
+    centrados = tiempos - tiempos.mean()
+    varianza = centrados @ centrados
+    if varianza == 0:
+        pendientes = np.zeros(valores.shape[1])
+    else:
+        pendientes = centrados @ (valores - valores.mean(axis=0)) / varianza * 60
+    return dict(zip(('frecuencia', 'sistolica', 'diastolica', 'oxigeno'), map(float, pendientes)))
+
+def espectro(registros:np.ndarray) -> dict:
+    '''
+    Potencia de la variabilidad de la frecuencia cardíaca en las bandas de `BANDAS` (ms²) y la
+    relación lf/hf. La serie de intervalos RR se remuestrea a `MUESTREO` Hz según los timestamps,
+    se le resta la media, se le aplica una ventana de Hann y se calcula su periodograma con FFT.
+    Con menos de cuatro muestras todas las potencias valen 0.
+    '''
+    tiempos = registros[:, 0].astype(np.float64)
+    duracion = tiempos[-1] - tiempos[0] if len(tiempos) else 0
+    cantidad = int(duracion * MUESTREO) + 1
+    if cantidad < 4:
+        return {**{banda: 0.0 for banda in BANDAS}, 'lf_hf': 0.0}
+    uniformes = tiempos[0] + np.arange(cantidad) / MUESTREO
+    rr = np.interp(uniformes, tiempos, intervalos_rr(registros[:, 1]))
+    hann = np.hanning(cantidad)
+    transformada = np.fft.rfft((rr - rr.mean()) * hann)
+    potencia = np.abs(transformada) ** 2 / (MUESTREO * (hann @ hann))
+    potencia[1:] *= 2 # Espectro de un solo lado
+    frecuencias = np.fft.rfftfreq(cantidad, 1 / MUESTREO)
+    resolucion = MUESTREO / cantidad
+    resultado = {
+        banda: float(potencia[(frecuencias >= inferior) & (frecuencias < superior)].sum() * resolucion)
+        for banda, (inferior, superior) in BANDAS.items()
+    }
+    resultado['lf_hf'] = resultado['lf'] / resultado['hf'] if resultado['hf'] > 0 else 0.0
+    return resultado
+
+SENALES = {
+    'variabilidad': variabilidad,
+    'tendencia': tendencia,
+    'espectro': espectro,
+}
+
+# Métricas que devuelve cada tipo, en orden (para guardarlas en registros de tamaño fijo,
+# ver `src.protocolo.RESULTADO`)
+METRICAS = {
+    'variabilidad': ('rmssd', 'sdnn'),
+    'tendencia': ('frecuencia', 'sistolica', 'diastolica', 'oxigeno'),
+    'espectro': (*BANDAS, 'lf_hf'),
+}
@@ -1,4 +1,5 @@
-from numpy import mean, std 
+from numpy import mean, std
+from math import sqrt
 
 # Se calculan las medias y desviacion según el self.__tipo__ entonces:
 # Frecuen: media = mean(datos) se devuelve la media datos, donde datos es la lista de frecuencias cardiacas de ventana
@@ -50,3 +51,72 @@ def desviacion(tipo:str='', datos:list=[]):
     if len(datos) <= 1: 
         return 0
     return float(std(datos, ddof=1)) if tipo != 'presion' else [float(std([dato[0] for dato in datos], ddof=1)), float(std([dato[1] for dato in datos], ddof=1))]
+
+class EstadisticaMovil:
+    '''
+    Media y desviación estándar de una ventana deslizante, actualizadas en O(1) por dato
+    con el algoritmo de Welford (agregar y quitar valores sin recorrer la ventana).
+
+    Devuelve los mismos valores que `media` y `desviacion` aplicados sobre la ventana completa
+    (salvo errores de redondeo del orden de 1e-12). Para 'presion' se mantienen dos canales
+    independientes (sistólica y diastólica).
+
+    Parameters
+    ----------
+    tipo : str
+        Tipo de dato. Puede ser 'frecuencia', 'presion' o 'oxigeno'.
+    '''
+    def __init__(self, tipo:str=''):
+        self.tipo = tipo
+        self.canales = 2 if tipo == 'presion' else 1
+        self.n = 0
+        self._media = [0.0] * self.canales
+        self._m2 = [0.0] * self.canales
+
+    def __len__(self):
+        return self.n
+
+    def agregar(self, valor):
+        '''
+        Agrega un valor a la ventana. Para 'presion' se espera una lista [sistólica, diastólica].
+        '''
+        valores = valor if self.canales > 1 else (valor,)
+        self.n += 1
+        for c in range(self.canales):
+            delta = valores[c] - self._media[c]
+            self._media[c] += delta / self.n
+            self._m2[c] += delta * (valores[c] - self._media[c])
+
+    def quitar(self, valor):
+        '''
+        Quita de la ventana un valor agregado previamente (normalmente el más antiguo).
+        '''
+        if self.n <= 1:
+            self.n = 0
+            self._media = [0.0] * self.canales
+            self._m2 = [0.0] * self.canales
+            return
+        valores = valor if self.canales > 1 else (valor,)
+        self.n -= 1
+        for c in range(self.canales):
+            delta = valores[c] - self._media[c]
+            self._media[c] -= delta / self.n
+            # Se evita que el redondeo deje una suma de cuadrados negativa
+            self._m2[c] = max(self._m2[c] - delta * (valores[c] - self._media[c]), 0.0)
+
+    def media(self):
+        '''
+        Devuelve la media de la ventana con el mismo formato que `media`.
+        '''
+        if self.n < 1:
+            return 0
+        return self._media[0] if self.canales == 1 else list(self._media)
+
+    def desviacion(self):
+        '''
+        Devuelve la desviación estándar muestral (ddof=1) con el mismo formato que `desviacion`.
+        '''
+        if self.n <= 1:
+            return 0
+        desv = [sqrt(m2 / (self.n - 1)) for m2 in self._m2]
+        return desv[0] if self.canales == 1 else desv
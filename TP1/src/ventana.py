@@ -0,0 +1,143 @@
+from datetime import datetime
+import numpy as np
+
+# Orden de las columnas de un registro: (timestamp, frecuencia, sistólica, diastólica, oxígeno)
+# El timestamp se guarda como epoch (segundos enteros) para poder almacenarlo en el mismo arreglo.
+CAMPOS = ('timestamp', 'frecuencia', 'sistolica', 'diastolica', 'oxigeno')
+
+def registro_desde_dato(dato:dict) -> tuple:
+    '''
+    Convierte un dato decodificado del generador en un registro (tupla de enteros).
+
+    Parameters
+    ----------
+    dato : dict
+        Dato con el formato {"timestamp": "2025-06-11T15:32:09", "frecuencia": 122, "presion": [166, 99], "oxigeno": 100}
+
+    Returns
+    -------
+    tuple
+        (timestamp_epoch, frecuencia, sistólica, diastólica, oxígeno)
+    '''
+    sistolica, diastolica = dato.get('presion')
+    timestamp = int(datetime.fromisoformat(dato.get('timestamp')).timestamp())
+    return (timestamp, dato.get('frecuencia'), sistolica, diastolica, dato.get('oxigeno'))
+
+def dato_desde_registro(registro:tuple) -> dict:
+    '''
+    Operación inversa de `registro_desde_dato`: arma el dict con el formato del generador.
+    '''
+    timestamp, frecuencia, sistolica, diastolica, oxigeno = registro
+    return {
+        "timestamp": formatear_timestamp(timestamp),
+        "frecuencia": frecuencia,
+        "presion": [sistolica, diastolica],
+        "oxigeno": oxigeno
+    }
+
+def extraer(registro, tipo:str):
+    '''
+    Devuelve el valor de un registro según el tipo de dato: un entero para 'frecuencia' y
+    'oxigeno', y una tupla (sistólica, diastólica) para 'presion'.
+    '''
+    if tipo == 'frecuencia':
+        return registro[1]
+    elif tipo == 'presion':
+        return (registro[2], registro[3])
+    return registro[4]
+
+def formatear_timestamp(timestamp:int) -> str:
+    '''
+    Convierte un timestamp epoch al formato ISO usado en los bloques ("YYYY-MM-DDTHH:MM:SS").
+    '''
+    return datetime.fromtimestamp(int(timestamp)).isoformat(timespec='seconds')
+
+class VentanaCircular:
+    '''
+    Ventana deslizante de capacidad fija respaldada por un arreglo de NumPy preasignado
+    (una columna por campo de `CAMPOS`). Agregar un registro es O(1): se sobrescribe la
+    posición más antigua en lugar de desplazar la lista como hace `list.pop(0)`, y la
+    memoria usada no depende de cuántos datos se hayan leído.
+
+    Parameters
+    ----------
+    capacidad : int
+        Cantidad máxima de registros que guarda la ventana.
+    '''
+    def __init__(self, capacidad:int=30):
+        if capacidad < 1:
+            raise ValueError
+        self.capacidad = capacidad
+        self._datos = np.zeros((capacidad, len(CAMPOS)), dtype=np.int64)
+        self._siguiente = 0 # Posición donde se escribirá el próximo registro
+        self._cantidad = 0
+
+    def __len__(self):
+        return self._cantidad
+
+    def agregar(self, registro:tuple):
+        '''
+        Agrega un registro a la ventana. Si la ventana está llena se sobrescribe el más antiguo.
+
+        Parameters
+        ----------
+        registro : tuple
+            (timestamp_epoch, frecuencia, sistólica, diastólica, oxígeno)
+
+        Returns
+        -------
+        tuple or None
+            El registro desalojado, o None si la ventana todavía no estaba llena.
+        '''
+        desalojado = None
+        if self._cantidad == self.capacidad:
+            desalojado = tuple(int(v) for v in self._datos[self._siguiente])
+        else:
+            self._cantidad += 1
+        self._datos[self._siguiente] = registro
+        self._siguiente = (self._siguiente + 1) % self.capacidad
+        return desalojado
+
+    def agregar_dato(self, dato:dict):
+        '''
+        Igual que `agregar`, pero recibe un dato decodificado del generador (dict).
+        '''
+        return self.agregar(registro_desde_dato(dato))
+
+    def registros(self) -> np.ndarray:
+        '''
+        Devuelve una copia de los registros en orden cronológico (matriz de len(self) x len(CAMPOS)).
+        '''
+        if self._cantidad < self.capacidad:
+            return self._datos[:self._cantidad].copy()
+        return np.concatenate((self._datos[self._siguiente:], self._datos[:self._siguiente]))
+
+    def columna(self, campo:str) -> np.ndarray:
+        '''
+        Devuelve los valores de un campo de `CAMPOS` en orden cronológico.
+        '''
+        return self.registros()[:, CAMPOS.index(campo)]
+
+    def datos(self, tipo:str) -> np.ndarray:
+        '''
+        Devuelve los datos del tipo indicado en orden cronológico. Para 'presion' es una
+        matriz de n x 2 (sistólica, diastólica).
+        '''
+        registros = self.registros()
+        if tipo == 'presion':
+            return registros[:, 2:4]
+        return registros[:, CAMPOS.index(tipo)]
+
+    def ultimo(self) -> tuple:
+        '''
+        Devuelve el último registro agregado.
+        '''
+        if self._cantidad == 0:
+            raise IndexError
+        return tuple(int(v) for v in self._datos[self._siguiente - 1])
+
+    def ultimo_timestamp(self) -> str:
+        '''
+        Devuelve el timestamp del último registro en formato ISO.
+        '''
+        return formatear_timestamp(self.ultimo()[0])
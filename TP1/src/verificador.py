@@ -1,6 +1,8 @@
 import json
 from os import getpid
-from src.blockchain import crear_bloque
+from src.blockchain import crear_bloque, IndiceCheckpoints, reanudar_checkpoints
+from src.almacenamiento import crear_almacen
+from src.alertas import MotorAlertas, matriz_rondas
 from typing import Any
 
 def read_data(queue:Any=None):
@@ -26,6 +28,83 @@ def read_data(queue:Any=None):
         datos.append(resultado)
     return datos
 
+class ReordenadorRondas:
+    """
+    Buffer de reordenamiento para el modo sin barrera. Los analizadores avanzan a su propio
+    ritmo y sus resultados llegan a la cola en cualquier orden; cada resultado trae su número
+    de `secuencia` y se agrupa con los de los otros tipos hasta completar la ronda. Las rondas
+    se entregan estrictamente en orden de secuencia, así la cadena queda igual que con barrera.
+
+    Parameters
+    ----------
+    total : int
+        Cantidad de resultados (uno por analizador) que forman una ronda.
+    """
+    def __init__(self, total:int=3):
+        self.total = total
+        self.siguiente = 0 # Secuencia de la próxima ronda a entregar
+        self.pendientes = {}
+
+    def __len__(self):
+        return len(self.pendientes)
+
+    def agregar(self, resultado:dict) -> list:
+        """
+        Agrega un resultado y devuelve la lista de rondas que quedaron completas, en orden
+        (puede estar vacía si falta algún resultado de la ronda siguiente).
+        """
+        self.pendientes.setdefault(resultado.get('secuencia'), []).append(resultado)
+        rondas = []
+        while len(self.pendientes.get(self.siguiente, ())) == self.total:
+            rondas.append(self.pendientes.pop(self.siguiente))
+            self.siguiente += 1
+        return rondas
+
+def leer_lotes_rondas(queue:Any=None, cantidad_total:int=0, reordenador:ReordenadorRondas=None, resultados:Any=None):
+    """
+    Genera las rondas (listas de resultados de los analizadores) que se leen de la cola,
+    agrupadas en listas con las rondas que se completaron con cada lectura (varias si los
+    analizadores envían lotes), para poder procesarlas juntas.
+
+    Sin reordenador se asume que los resultados de una ronda llegan juntos (`verificar` siempre
+    usa uno, ver ahí por qué); con reordenador se arman las rondas a partir de la `secuencia` de cada resultado. En ambos
+    casos cada elemento de la cola puede ser un resultado o una lista de resultados (lote).
+
+    Si `cantidad_total` es None la cantidad de rondas no se conoce de antemano (ver
+    `src.contrapresion`): se lee hasta recibir un `null` de cada analizador, lo que requiere
+    reordenador (su `total` es la cantidad de analizadores).
+
+    Con `resultados` (`src.memoria_compartida.ResultadosCompartidos`, requiere reordenador) la
+    cola trae avisos y los resultados se leen de las casillas en memoria compartida.
+    """
+    if (cantidad_total is None or resultados is not None) and reordenador is None:
+        raise ValueError
+    entregadas = 0
+    terminados = 0
+    while (entregadas < cantidad_total) if cantidad_total is not None else (terminados < reordenador.total):
+        if reordenador is None:
+            datos = read_data(queue)
+            # Con lotes cada analizador envía una lista; la ronda i son los i-ésimos de cada lista
+            rondas = [list(ronda) for ronda in zip(*datos)] if isinstance(datos[0], list) else [datos]
+        else:
+            recibido = json.loads(queue.get()) if resultados is None else resultados.leer(queue.get())
+            if recibido is None:
+                terminados += 1 # Cada analizador envía sus resultados en orden, así que no falta ninguno
+                continue
+            rondas = []
+            for resultado in (recibido if isinstance(recibido, list) else [recibido]):
+                rondas.extend(reordenador.agregar(resultado))
+        if rondas:
+            yield rondas
+            entregadas += len(rondas)
+
+def leer_rondas(queue:Any=None, cantidad_total:int=0, reordenador:ReordenadorRondas=None, resultados:Any=None):
+    """
+    Igual que `leer_lotes_rondas`, pero genera las rondas de a una.
+    """
+    for rondas in leer_lotes_rondas(queue, cantidad_total, reordenador, resultados):
+        yield from rondas
+
 def alertar(datos:list=[]):
     """
     Analiza los datos de las sensores y devuelve una alarma
@@ -44,25 +123,39 @@ def alertar(datos:list=[]):
     bool
         True si se debe emitir una alarma, False en caso contrario.
     """
-    frec,pres,ox = 0,[0,0],0
-    for dato in datos:
-        temp = dato.get('tipo')
-        if temp == 'frecuencia':
-            frec = dato.get('media')
-        elif temp == 'presion':
-            pres = dato.get('media')
-        else:
-            ox = dato.get('media')
-    if frec > 200:
-        return True
-    elif pres[0] > 200 or pres[1] < 50:
-        return True
-    elif ox <= 90 or ox >= 100:
-        return True
-    return False
+    # Las reglas por defecto no tienen ventana ni histeresis, así que cada llamada es independiente
+    return bool(MotorAlertas().alertas(matriz_rondas([datos]))[0])
+
+
+def en_cola(queue:Any) -> int:
+    '''
+    Cantidad aproximada de mensajes en la cola (0 si la plataforma no lo permite, como en macOS).
+    '''
+    try:
+        return queue.qsize()
+    except NotImplementedError:
+        return 0
 
+def abrir_cadena(almacen:str='json', fsync_cada:int=0, checkpoints:int=0, reanudar:bool=False, offsets:bool=False) -> tuple:
+    '''
+    Abre el almacenamiento de la cadena (con su índice de offsets si `offsets`) y, si
+    `checkpoints` > 0, su índice de checkpoints, empezando una cadena nueva o reanudando la
+    existente.
 
-def verificar(queue:Any=None, cantidad_total:int=0, verbose:bool=False):
+    Returns
+    -------
+    tuple
+        (almacén, índice de checkpoints o None)
+    '''
+    blockchain = crear_almacen(almacen, fsync_cada=fsync_cada, continuar=reanudar, offsets=offsets)
+    indice = None
+    if checkpoints > 0:
+        indice = reanudar_checkpoints(blockchain.ultimos_hashes, blockchain.total, intervalo=checkpoints) if reanudar else IndiceCheckpoints(intervalo=checkpoints)
+    if reanudar:
+        print(f'[{getpid()}] Cadena reanudada con {blockchain.total} bloques (último hash: {blockchain.prev_hash})')
+    return blockchain, indice
+
+def verificar(queue:Any=None, cantidad_total:int=0, verbose:bool=False, creditos:list=None, almacen:str='json', fsync_cada:int=0, checkpoints:int=0, reglas:list=None, metricas:Any=None, analizadores:int=3, reanudar:bool=False, offsets:bool=False, resultados:Any=None):
     '''
     Lee resultados de la Queue, los valida y los muestra.
 
@@ -71,22 +164,68 @@ def verificar(queue:Any=None, cantidad_total:int=0, verbose:bool=False):
     queue : multiprocessing.Queue
         Cola donde los analizadores escriben sus resultados.
     cantidad_total : int
-        Cantidad total de mensajes esperados (n * número de analizadores).
+        Cantidad total de rondas (bloques) esperadas, o None para leer hasta que todos los
+        analizadores avisen que terminaron (ver `leer_lotes_rondas`).
+    creditos : list
+        Semáforos de los analizadores (ver `analizar`). Se libera uno de cada uno por cada bloque
+        armado, permitiendo que los analizadores se adelanten hasta la profundidad configurada.
+    almacen : str
+        Backend donde se guarda la cadena (ver `src.almacenamiento`): 'json' reescribe blockchain.json
+        en cada bloque, 'jsonl' agrega una línea a blockchain.jsonl.
+    fsync_cada : int
+        Con 'jsonl', cada cuántos bloques se hace fsync (0 = solo al terminar).
+    checkpoints : int
+        Cada cuántos bloques se guarda un checkpoint con raíz de Merkle en
+        blockchain.checkpoints.jsonl (0 = no se guardan).
+    reglas : list
+        Reglas de alerta (ver `src.alertas.MotorAlertas`). Por defecto, los límites de `alertar`.
+        Las rondas que llegan juntas (lotes) se evalúan de una vez.
+    metricas : Any
+        Instrumentación del pipeline (`src.metricas.Metricas`, opcional): se anota cuándo se escribe
+        cada bloque y cuántos mensajes quedan en la cola.
+    analizadores : int
+        Cantidad de analizadores (resultados por ronda): los tres de la consigna más los de
+        procesamiento de señales.
+    reanudar : bool
+        Seguir agregando bloques a la cadena existente (por ejemplo, después de un corte) en lugar
+        de empezar desde el bloque génesis. Con 'jsonl' solo se verifican los bloques posteriores
+        al último registrado en el índice de la cadena.
+    offsets : bool
+        Mantener el índice de offsets de la cadena (`<cadena>.offsets`), con el que
+        consultar_cadena.py lee bloques sueltos o busca por timestamp sin recorrerla.
+    resultados : Any
+        Casillas de resultados en memoria compartida (`src.memoria_compartida.ResultadosCompartidos`)
+        si los analizadores las usan; la cola trae solo avisos.
     '''
     print(f'[{getpid()}] Verificador iniciado')
-    blockchain = []
-    prev_hash = "0" * 64  # Hash inicial para el primer bloque
+    blockchain, indice = abrir_cadena(almacen, fsync_cada, checkpoints, reanudar, offsets)
+    previos = blockchain.total
+    prev_hash = blockchain.prev_hash  # Hash inicial: el génesis o el último de la cadena reanudada
     
-    for i in range(cantidad_total):
-        datos = read_data(queue)
-        alert = alertar(datos)
-        bloque = crear_bloque(datos,alert,prev_hash)
-        blockchain.append(bloque)
-        prev_hash = str(bloque.get('hash'))  # Encadenar hashes
-        
-        with open("blockchain.json", "w") as f:
-            json.dump(blockchain, f, indent=4)
+    # Las rondas se arman siempre según la `secuencia` de cada resultado, con o sin barrera:
+    # `Queue.put` vuelve antes de que el mensaje llegue a la cola (lo escribe un hilo de cada
+    # proceso), así que ni con barrera está garantizado que los resultados de una ronda lleguen juntos.
+    reordenador = ReordenadorRondas(total=analizadores)
+    motor = MotorAlertas(reglas)
+    i = 0
+    for rondas in leer_lotes_rondas(queue, cantidad_total, reordenador, resultados):
+        alertas = motor.alertas(matriz_rondas(rondas))
+        for datos, alert in zip(rondas, alertas):
+            i += 1
+            bloque = crear_bloque(datos,bool(alert),prev_hash)
+            blockchain.agregar(bloque)
+            if indice is not None:
+                indice.agregar(bloque)
+            prev_hash = str(bloque.get('hash'))  # Encadenar hashes
+            if metricas is not None:
+                metricas.bloque(i - 1, en_cola(queue))
+            if creditos is not None:
+                for credito in creditos:
+                    credito.release()
         
-        print(f'[{getpid()}] Bloque {i+1} verificado\n\tHash: {bloque.get("hash")}\n\tAlerta: {bloque.get("alerta")}')
-        if verbose:
-            print(f"\tDatos: {bloque.get('datos')}")
+            print(f'[{getpid()}] Bloque {previos + i} verificado\n\tHash: {bloque.get("hash")}\n\tAlerta: {bloque.get("alerta")}')
+            if verbose:
+                print(f"\tDatos: {bloque.get('datos')}")
+    blockchain.cerrar()
+    if indice is not None:
+        indice.cerrar()
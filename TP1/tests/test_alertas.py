@@ -0,0 +1,93 @@
+import unittest, os, tempfile, json
+import numpy as np
+from src.alertas import MotorAlertas, matriz_rondas, matriz_bloques, cargar_reglas, CANALES
+from src.verificador import alertar
+from src.blockchain import crear_bloque
+
+def ronda(frec, sist, diast, ox):
+    return [
+        {'tipo': 'frecuencia', 'timestamp': '2025-08-05T12:00:00', 'media': frec, 'desv': 0},
+        {'tipo': 'presion', 'timestamp': '2025-08-05T12:00:00', 'media': [sist, diast], 'desv': 0},
+        {'tipo': 'oxigeno', 'timestamp': '2025-08-05T12:00:00', 'media': ox, 'desv': 0},
+    ]
+
+class TestAlertas(unittest.TestCase):
+    def test_reglas_por_defecto(self):
+        rondas = [
+            ronda(120, 150, 80, 95),
+            ronda(201, 150, 80, 95),
+            ronda(120, 201, 80, 95),
+            ronda(120, 150, 49, 95),
+            ronda(120, 150, 80, 90),
+            ronda(120, 150, 80, 100),
+            ronda(200, 200, 50, 91),
+        ]
+        esperado = [False, True, True, True, True, True, False]
+
+        self.assertEqual(MotorAlertas().alertas(matriz_rondas(rondas)).tolist(), esperado)
+        self.assertEqual([alertar(datos) for datos in rondas], esperado)
+        self.assertTrue(alertar([])) # Sin datos los canales valen 0
+
+    def test_matriz_bloques(self):
+        bloques = [crear_bloque(ronda(120, 150, 80, 95), False, '0' * 64)]
+
+        np.testing.assert_array_equal(matriz_bloques(bloques), matriz_rondas([ronda(120, 150, 80, 95)]))
+        self.assertEqual(matriz_bloques([]).shape, (0, len(CANALES)))
+
+    def test_ventana(self):
+        motor = MotorAlertas([{'canal': 'frecuencia', 'op': '>', 'umbral': 150, 'ventana': 3}])
+        frecuencias = [100, 200, 200, 100, 100, 100]
+        matriz = matriz_rondas([ronda(f, 150, 80, 95) for f in frecuencias])
+
+        # Medias móviles: 100, 150, 166.7, 166.7, 133.3, 100
+        self.assertEqual(motor.alertas(matriz).tolist(), [False, False, True, True, False, False])
+
+    def test_histeresis(self):
+        motor = MotorAlertas([{'canal': 'oxigeno', 'op': '<=', 'umbral': 90, 'histeresis': 2}])
+        oxigeno = [95, 90, 91, 92, 93, 89]
+
+        # Después de activarse en 90 sigue activa hasta superar 92
+        self.assertEqual(motor.alertas(matriz_rondas([ronda(120, 150, 80, o) for o in oxigeno])).tolist(),
+                         [True if i in (1, 2, 3, 5) else False for i in range(6)])
+
+    def test_por_tramos_igual_a_todo_junto(self):
+        reglas = [
+            {'canal': 'frecuencia', 'op': '>', 'umbral': 150, 'ventana': 4, 'histeresis': 10},
+            {'canal': 'diastolica', 'op': '<', 'umbral': 60, 'histeresis': 5},
+        ]
+        rng = np.random.default_rng(0)
+        matriz = np.column_stack((rng.integers(40, 220, 200), rng.integers(110, 220, 200), rng.integers(40, 110, 200), rng.integers(89, 100, 200))).astype(float)
+
+        completo = MotorAlertas(reglas).evaluar(matriz)
+        motor = MotorAlertas(reglas)
+        por_tramos = np.vstack([motor.evaluar(matriz[i:i + 7]) for i in range(0, 200, 7)])
+        np.testing.assert_array_equal(completo, por_tramos)
+
+        motor.reiniciar()
+        np.testing.assert_array_equal(motor.evaluar(matriz), completo)
+
+    def test_reglas_invalidas(self):
+        for regla in ({'canal': 'temperatura', 'op': '>', 'umbral': 38},
+                      {'canal': 'frecuencia', 'op': '==', 'umbral': 100},
+                      {'canal': 'frecuencia', 'op': '>'},
+                      {'canal': 'frecuencia', 'op': '>', 'umbral': 100, 'ventana': 0},
+                      {'canal': 'frecuencia', 'op': '>', 'umbral': 100, 'histeresis': -1}):
+            with self.subTest(regla=regla):
+                with self.assertRaises(ValueError):
+                    MotorAlertas([regla])
+
+    def test_cargar_reglas(self):
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = os.path.join(directorio, 'reglas.json')
+            reglas = [{'canal': 'frecuencia', 'op': '>', 'umbral': 180, 'ventana': 5}]
+            with open(ruta, 'w') as f:
+                json.dump(reglas, f)
+            self.assertEqual(cargar_reglas(ruta), reglas)
+
+            with open(ruta, 'w') as f:
+                json.dump({'canal': 'frecuencia'}, f)
+            with self.assertRaises(ValueError):
+                cargar_reglas(ruta)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+import unittest, json, os, tempfile
+from src.almacenamiento import (AlmacenJSON, AlmacenJSONL, crear_almacen, leer_jsonl, exportar_json, recuperar_jsonl,
+                                leer_lineas_finales, ruta_indice, GENESIS)
+from tests.test_blockchain import crear_cadena
+
+def bloque(i):
+    return {
+        'timestamp': f'2025-08-05T12:00:{i:02d}',
+        'datos': {
+            'frecuencia': {'media': 100.0 + i, 'desv': 1.5},
+            'presion': {'media': [120.0, 80.0], 'desv': [2.0, 1.0]},
+            'oxigeno': {'media': 95.0, 'desv': 0.5},
+        },
+        'alerta': False,
+        'prev_hash': '0' * 64,
+        'hash': f'{i:064x}',
+    }
+
+class TestAlmacenamiento(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def ruta(self, nombre):
+        return os.path.join(self.dir.name, nombre)
+
+    def test_jsonl_una_linea_por_bloque(self):
+        almacen = AlmacenJSONL(self.ruta('cadena.jsonl'), fsync_cada=2)
+        for i in range(3):
+            almacen.agregar(bloque(i))
+        almacen.cerrar()
+
+        with open(self.ruta('cadena.jsonl')) as f:
+            self.assertEqual(len(f.readlines()), 3)
+        self.assertEqual(list(leer_jsonl(self.ruta('cadena.jsonl'))), [bloque(i) for i in range(3)])
+
+    def test_exportar_igual_al_formato_json(self):
+        jsonl = AlmacenJSONL(self.ruta('cadena.jsonl'))
+        original = AlmacenJSON(self.ruta('original.json'))
+        for i in range(3):
+            jsonl.agregar(bloque(i))
+            original.agregar(bloque(i))
+        jsonl.cerrar()
+
+        cantidad = exportar_json(self.ruta('cadena.jsonl'), self.ruta('exportado.json'))
+
+        self.assertEqual(cantidad, 3)
+        with open(self.ruta('original.json')) as a, open(self.ruta('exportado.json')) as b:
+            self.assertEqual(a.read(), b.read()) # Byte a byte igual a json.dump(..., indent=4)
+
+    def test_exportar_cadena_vacia(self):
+        AlmacenJSONL(self.ruta('vacia.jsonl')).cerrar()
+
+        self.assertEqual(exportar_json(self.ruta('vacia.jsonl'), self.ruta('vacia.json')), 0)
+        with open(self.ruta('vacia.json')) as f:
+            self.assertEqual(json.load(f), [])
+
+    def test_leer_lineas_finales(self):
+        with open(self.ruta('lineas'), 'wb') as f:
+            f.write(b''.join(b'linea %d\n' % i for i in range(50)))
+        with open(self.ruta('lineas'), 'rb') as f:
+            fin = os.path.getsize(self.ruta('lineas'))
+            self.assertEqual(leer_lineas_finales(f, fin, 3, tam_lectura=5), [b'linea 47', b'linea 48', b'linea 49'])
+            self.assertEqual(len(leer_lineas_finales(f, fin, 100, tam_lectura=7)), 50)
+            self.assertEqual(leer_lineas_finales(f, fin, 0), [])
+
+    def test_reanudar_jsonl(self):
+        cadena = crear_cadena(10)
+        almacen = AlmacenJSONL(self.ruta('cadena.jsonl'), fsync_cada=3)
+        for b in cadena[:7]:
+            almacen.agregar(b)
+        # El proceso muere a mitad de una escritura: el índice quedó en el bloque 6 (último fsync)
+        almacen.archivo.write('{"version":2,"times')
+        almacen.archivo.close()
+        with open(ruta_indice(self.ruta('cadena.jsonl'))) as f:
+            self.assertEqual(json.load(f).get('bloques'), 6)
+
+        almacen = AlmacenJSONL(self.ruta('cadena.jsonl'), continuar=True)
+        self.assertEqual((almacen.total, almacen.prev_hash), (7, cadena[6]['hash']))
+        self.assertEqual(almacen.ultimos_hashes(2), [cadena[5]['hash'], cadena[6]['hash']])
+        for b in cadena[7:]:
+            almacen.agregar(b)
+        almacen.cerrar()
+
+        self.assertEqual(list(leer_jsonl(self.ruta('cadena.jsonl'))), cadena)
+        self.assertEqual(recuperar_jsonl(self.ruta('cadena.jsonl')).get('bloques'), 10)
+
+    def test_reanudar_jsonl_verifica_solo_la_cola(self):
+        cadena = crear_cadena(6)
+        almacen = AlmacenJSONL(self.ruta('cadena.jsonl'))
+        for b in cadena[:4]:
+            almacen.agregar(b)
+        almacen.cerrar()
+        with open(self.ruta('cadena.jsonl'), 'a') as f:
+            for b in cadena[4:]:
+                f.write(json.dumps(b) + '\n')
+        with open(self.ruta('cadena.jsonl')) as f:
+            lineas = f.readlines()
+        # Un bloque anterior al índice alterado no se vuelve a verificar...
+        with open(self.ruta('cadena.jsonl'), 'w') as f:
+            f.writelines([lineas[0].replace('"media":100.0', '"media":900.0')] + lineas[1:])
+        self.assertEqual(recuperar_jsonl(self.ruta('cadena.jsonl')).get('bloques'), 6)
+
+        # ...pero uno posterior sí; y sin índice se verifica la cadena completa
+        with open(self.ruta('cadena.jsonl'), 'w') as f:
+            f.writelines(lineas[:5] + [lineas[5].replace(cadena[5]['prev_hash'], GENESIS)])
+        with self.assertRaises(ValueError):
+            recuperar_jsonl(self.ruta('cadena.jsonl'))
+        os.remove(ruta_indice(self.ruta('cadena.jsonl')))
+        with open(self.ruta('cadena.jsonl'), 'w') as f:
+            f.writelines([lineas[0].replace('"media":100.0', '"media":900.0')] + lineas[1:])
+        with self.assertRaises(ValueError):
+            recuperar_jsonl(self.ruta('cadena.jsonl'))
+
+    def test_reanudar_sin_cadena(self):
+        self.assertEqual(recuperar_jsonl(self.ruta('no_existe.jsonl')), {'bloques': 0, 'offset': 0, 'hash': GENESIS})
+        almacen = AlmacenJSON(self.ruta('no_existe.json'), continuar=True)
+        self.assertEqual((almacen.total, almacen.prev_hash), (0, GENESIS))
+
+    def test_reanudar_json(self):
+        cadena = crear_cadena(5)
+        almacen = AlmacenJSON(self.ruta('cadena.json'))
+        for b in cadena[:3]:
+            almacen.agregar(b)
+
+        almacen = crear_almacen('json', self.ruta('cadena.json'), continuar=True)
+        self.assertEqual((almacen.total, almacen.prev_hash), (3, cadena[2]['hash']))
+        self.assertEqual(almacen.ultimos_hashes(1), [cadena[2]['hash']])
+        for b in cadena[3:]:
+            almacen.agregar(b)
+        with open(self.ruta('cadena.json')) as f:
+            self.assertEqual(json.load(f), cadena)
+
+    def test_crear_almacen_formato_invalido(self):
+        with self.assertRaises(ValueError):
+            crear_almacen('xml')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,11 @@
-import unittest
+import unittest, json
 from unittest.mock import  patch, MagicMock
-from src.analizador import leer_datos, analizar, procesar
+from src.analizador import leer_datos, analizar, procesar, calcular, crear_costo, costo_ninguno, costo_aleatorio
+from src.utils import EstadisticaMovil
+from src.ventana import VentanaCircular, registro_desde_dato
+from src.protocolo import codificar, nuevo_buffer
+from multiprocessing import Pipe
+from collections import deque
 
 class TestAnalizador(unittest.TestCase):
     def test_analizar(self):
@@ -32,6 +37,41 @@ class TestAnalizador(unittest.TestCase):
 
         self.assertEqual(ventana[0], dato_esperado)
 
+    @patch('src.analizador.loads')
+    def test_leer_dato_actualiza_stats(self, mock_jsonloads):
+        canal_mock = MagicMock()
+        mock_jsonloads.side_effect = [
+            {"timestamp": "2025-08-05T12:00:00", "frecuencia": 120, "presion": [140, 85], "oxigeno": 95},
+            {"timestamp": "2025-08-05T12:00:01", "frecuencia": 100, "presion": [110, 65], "oxigeno": 95},
+            {"timestamp": "2025-08-05T12:00:02", "frecuencia": 80, "presion": [120, 75], "oxigeno": 95},
+        ]
+
+        ventana = []
+        stats = EstadisticaMovil('frecuencia')
+        for _ in range(3):
+            leer_datos(canal_entrada=canal_mock, ventana=ventana, ventana_size=2, stats=stats)
+
+        # El primer dato (120) fue desalojado de la ventana y de las estadísticas
+        self.assertEqual(len(ventana), 2)
+        self.assertEqual(len(stats), 2)
+        self.assertEqual(stats.media(), 90.0)
+
+    @patch('src.analizador.sleep')
+    def test_procesar_con_stats(self, mock_sleep):
+        dato1 = {"timestamp": "2025-08-05T12:00:00", "frecuencia": 120, "presion": [140, 85], "oxigeno": 95}
+        dato2 = {"timestamp": "2025-08-05T12:00:01", "frecuencia": 100, "presion": [110, 65], "oxigeno": 95}
+        ventana = [dato1,dato2]
+
+        stats = EstadisticaMovil('presion')
+        for dato in ventana:
+            stats.agregar(dato.get('presion'))
+
+        resultado = procesar(tipo='presion', ventana=ventana, stats=stats)
+
+        # Mismo resultado que test_procesar_presion_2_datos, sin recorrer la ventana
+        self.assertEqual(resultado.get('media'), [125.0,75.0])
+        self.assertEqual(resultado.get('desv'), [21.213203435596427, 14.142135623730951])
+
     @patch('src.analizador.sleep')
     def test_procesar_frecuencia_2_datos(self, mock_sleep):
         tipo = 'frecuencia'
@@ -98,6 +138,137 @@ class TestAnalizador(unittest.TestCase):
 
         self.assertEqual(resultado, esperado)
 
+    def test_ventana_circular_desaloja_el_mas_antiguo(self):
+        ventana = VentanaCircular(capacidad=2)
+
+        self.assertIsNone(ventana.agregar((0, 120, 140, 85, 95)))
+        self.assertIsNone(ventana.agregar((1, 100, 110, 65, 96)))
+        desalojado = ventana.agregar((2, 80, 120, 75, 97))
+
+        self.assertEqual(desalojado, (0, 120, 140, 85, 95))
+        self.assertEqual(len(ventana), 2)
+        self.assertEqual(ventana.datos('frecuencia').tolist(), [100, 80]) # Orden cronológico
+        self.assertEqual(ventana.datos('presion').tolist(), [[110, 65], [120, 75]])
+        self.assertEqual(ventana.columna('oxigeno').tolist(), [96, 97])
+
+    def test_ventana_circular_capacidad_invalida(self):
+        with self.assertRaises(ValueError):
+            VentanaCircular(capacidad=0)
+
+    @patch('src.analizador.loads')
+    def test_leer_dato_ventana_circular(self, mock_jsonloads):
+        canal_mock = MagicMock()
+        datos = [
+            {"timestamp": "2025-08-05T12:00:00", "frecuencia": 120, "presion": [140, 85], "oxigeno": 95},
+            {"timestamp": "2025-08-05T12:00:01", "frecuencia": 100, "presion": [110, 65], "oxigeno": 95},
+            {"timestamp": "2025-08-05T12:00:02", "frecuencia": 80, "presion": [120, 75], "oxigeno": 95},
+        ]
+        mock_jsonloads.side_effect = datos
+
+        ventana = VentanaCircular(capacidad=2)
+        stats = EstadisticaMovil('presion')
+        for _ in range(3):
+            leer_datos(canal_entrada=canal_mock, ventana=ventana, stats=stats)
+
+        self.assertEqual(len(ventana), 2)
+        self.assertEqual(ventana.ultimo(), registro_desde_dato(datos[2]))
+        self.assertEqual(ventana.ultimo_timestamp(), "2025-08-05T12:00:02")
+        self.assertEqual(stats.media(), [115.0, 70.0])
+
+    def test_leer_dato_binario(self):
+        lectura, escritura = Pipe(duplex=False)
+        registro = registro_desde_dato({"timestamp": "2025-08-05T12:00:00", "frecuencia": 120, "presion": [140, 85], "oxigeno": 95})
+        escritura.send_bytes(codificar(registro))
+        escritura.send_bytes(codificar(registro))
+
+        ventana = VentanaCircular(capacidad=30)
+        lista = []
+        buffer = nuevo_buffer()
+        leer_datos(canal_entrada=lectura, ventana=ventana, buffer=buffer)
+        leer_datos(canal_entrada=lectura, ventana=lista, buffer=buffer)
+
+        self.assertEqual(ventana.ultimo(), registro)
+        # Con una lista se guarda el dict con el mismo formato que en JSON
+        self.assertEqual(lista[0], {"timestamp": "2025-08-05T12:00:00", "frecuencia": 120, "presion": [140, 85], "oxigeno": 95})
+
+    def test_leer_datos_lote_binario(self):
+        lectura, escritura = Pipe(duplex=False)
+        registros = [(1754362800 + i, 100 + i, 120, 80, 95) for i in range(3)]
+        escritura.send_bytes(b''.join(codificar(r) for r in registros))
+
+        ventana = VentanaCircular(capacidad=30)
+        pendientes = deque()
+        buffer = nuevo_buffer(3)
+        for _ in range(3):
+            leer_datos(canal_entrada=lectura, ventana=ventana, buffer=buffer, pendientes=pendientes)
+
+        # Un solo mensaje con tres datos: se agregan de a uno a la ventana
+        self.assertEqual(ventana.datos('frecuencia').tolist(), [100, 101, 102])
+        self.assertEqual(len(pendientes), 0)
+
+    @patch('src.analizador.loads')
+    def test_leer_datos_lote_sin_pendientes(self, mock_jsonloads):
+        mock_jsonloads.return_value = [
+            {"timestamp": "2025-08-05T12:00:00", "frecuencia": 120, "presion": [140, 85], "oxigeno": 95},
+            {"timestamp": "2025-08-05T12:00:01", "frecuencia": 100, "presion": [110, 65], "oxigeno": 95},
+        ]
+        with self.assertRaises(ValueError):
+            leer_datos(canal_entrada=MagicMock(), ventana=[])
+
+    @patch('src.analizador.sleep')
+    def test_procesar_ventana_circular(self, mock_sleep):
+        ventana = VentanaCircular(capacidad=30)
+        ventana.agregar_dato({"timestamp": "2025-08-05T12:00:00", "frecuencia": 120, "presion": [140, 85], "oxigeno": 98})
+        ventana.agregar_dato({"timestamp": "2025-08-05T12:00:01", "frecuencia": 100, "presion": [110, 65], "oxigeno": 96})
+
+        resultado = procesar(tipo='oxigeno', ventana=ventana)
+
+        esperado = {
+            'tipo': 'oxigeno',
+            'timestamp': '2025-08-05T12:00:01',
+            'media': 97.0,
+            'desv': 1.4142135623730951
+        }
+        self.assertEqual(resultado, esperado)
+
+    @patch('src.analizador.sleep')
+    def test_modelos_de_costo(self, mock_sleep):
+        ventana = VentanaCircular(4)
+        for i in range(3):
+            ventana.agregar_dato({'timestamp': f'2025-08-05T12:00:0{i}', 'frecuencia': 80 + i, 'presion': [120, 80], 'oxigeno': 95})
+
+        self.assertIs(crear_costo('ninguno'), costo_ninguno)
+        self.assertIs(crear_costo(), costo_aleatorio)
+        crear_costo('fijo:0.25')('frecuencia', ventana)
+        mock_sleep.assert_called_once_with(0.25)
+        # La FFT no duerme: es carga de CPU real sobre la ventana (también con presión, de 2 canales)
+        crear_costo('fft:2')('presion', ventana)
+        crear_costo('fft')('frecuencia', [{'frecuencia': 80}, {'frecuencia': 82}])
+        mock_sleep.assert_called_once()
+
+        resultado = procesar(tipo='oxigeno', ventana=ventana, costo=crear_costo('ninguno'))
+        self.assertEqual(resultado.get('media'), 95.0)
+        mock_sleep.assert_called_once()
+
+        for especificacion in ('lento', 'ninguno:3', 'fijo:-1', 'fft:x'):
+            with self.subTest(especificacion=especificacion):
+                with self.assertRaises(ValueError):
+                    crear_costo(especificacion)
+
+    def test_calcular_senales(self):
+        ventana = VentanaCircular(4)
+        datos = [{'timestamp': f'2025-08-05T12:00:0{i}', 'frecuencia': 60 + 60 * (i % 2), 'presion': [120, 80], 'oxigeno': 95} for i in range(3)]
+        for dato in datos:
+            ventana.agregar_dato(dato)
+
+        resultado = calcular('variabilidad', ventana)
+        self.assertEqual(resultado.get('tipo'), 'variabilidad')
+        self.assertEqual(resultado.get('timestamp'), '2025-08-05T12:00:02')
+        self.assertAlmostEqual(resultado.get('rmssd'), 500.0)
+        # Con una lista de datos da lo mismo que con la ventana circular
+        self.assertEqual(calcular('tendencia', datos), calcular('tendencia', ventana))
+        self.assertAlmostEqual(calcular('tendencia', ventana).get('sistolica'), 0.0)
+
     def test_procesar_tipo_invalido(self):
         with self.assertRaises(ValueError):
             procesar(tipo='prueba',ventana=[])
@@ -247,6 +418,63 @@ class TestAnalizador(unittest.TestCase):
         self.assertEqual(cond_mock.__enter__.call_count, 2)
         self.assertEqual(cond_mock.__exit__.call_count, 2)
 
+    @patch('builtins.print')
+    @patch('src.analizador.procesar')
+    @patch('src.analizador.leer_datos')
+    @patch('src.analizador.getpid')
+    def test_analizar_sin_barrera(self, mock_getpid, mock_leer_datos, mock_procesar, mock_print):
+        """Sin done_count/cond no hay barrera: cada resultado lleva su secuencia y se consumen créditos"""
+
+        mock_getpid.return_value = 12345
+        mock_procesar.side_effect = lambda **kwargs: {"resultado": "test"}
+
+        pipe_mock = MagicMock()
+        queue_mock = MagicMock()
+        creditos_mock = MagicMock()
+
+        analizar(
+            pipe_to_read=pipe_mock,
+            queue=queue_mock,
+            tipo='oxigeno',
+            n=3,
+            done_count=None,
+            cond=None,
+            verbose=False,
+            creditos=creditos_mock
+        )
+
+        self.assertEqual(creditos_mock.acquire.call_count, 3)
+        secuencias = [json.loads(c.args[0]).get('secuencia') for c in queue_mock.put.call_args_list]
+        self.assertEqual(secuencias, [0, 1, 2])
+
+    @patch('builtins.print')
+    @patch('src.analizador.procesar')
+    @patch('src.analizador.leer_datos')
+    @patch('src.analizador.getpid')
+    def test_analizar_en_lotes(self, mock_getpid, mock_leer_datos, mock_procesar, mock_print):
+        """Con lote=2 y n=3 se envían dos mensajes (2 + 1 resultados) y la barrera se hace por lote"""
+
+        mock_getpid.return_value = 12345
+        mock_procesar.side_effect = lambda **kwargs: {"resultado": "test"}
+
+        queue_mock = MagicMock()
+        cond_mock = self.crear_condition_mock()
+
+        analizar(
+            pipe_to_read=MagicMock(),
+            queue=queue_mock,
+            tipo='frecuencia',
+            n=3,
+            done_count=self.crear_value_mock(),
+            cond=cond_mock,
+            verbose=False,
+            lote=2
+        )
+
+        lotes = [json.loads(c.args[0]) for c in queue_mock.put.call_args_list]
+        self.assertEqual([[r.get('secuencia') for r in lote] for lote in lotes], [[0, 1], [2]])
+        self.assertEqual(cond_mock.__enter__.call_count, 2)
+
     def test_analizar_tipo_invalido_lanza_excepcion(self):
         """Test que verifica validación del parámetro tipo"""
         
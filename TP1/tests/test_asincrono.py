@@ -0,0 +1,49 @@
+import unittest, os, tempfile, asyncio
+from unittest.mock import patch
+from src.asincrono import pipeline, generar
+from src.almacenamiento import leer_jsonl
+from src.blockchain import calcular_hash
+from src.metricas import Metricas
+
+class TestAsincrono(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.dir.name)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.dir.cleanup()
+
+    @patch('builtins.print')
+    def test_pipeline_genera_cadena_valida(self, mock_print):
+        tipos = ('frecuencia', 'presion', 'oxigeno', 'variabilidad')
+        asyncio.run(pipeline(n=12, tipos=tipos, tasa=0, ventana_size=4, costo='fijo:0', almacen='jsonl', profundidad=1))
+
+        bloques = list(leer_jsonl('blockchain.jsonl'))
+        self.assertEqual(len(bloques), 12)
+        prev_hash = '0' * 64
+        for bloque in bloques:
+            self.assertEqual(bloque.get('prev_hash'), prev_hash)
+            self.assertEqual(calcular_hash(bloque), bloque.get('hash'))
+            self.assertEqual(set(bloque.get('datos')), set(tipos))
+            prev_hash = bloque.get('hash')
+
+    @patch('builtins.print')
+    def test_pipeline_con_metricas(self, mock_print):
+        metricas = Metricas(analizadores=3)
+        try:
+            asyncio.run(pipeline(n=5, tasa=0, costo='ninguno', almacen='jsonl', profundidad=0, metricas=metricas))
+            reporte = metricas.reporte()
+        finally:
+            metricas.liberar()
+
+        self.assertEqual(reporte.get('bloques'), 5)
+        self.assertEqual(reporte['latencias']['analisis']['cantidad'], 15)
+
+    def test_generar_parametros_invalidos(self):
+        with self.assertRaises(ValueError):
+            asyncio.run(generar([], n=1))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+import unittest
+from benchmark import configuraciones, correr, comparar
+
+class TestBenchmark(unittest.TestCase):
+    def test_configuraciones(self):
+        combinaciones = configuraciones([10, 100], [30], ['pipe', 'shm'], ['jsonl'], [1])
+
+        self.assertEqual(len(combinaciones), 4)
+        self.assertIn({'muestras': 100, 'ventana': 30, 'transporte': 'shm', 'almacen': 'jsonl', 'lote': 1, 'costo': 'ninguno'}, combinaciones)
+        self.assertEqual(len(configuraciones([10], [30], ['pipe'], ['jsonl'], [1], ['ninguno', 'fft:2'])), 2)
+
+    def test_comparar(self):
+        configuracion = {'muestras': 10, 'ventana': 30, 'transporte': 'pipe', 'almacen': 'jsonl', 'lote': 1}
+        otra = dict(configuracion, transporte='shm')
+        anterior = [{'configuracion': configuracion, 'muestras_por_segundo': 100.0}]
+        actual = [{'configuracion': configuracion, 'muestras_por_segundo': 80.0}, {'configuracion': otra, 'muestras_por_segundo': 90.0}]
+
+        self.assertEqual(comparar(anterior, actual), [(configuracion, 100.0, 80.0, 0.8)])
+
+    def test_correr_pipeline_real(self):
+        resultado = correr({'muestras': 5, 'ventana': 3, 'transporte': 'shm', 'almacen': 'jsonl', 'lote': 2}, timeout=60)
+
+        self.assertEqual(resultado['latencias']['total']['cantidad'], 5)
+        self.assertGreater(resultado.get('muestras_por_segundo'), 0)
+        self.assertIn('Verificador', resultado.get('rss_kb'))
+        self.assertIsNotNone(resultado['escritura']['por_bloque'])
+
+    def test_correr_asyncio(self):
+        resultado = correr({'muestras': 5, 'ventana': 3, 'transporte': 'asyncio', 'almacen': 'jsonl', 'lote': 1}, timeout=60)
+
+        self.assertEqual(resultado['latencias']['total']['cantidad'], 5)
+        # Un solo proceso: no hay verificador aparte
+        self.assertEqual(list(resultado.get('rss_kb')), ['MainProcess'])
+
+if __name__ == '__main__':
+    unittest.main()
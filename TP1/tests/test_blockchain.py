@@ -0,0 +1,196 @@
+import unittest, os, tempfile, json
+from unittest.mock import patch
+from hashlib import sha256
+from src.blockchain import (crear_bloque, codificar_cuerpo, VERSION, calcular_hash, raiz_merkle, prueba_merkle, verificar_prueba_merkle,
+                            verificar_segmento, verificar_bloque, hash_valido, IndiceCheckpoints, leer_checkpoints, reanudar_checkpoints)
+
+def crear_cadena(cantidad):
+    cadena = []
+    prev_hash = '0' * 64
+    for i in range(cantidad):
+        datos = [
+            {'tipo': 'frecuencia', 'timestamp': f'2025-08-05T12:00:{i:02d}', 'media': 100.0 + i, 'desv': 1.5},
+            {'tipo': 'presion', 'timestamp': f'2025-08-05T12:00:{i:02d}', 'media': [120.0, 80.0], 'desv': [2.0, 1.0]},
+            {'tipo': 'oxigeno', 'timestamp': f'2025-08-05T12:00:{i:02d}', 'media': 95.0, 'desv': 0.5},
+        ]
+        bloque = crear_bloque(datos, False, prev_hash)
+        prev_hash = bloque.get('hash')
+        cadena.append(bloque)
+    return cadena
+
+class TestBlockchain(unittest.TestCase):
+    def test_crear_bloque_hash(self):
+        bloque = crear_cadena(1)[0]
+
+        self.assertEqual(bloque.get('prev_hash'), '0' * 64)
+        self.assertEqual(bloque.get('hash'), calcular_hash(bloque))
+
+    def test_bloque_version_1_sigue_verificando(self):
+        # Bloque tal como lo generaba la versión original (sin campo 'version')
+        cuerpo = {
+            'frecuencia': {'media': 215.0, 'desv': 0},
+            'presion': {'media': [198.0, 50.0], 'desv': 0},
+            'oxigeno': {'media': 100.0, 'desv': 0},
+        }
+        bloque = {'timestamp': '2025-08-10T19:48:37', 'datos': cuerpo, 'alerta': True, 'prev_hash': '0' * 64}
+        hash_input = bloque['prev_hash'] + json.dumps(cuerpo, sort_keys=True) + bloque['timestamp']
+
+        self.assertEqual(calcular_hash(bloque), sha256(hash_input.encode()).hexdigest())
+
+    def test_bloque_version_2(self):
+        bloque = crear_cadena(1)[0]
+        # El orden de las claves del cuerpo no cambia el hash
+        desordenado = {**bloque, 'datos': dict(reversed(list(bloque['datos'].items())))}
+        alterado = json.loads(json.dumps(bloque))
+        alterado['datos']['presion']['desv'][1] = 1.0000001
+
+        self.assertEqual(bloque.get('version'), VERSION)
+        self.assertEqual(len(codificar_cuerpo(bloque['datos'])), 64)
+        self.assertEqual(calcular_hash(json.loads(json.dumps(bloque))), bloque['hash'])
+        self.assertEqual(calcular_hash(desordenado), bloque['hash'])
+        self.assertNotEqual(calcular_hash(alterado), bloque['hash'])
+
+    def test_bloque_version_3_con_senales(self):
+        datos = [
+            {'tipo': 'frecuencia', 'timestamp': '2025-08-05T12:00:00', 'media': 100.0, 'desv': 1.5},
+            {'tipo': 'presion', 'timestamp': '2025-08-05T12:00:00', 'media': [120.0, 80.0], 'desv': [2.0, 1.0]},
+            {'tipo': 'oxigeno', 'timestamp': '2025-08-05T12:00:00', 'media': 95.0, 'desv': 0.5},
+            {'tipo': 'variabilidad', 'timestamp': '2025-08-05T12:00:00', 'rmssd': 42.0, 'sdnn': 30.5},
+        ]
+        bloque = crear_bloque(datos, False, '0' * 64)
+        desordenado = json.loads(json.dumps(bloque))
+        desordenado['datos']['variabilidad'] = {'sdnn': 30.5, 'rmssd': 42.0}
+        alterado = json.loads(json.dumps(bloque))
+        alterado['datos']['variabilidad']['rmssd'] = 42.0001
+
+        self.assertEqual(bloque.get('version'), 3)
+        self.assertEqual(bloque['datos']['variabilidad'], {'rmssd': 42.0, 'sdnn': 30.5})
+        self.assertEqual(calcular_hash(bloque), bloque['hash'])
+        self.assertEqual(calcular_hash(desordenado), bloque['hash'])
+        self.assertNotEqual(calcular_hash(alterado), bloque['hash'])
+        # Sin tipos de señales se sigue generando la versión 2
+        self.assertEqual(crear_bloque(datos[:3], False, '0' * 64).get('version'), VERSION)
+
+    def test_hash_valido_rechaza_cuerpos_fuera_del_hash(self):
+        bloque = json.loads(json.dumps(crear_cadena(1)[0]))
+        con_senales = crear_bloque([
+            {'tipo': 'frecuencia', 'timestamp': '2025-08-05T12:00:00', 'media': 100.0, 'desv': 0},
+            {'tipo': 'presion', 'timestamp': '2025-08-05T12:00:00', 'media': [120.0, 80.0], 'desv': 0},
+            {'tipo': 'oxigeno', 'timestamp': '2025-08-05T12:00:00', 'media': 95.0, 'desv': 0},
+            {'tipo': 'variabilidad', 'timestamp': '2025-08-05T12:00:00', 'rmssd': 42.0, 'sdnn': 30.5},
+        ], False, '0' * 64)
+        self.assertTrue(hash_valido(bloque))
+        self.assertTrue(hash_valido(json.loads(json.dumps(con_senales))))
+
+        alterados = [json.loads(json.dumps(bloque)) for _ in range(5)]
+        alterados[0]['datos']['extra'] = {'valor': 1.0}                 # Tipo que el hash no cubre
+        alterados[1]['datos']['frecuencia']['extra'] = 1.0              # Clave que el hash no cubre
+        alterados[2]['datos']['presion']['desv'] = 2.0                  # Se codifica igual que [2.0, 2.0]
+        alterados[3]['datos']['oxigeno']['media'] = [95.0, 95.0]
+        alterados[4]['prev_hash'] = 'no es hexadecimal'
+        # Sección de señales de un bloque de versión 3 presentada como versión 2
+        alterados.append(dict(con_senales, version=VERSION))
+        for alterado in alterados:
+            self.assertFalse(hash_valido(alterado))
+
+    def test_version_desconocida(self):
+        bloque = crear_cadena(1)[0]
+        bloque['version'] = 99
+
+        with self.assertRaises(ValueError):
+            calcular_hash(bloque)
+
+    def test_raiz_merkle(self):
+        a, b, c = (sha256(x).hexdigest() for x in (b'a', b'b', b'c'))
+        ab = sha256(bytes.fromhex(a) + bytes.fromhex(b)).digest()
+        cc = sha256(bytes.fromhex(c) + bytes.fromhex(c)).digest()
+
+        self.assertEqual(raiz_merkle([]), '0' * 64)
+        self.assertEqual(raiz_merkle([a]), a)
+        self.assertEqual(raiz_merkle([a, b, c]), sha256(ab + cc).hexdigest())
+
+    def test_pruebas_merkle(self):
+        for cantidad in (1, 2, 5, 8, 13):
+            hashes = [sha256(str(i).encode()).hexdigest() for i in range(cantidad)]
+            raiz = raiz_merkle(hashes)
+            for i in range(cantidad):
+                with self.subTest(cantidad=cantidad, indice=i):
+                    prueba = prueba_merkle(hashes, i)
+                    self.assertLessEqual(len(prueba), cantidad.bit_length())
+                    self.assertTrue(verificar_prueba_merkle(hashes[i], prueba, raiz))
+                    self.assertFalse(verificar_prueba_merkle('f' * 64, prueba, raiz))
+
+    def test_indice_checkpoints(self):
+        cadena = crear_cadena(7)
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = os.path.join(directorio, 'checkpoints.jsonl')
+            indice = IndiceCheckpoints(ruta, intervalo=3)
+            for bloque in cadena:
+                indice.agregar(bloque)
+            indice.cerrar()
+            checkpoints = leer_checkpoints(ruta)
+
+        # 7 bloques en tramos de 3: dos checkpoints (el tramo incompleto no se guarda)
+        self.assertEqual([(c['inicio'], c['bloque']) for c in checkpoints], [(0, 2), (3, 5)])
+        self.assertEqual(checkpoints[1]['hash'], cadena[5]['hash'])
+        self.assertTrue(verificar_segmento(cadena[3:6], checkpoints[1]))
+
+        hashes = [b['hash'] for b in cadena[3:6]]
+        self.assertTrue(verificar_bloque(cadena[4], prueba_merkle(hashes, 1), checkpoints[1]))
+
+        cadena[4]['datos']['oxigeno']['media'] = 0.0
+        self.assertFalse(verificar_segmento(cadena[3:6], checkpoints[1]))
+        # Un prev_hash alterado que no es hexadecimal no llega a calcular_hash
+        self.assertFalse(verificar_segmento([cadena[3], dict(cadena[4], prev_hash='x'), cadena[5]], checkpoints[1]))
+        self.assertFalse(verificar_bloque(cadena[4], prueba_merkle(hashes, 1), checkpoints[1]))
+
+    def test_reanudar_checkpoints(self):
+        cadena = crear_cadena(10)
+        hashes = [b['hash'] for b in cadena]
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = os.path.join(directorio, 'checkpoints.jsonl')
+            indice = IndiceCheckpoints(ruta, intervalo=3)
+            for bloque in cadena[:7]:
+                indice.agregar(bloque)
+            indice.cerrar()
+
+            # Se reanuda con 7 bloques: el tramo 6..8 se completa con el hash del bloque 6 ya escrito
+            indice = reanudar_checkpoints(lambda cantidad: hashes[7 - cantidad:7], 7, ruta, intervalo=3)
+            for bloque in cadena[7:]:
+                indice.agregar(bloque)
+            indice.cerrar()
+            checkpoints = leer_checkpoints(ruta)
+
+        self.assertEqual([(c['inicio'], c['bloque']) for c in checkpoints], [(0, 2), (3, 5), (6, 8)])
+        self.assertTrue(verificar_segmento(cadena[6:9], checkpoints[2]))
+
+    def test_reanudar_checkpoints_despues_de_un_corte(self):
+        cadena = crear_cadena(7)
+        hashes = [b['hash'] for b in cadena]
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = os.path.join(directorio, 'checkpoints.jsonl')
+            indice = IndiceCheckpoints(ruta, intervalo=3)
+            for bloque in cadena[:6]:
+                indice.agregar(bloque)
+            indice.cerrar()
+            with open(ruta, 'a', encoding='utf-8') as f:
+                f.write('{"inicio": 6, "bloq') # Checkpoint a medio escribir
+            self.assertEqual(len(leer_checkpoints(ruta)), 2)
+
+            # Un corte mientras se reescribe el índice no pierde los checkpoints anteriores
+            with patch('src.blockchain.os.replace', side_effect=OSError):
+                with self.assertRaises(OSError):
+                    reanudar_checkpoints(lambda cantidad: hashes[6 - cantidad:6], 6, ruta, intervalo=3)
+            self.assertEqual(len(leer_checkpoints(ruta)), 2)
+
+            indice = reanudar_checkpoints(lambda cantidad: hashes[6 - cantidad:6], 6, ruta, intervalo=3)
+            indice.cerrar()
+            self.assertEqual([c['bloque'] for c in leer_checkpoints(ruta)], [2, 5])
+
+            with open(ruta, 'w', encoding='utf-8') as f:
+                f.write('{"inicio": 0, "bloq\n{"inicio": 3, "bloque": 5}\n')
+            with self.assertRaises(ValueError):
+                leer_checkpoints(ruta)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import unittest, os, json, tempfile
+from unittest.mock import patch
+import numpy as np
+from src.columnar import exportar_columnas, cargar_columnas, fila_bloque, COLUMNAS_BASE, METADATOS
+from src.almacenamiento import AlmacenJSONL
+from src.blockchain import crear_bloque
+
+def ronda(i, senales=False):
+    timestamp = f'2025-08-05T12:00:{i:02d}'
+    datos = [
+        {'tipo': 'frecuencia', 'timestamp': timestamp, 'media': 100.0 + i, 'desv': 1.5},
+        {'tipo': 'presion', 'timestamp': timestamp, 'media': [120.0, 80.0], 'desv': 0 if i == 0 else [2.0, 1.0]},
+        {'tipo': 'oxigeno', 'timestamp': timestamp, 'media': 95.0, 'desv': None},
+    ]
+    if senales:
+        datos.append({'tipo': 'variabilidad', 'timestamp': timestamp, 'rmssd': 10.0 * i, 'sdnn': 5.0})
+    return datos
+
+class TestColumnar(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.cadena = os.path.join(self.dir.name, 'cadena.jsonl')
+        self.destino = os.path.join(self.dir.name, 'cadena.columnas')
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def guardar(self, rondas):
+        almacen = AlmacenJSONL(self.cadena)
+        prev_hash = '0' * 64
+        bloques = []
+        for i, datos in enumerate(rondas):
+            bloque = crear_bloque(datos, i == 1, prev_hash)
+            prev_hash = bloque.get('hash')
+            almacen.agregar(bloque)
+            bloques.append(bloque)
+        almacen.cerrar()
+        return bloques
+
+    def test_fila_bloque(self):
+        fila = fila_bloque(crear_bloque(ronda(0, senales=True), False, '0' * 64))
+
+        self.assertEqual(set(fila), set(COLUMNAS_BASE) | {'variabilidad.rmssd', 'variabilidad.sdnn'})
+        self.assertEqual(fila.get('diastolica.media'), 80.0)
+        self.assertEqual((fila.get('sistolica.desv'), fila.get('diastolica.desv')), (0.0, 0.0))
+        self.assertTrue(np.isnan(fila.get('oxigeno.desv')))
+
+    def test_exportar_y_cargar_mapeado_en_memoria(self):
+        # Las métricas de señales aparecen desde el tercer bloque
+        bloques = self.guardar([ronda(i, senales=i >= 2) for i in range(4)])
+        metadatos = exportar_columnas(self.cadena, self.destino)
+        _, columnas = cargar_columnas(self.destino)
+
+        self.assertEqual((metadatos.get('bloques'), metadatos.get('validos'), metadatos.get('primer_invalido')), (4, 4, None))
+        self.assertEqual(metadatos.get('ultimo_hash'), bloques[-1]['hash'])
+        self.assertIsInstance(columnas.get('frecuencia.media'), np.memmap)
+        np.testing.assert_array_equal(columnas.get('frecuencia.media'), [100.0, 101.0, 102.0, 103.0])
+        np.testing.assert_array_equal(columnas.get('alerta'), [False, True, False, False])
+        np.testing.assert_array_equal(columnas.get('variabilidad.rmssd'), [np.nan, np.nan, 20.0, 30.0])
+        self.assertEqual(str(columnas.get('timestamp').view('datetime64[s]')[3]), '2025-08-05T12:00:03')
+
+    def test_exportar_solo_bloques_validos(self):
+        self.guardar([ronda(i) for i in range(5)])
+        with open(self.cadena) as f:
+            lineas = f.readlines()
+        lineas[2] = lineas[2].replace('"media":102.0', '"media":900.0')
+        with open(self.cadena, 'w') as f:
+            f.writelines(lineas)
+
+        metadatos = exportar_columnas(self.cadena, self.destino)
+        _, columnas = cargar_columnas(self.destino, ['frecuencia.media'])
+
+        self.assertEqual((metadatos.get('validos'), metadatos.get('invalidos'), metadatos.get('primer_invalido')), (2, 3, 2))
+        self.assertEqual(set(columnas), {'timestamp', 'alerta', 'frecuencia.media'})
+        self.assertEqual(len(columnas.get('frecuencia.media')), 2)
+
+    def test_cadena_vacia(self):
+        self.guardar([])
+        exportar_columnas(self.cadena, self.destino)
+        metadatos, columnas = cargar_columnas(self.destino)
+
+        self.assertEqual(metadatos.get('validos'), 0)
+        self.assertEqual(len(columnas.get('oxigeno.media')), 0)
+
+    def test_reexportar_reemplaza_el_directorio(self):
+        self.guardar([ronda(i, senales=True) for i in range(3)])
+        exportar_columnas(self.cadena, self.destino)
+        self.guardar([ronda(i) for i in range(2)])
+
+        # Un corte antes de terminar deja la exportación anterior intacta
+        with patch('src.columnar.json.dump', side_effect=OSError):
+            with self.assertRaises(OSError):
+                exportar_columnas(self.cadena, self.destino)
+        self.assertEqual(cargar_columnas(self.destino)[0].get('validos'), 3)
+
+        metadatos = exportar_columnas(self.cadena, self.destino)
+        archivos = sorted(os.listdir(self.destino))
+        self.assertEqual(archivos, sorted([METADATOS, 'timestamp.npy', 'alerta.npy'] + [f'{c}.npy' for c in metadatos.get('columnas')]))
+        self.assertNotIn('variabilidad.rmssd.npy', archivos)
+        self.assertEqual(sorted(os.listdir(self.dir.name)), ['cadena.columnas', 'cadena.jsonl', 'cadena.jsonl.idx'])
+
+    def test_formato_desconocido(self):
+        self.guardar([ronda(0)])
+        exportar_columnas(self.cadena, self.destino)
+        with open(os.path.join(self.destino, METADATOS), 'w') as f:
+            json.dump({'formato': 99}, f)
+
+        with self.assertRaises(ValueError):
+            cargar_columnas(self.destino)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import unittest, os, tempfile
+from src.consultas import IndiceOffsets, CadenaIndexada, ruta_offsets, epoch
+from src.almacenamiento import AlmacenJSON, AlmacenJSONL, leer_json, exportar_json
+from src.blockchain import crear_bloque
+
+def ronda(i):
+    # Un bloque cada 10 segundos
+    timestamp = f'2025-08-05T12:{i // 6:02d}:{i % 6 * 10:02d}'
+    return [
+        {'tipo': 'frecuencia', 'timestamp': timestamp, 'media': 100.0 + i, 'desv': 1.5},
+        {'tipo': 'presion', 'timestamp': timestamp, 'media': [120.0, 80.0], 'desv': [2.0, 1.0]},
+        {'tipo': 'oxigeno', 'timestamp': timestamp, 'media': 95.0, 'desv': 0.5},
+    ]
+
+class TestConsultas(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def guardar(self, almacen, desde, hasta, prev_hash='0' * 64):
+        bloques = []
+        for i in range(desde, hasta):
+            bloque = crear_bloque(ronda(i), False, prev_hash)
+            prev_hash = bloque.get('hash')
+            almacen.agregar(bloque)
+            bloques.append(bloque)
+        almacen.cerrar()
+        return bloques
+
+    def test_offsets_jsonl(self):
+        ruta = os.path.join(self.dir.name, 'cadena.jsonl')
+        bloques = self.guardar(AlmacenJSONL(ruta, offsets=True), 0, 20)
+
+        with CadenaIndexada(ruta) as cadena:
+            self.assertEqual(len(cadena), 20)
+            self.assertEqual([cadena.bloque(i) for i in (0, 7, 19)], [bloques[0], bloques[7], bloques[19]])
+            with self.assertRaises(IndexError):
+                cadena.bloque(20)
+
+    def test_offsets_json(self):
+        ruta = os.path.join(self.dir.name, 'cadena.json')
+        bloques = self.guardar(AlmacenJSON(ruta, offsets=True), 0, 5)
+
+        with CadenaIndexada(ruta) as cadena:
+            self.assertEqual(list(cadena.bloques()), bloques)
+        self.assertEqual(list(leer_json(ruta)), bloques)
+
+    def test_exportar_json_con_offsets(self):
+        origen = os.path.join(self.dir.name, 'cadena.jsonl')
+        destino = os.path.join(self.dir.name, 'cadena.json')
+        bloques = self.guardar(AlmacenJSONL(origen), 0, 4)
+        self.guardar(AlmacenJSON(destino, offsets=True), 0, 6)
+
+        exportar_json(origen, destino, offsets=True)
+        with CadenaIndexada(destino) as cadena:
+            self.assertEqual(list(cadena.bloques()), bloques)
+        # Sin offsets, el índice viejo no puede quedar apuntando a otra cadena
+        exportar_json(origen, destino)
+        self.assertFalse(os.path.exists(ruta_offsets(destino)))
+
+    def test_buscar_y_rango(self):
+        ruta = os.path.join(self.dir.name, 'cadena.jsonl')
+        self.guardar(AlmacenJSONL(ruta, offsets=True), 0, 12)
+
+        with CadenaIndexada(ruta) as cadena:
+            self.assertEqual(cadena.buscar('2025-08-05T12:00:35'), 3)
+            self.assertEqual(cadena.buscar('2025-08-05T12:00:30'), 3)
+            self.assertEqual(cadena.buscar('2025-08-05T11:59:59'), -1)
+            self.assertEqual(cadena.rango('2025-08-05T12:00:15', '2025-08-05T12:01:00'), (2, 7))
+            self.assertEqual(cadena.rango(hasta='2025-08-05T12:00:00'), (0, 1))
+            self.assertEqual(cadena.rango('2025-08-05T13:00:00'), (12, 12))
+            self.assertEqual([b['datos']['frecuencia']['media'] for b in cadena.bloques(*cadena.rango('2025-08-05T12:01:40'))], [110.0, 111.0])
+
+    def test_reanudar_completa_el_indice(self):
+        ruta = os.path.join(self.dir.name, 'cadena.jsonl')
+        bloques = self.guardar(AlmacenJSONL(ruta, offsets=True), 0, 4)
+        # Los bloques 4 a 6 se escribieron sin índice
+        bloques += self.guardar(AlmacenJSONL(ruta, continuar=True), 4, 7, bloques[-1]['hash'])
+        bloques += self.guardar(AlmacenJSONL(ruta, continuar=True, offsets=True), 7, 9, bloques[-1]['hash'])
+
+        with CadenaIndexada(ruta) as cadena:
+            self.assertEqual(list(cadena.bloques()), bloques)
+
+    def test_cadena_nueva_borra_indice_anterior(self):
+        ruta = os.path.join(self.dir.name, 'cadena.jsonl')
+        self.guardar(AlmacenJSONL(ruta, offsets=True), 0, 3)
+        self.guardar(AlmacenJSONL(ruta), 0, 2)
+
+        self.assertFalse(os.path.exists(ruta_offsets(ruta)))
+
+    def test_indice_vacio(self):
+        ruta = os.path.join(self.dir.name, 'cadena.jsonl')
+        self.guardar(AlmacenJSONL(ruta, offsets=True), 0, 0)
+
+        with CadenaIndexada(ruta) as cadena:
+            self.assertEqual(len(cadena), 0)
+            self.assertEqual(cadena.buscar('2025-08-05T12:00:00'), -1)
+            self.assertEqual(list(cadena.bloques()), [])
+
+    def test_indice_se_recorta_al_continuar(self):
+        ruta = os.path.join(self.dir.name, 'cadena.jsonl')
+        indice = IndiceOffsets(ruta)
+        for i in range(3):
+            indice.agregar(i * 10, 9, '2025-08-05T12:00:00')
+        indice.cerrar()
+
+        indice = IndiceOffsets(ruta, bloques=2)
+        self.assertEqual((indice.cantidad, indice.ultimo()), (2, (10, 9)))
+        indice.cerrar()
+        self.assertEqual(epoch('1970-01-01T00:01:00'), 60)
+
+if __name__ == '__main__':
+    unittest.main()
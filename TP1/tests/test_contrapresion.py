@@ -0,0 +1,82 @@
+import unittest, queue, threading
+from multiprocessing import Pipe
+from src.contrapresion import Contrapresion
+from src.generador import generar
+from src.analizador import analizar
+from src.verificador import ReordenadorRondas, leer_rondas
+
+class TestContrapresion(unittest.TestCase):
+    def test_bloquear_limita_los_mensajes_sin_leer(self):
+        contrapresion = Contrapresion(lectores=2, capacidad=2)
+
+        self.assertEqual(contrapresion.agregar(['a']), [['a']])
+        self.assertEqual(contrapresion.agregar(['b']), [['b']])
+        self.assertFalse(contrapresion.reservar(bloquear=False))
+        # Un lector que lee no alcanza: falta lugar en el otro y no se toma ningún crédito
+        contrapresion.entrada(0).release()
+        self.assertFalse(contrapresion.reservar(bloquear=False))
+        contrapresion.entrada(1).release()
+        self.assertTrue(contrapresion.reservar(bloquear=False))
+        self.assertFalse(contrapresion.fin_explicito)
+
+    def test_descartar_el_mas_viejo(self):
+        contrapresion = Contrapresion(lectores=1, politica='descartar', capacidad=2)
+
+        enviados = [m for dato in 'abcdef' for m in contrapresion.agregar([dato])]
+        # 'a' y 'b' entran en el pipe; quedan pendientes los dos últimos
+        self.assertEqual(enviados, [['a'], ['b']])
+        self.assertEqual(contrapresion.descartados, 2)
+        contrapresion.entrada(0).release()
+        contrapresion.entrada(0).release()
+        self.assertEqual(list(contrapresion.vaciar()), [['e'], ['f']])
+        self.assertEqual((contrapresion.mensajes, contrapresion.coalescidos), (4, 0))
+
+    def test_coalescer_los_pendientes(self):
+        contrapresion = Contrapresion(lectores=1, politica='coalescer', capacidad=3)
+
+        enviados = [m for dato in 'abcde' for m in contrapresion.agregar([dato])]
+        self.assertEqual(enviados, [['a'], ['b'], ['c']])
+        contrapresion.entrada(0).release()
+        # Con el buffer lleno ('d', 'e' y 'f') se espera lugar en lugar de descartar
+        self.assertEqual(contrapresion.agregar(['f']), [['d', 'e', 'f']])
+        self.assertEqual(list(contrapresion.vaciar()), [])
+        self.assertEqual((contrapresion.coalescidos, contrapresion.descartados, contrapresion.mensajes), (2, 0, 4))
+
+    def test_politica_invalida(self):
+        with self.assertRaises(ValueError):
+            Contrapresion(politica='descartar')
+        with self.assertRaises(ValueError):
+            Contrapresion(politica='otra', capacidad=1)
+
+    def correr(self, politica, binario):
+        # Generador y un analizador lento en hilos, con la cola del verificador en memoria
+        lectura, escritura = Pipe(duplex=False)
+        resultados = queue.Queue()
+        contrapresion = Contrapresion(lectores=1, politica=politica, capacidad=2)
+        analizador = threading.Thread(target=analizar, kwargs=dict(
+            pipe_to_read=lectura, queue=resultados, tipo='frecuencia', n=None, ventana_size=30,
+            binario=binario, costo='fijo:0.005', entrada=contrapresion.entrada(0), datos_por_mensaje=2
+        ))
+        analizador.start()
+        generar(30, [escritura], binario=binario, tasa=0, contrapresion=contrapresion)
+        rondas = list(leer_rondas(resultados, None, ReordenadorRondas(total=1)))
+        analizador.join()
+        return contrapresion, rondas
+
+    def test_descartar_en_el_pipeline(self):
+        contrapresion, rondas = self.correr('descartar', binario=False)
+
+        self.assertGreater(contrapresion.descartados, 0)
+        self.assertEqual(len(rondas), contrapresion.mensajes)
+        self.assertEqual(len(rondas) + contrapresion.descartados, 30)
+        self.assertEqual([ronda[0].get('secuencia') for ronda in rondas], list(range(len(rondas))))
+
+    def test_coalescer_en_el_pipeline(self):
+        contrapresion, rondas = self.correr('coalescer', binario=True)
+
+        self.assertGreater(contrapresion.coalescidos, 0)
+        self.assertEqual(len(rondas), contrapresion.mensajes)
+        self.assertEqual(len(rondas) + contrapresion.coalescidos, 30)
+
+if __name__ == '__main__':
+    unittest.main()
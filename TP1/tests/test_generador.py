@@ -1,6 +1,7 @@
 import unittest, json
 from unittest.mock import patch, MagicMock, call
 from src.generador import generar_dato, generar
+from src.protocolo import codificar, decodificar
 
 class TestGenerador(unittest.TestCase):
     @patch('random.randint')
@@ -87,6 +88,60 @@ class TestGenerador(unittest.TestCase):
        pipe5.send.assert_has_calls([call('dato_en_formato_json'), call('dato_en_formato_json')])
        pipe6.send.assert_has_calls([call('dato_en_formato_json'), call('dato_en_formato_json')])
 
+    @patch('builtins.print')
+    @patch('src.generador.time.sleep')
+    @patch('src.generador.generar_registro')
+    @patch('src.generador.getpid')
+    def test_generar_binario(self, mock_getpid, mock_generar_registro, mock_sleep, mock_print):
+       mock_getpid.return_value = 5
+       mock_generar_registro.return_value = (1754362800, 90, 125, 70, 98)
+
+       pipe1 = MagicMock()
+       pipe2 = MagicMock()
+
+       generar(n=2,pipes=[pipe1,pipe2],verbose=False,binario=True)
+
+       payload = codificar((1754362800, 90, 125, 70, 98))
+       self.assertEqual(len(payload), 16)
+       pipe1.send_bytes.assert_has_calls([call(payload), call(payload)])
+       pipe2.send_bytes.assert_has_calls([call(payload), call(payload)])
+       pipe1.send.assert_not_called()
+       self.assertEqual(decodificar(payload), (1754362800, 90, 125, 70, 98))
+
+    @patch('builtins.print')
+    @patch('src.generador.time.sleep')
+    @patch('src.generador.generar_dato')
+    @patch('src.generador.getpid')
+    def test_generar_en_lotes_sin_espera(self, mock_getpid, mock_generar_dato, mock_sleep, mock_print):
+       mock_getpid.return_value = 5
+       mock_generar_dato.return_value = '{"frecuencia": 90}'
+
+       pipe = MagicMock()
+       generar(n=5,pipes=[pipe],verbose=False,tasa=0,lote=2)
+
+       self.assertEqual(mock_generar_dato.call_count, 5)
+       mock_sleep.assert_not_called()
+       # 5 datos en lotes de 2: dos lotes completos y uno de un solo dato
+       enviados = [json.loads(c.args[0]) for c in pipe.send.call_args_list]
+       self.assertEqual([len(lote) for lote in enviados], [2, 2, 1])
+
+    @patch('builtins.print')
+    @patch('src.generador.time.sleep')
+    @patch('src.generador.generar_registro')
+    @patch('src.generador.getpid')
+    def test_generar_binario_en_lotes(self, mock_getpid, mock_generar_registro, mock_sleep, mock_print):
+       mock_getpid.return_value = 5
+       mock_generar_registro.return_value = (1754362800, 90, 125, 70, 98)
+
+       pipe = MagicMock()
+       generar(n=3,pipes=[pipe],verbose=False,binario=True,tasa=0,lote=3)
+
+       pipe.send_bytes.assert_called_once_with(codificar((1754362800, 90, 125, 70, 98)) * 3)
+
+    def test_llamar_generar_con_lote_invalido(self):
+        with self.assertRaises(ValueError):
+            generar(n=1,pipes=[MagicMock()],lote=0)
+
     def test_llamar_generar_con_datos_invalidos(self):
         with self.assertRaises(ValueError):
             generar(n=-1,pipes=[])
@@ -0,0 +1,105 @@
+import unittest, queue
+from multiprocessing import Process, Queue
+from src.memoria_compartida import AnilloCompartido, ResultadosCompartidos
+from src.protocolo import REGISTRO, codificar, decodificar, nuevo_buffer
+
+def leer_en_proceso(lector, cantidad, esperado):
+    buffer = nuevo_buffer()
+    for i in range(cantidad):
+        lector.recv_bytes_into(buffer)
+        if decodificar(buffer) != esperado[i]:
+            raise SystemExit(1)
+
+def resultado(tipo, secuencia):
+    return {'tipo': tipo, 'timestamp': '2025-08-05T12:00:00', 'media': 100.0 + secuencia, 'desv': 1.5, 'secuencia': secuencia}
+
+def enviar_en_proceso(resultados, cola, cantidad):
+    for secuencia in range(cantidad):
+        resultados.enviar(cola, [resultado('frecuencia', secuencia)])
+
+class TestAnilloCompartido(unittest.TestCase):
+    def setUp(self):
+        self.anillo = AnilloCompartido(lectores=2, capacidad=4)
+
+    def tearDown(self):
+        self.anillo.liberar()
+
+    def test_todos_los_lectores_reciben_cada_registro(self):
+        escritor = self.anillo.escritor()
+        lectores = [self.anillo.lector(0), self.anillo.lector(1)]
+        registros = [(1754362800 + i, 60 + i, 120, 80, 95) for i in range(3)]
+        for registro in registros:
+            escritor.send_bytes(codificar(registro))
+
+        buffer = nuevo_buffer()
+        for lector in lectores:
+            for registro in registros:
+                self.assertEqual(lector.recv_bytes_into(buffer), REGISTRO.size)
+                self.assertEqual(decodificar(buffer), registro)
+
+    def test_lectura_de_varios_registros_en_un_buffer(self):
+        escritor = self.anillo.escritor()
+        lector = self.anillo.lector(0)
+        escritor.send_bytes(codificar((1, 60, 120, 80, 95)) + codificar((2, 61, 121, 81, 96)))
+
+        buffer = bytearray(REGISTRO.size * 4)
+        self.assertEqual(lector.recv_bytes_into(buffer), REGISTRO.size * 2)
+        self.assertEqual(decodificar(buffer, REGISTRO.size), (2, 61, 121, 81, 96))
+
+    def test_da_la_vuelta_con_lectores_en_otros_procesos(self):
+        # Se escriben más registros que la capacidad: el escritor espera a que ambos lectores liberen
+        registros = [(i, 60 + i % 100, 120, 80, 95) for i in range(20)]
+        procesos = [Process(target=leer_en_proceso, args=(self.anillo.lector(i), len(registros), registros)) for i in range(2)]
+        for p in procesos:
+            p.start()
+        escritor = self.anillo.escritor()
+        for registro in registros:
+            escritor.send_bytes(codificar(registro))
+        for p in procesos:
+            p.join(timeout=10)
+            self.assertEqual(p.exitcode, 0)
+
+    def test_lector_invalido(self):
+        with self.assertRaises(ValueError):
+            self.anillo.lector(2)
+
+class TestResultadosCompartidos(unittest.TestCase):
+    def setUp(self):
+        self.resultados = ResultadosCompartidos(('frecuencia', 'presion', 'oxigeno', 'espectro'), capacidad=4)
+
+    def tearDown(self):
+        self.resultados.liberar()
+
+    def test_devuelve_los_mismos_resultados(self):
+        cola = queue.Queue()
+        enviados = [
+            {'tipo': 'presion', 'timestamp': '2025-08-05T12:00:00', 'media': [120.5, 80.0], 'desv': 0, 'secuencia': 0},
+            {'tipo': 'presion', 'timestamp': '2025-08-05T12:00:01', 'media': [121.0, 81.25], 'desv': [0.5, 1.25], 'secuencia': 1},
+        ]
+        self.resultados.enviar(cola, enviados)
+        espectro = {'tipo': 'espectro', 'timestamp': '2025-08-05T12:00:00', 'vlf': 1.0, 'lf': 2.5, 'hf': 0.5, 'lf_hf': 5.0, 'secuencia': 0}
+        self.resultados.enviar(cola, [espectro])
+        self.resultados.enviar(cola, [dict(resultado('oxigeno', 0), desv=None)])
+
+        # Por la cola solo van los avisos
+        self.assertEqual(cola.get(), (1, 0, 2))
+        self.assertEqual(self.resultados.leer((1, 0, 2)), enviados)
+        leido = self.resultados.leer(cola.get())
+        self.assertEqual(leido, [espectro])
+        self.assertEqual(list(leido[0]), list(espectro))
+        self.assertIsNone(self.resultados.leer(cola.get())[0].get('desv'))
+        self.assertIsNone(self.resultados.leer(None))
+
+    def test_espera_casillas_libres_en_otro_proceso(self):
+        # Más resultados que la capacidad: el analizador espera a que el verificador lea
+        cola = Queue()
+        proceso = Process(target=enviar_en_proceso, args=(self.resultados, cola, 20))
+        proceso.start()
+        leidos = [r for _ in range(20) for r in self.resultados.leer(cola.get(timeout=10))]
+        proceso.join(timeout=10)
+
+        self.assertEqual(proceso.exitcode, 0)
+        self.assertEqual(leidos, [resultado('frecuencia', i) for i in range(20)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+import unittest, pickle
+import numpy as np
+from multiprocessing import Process
+from unittest.mock import patch
+from src.metricas import Metricas, bucket, limite_bucket, percentiles, formatear_reporte, BUCKETS
+
+def anotar_en_otro_proceso(metricas):
+    metricas.enviado(0)
+
+class TestMetricas(unittest.TestCase):
+    def setUp(self):
+        self.metricas = Metricas(analizadores=2, capacidad=8)
+
+    def tearDown(self):
+        self.metricas.liberar()
+
+    def test_buckets(self):
+        self.assertEqual(bucket(0), 0)
+        self.assertEqual(bucket(3600 * 24), BUCKETS - 1)
+        for segundos in (0.00005, 0.0012, 0.25, 3.0):
+            with self.subTest(segundos=segundos):
+                b = bucket(segundos)
+                self.assertLess(segundos, limite_bucket(b))
+                self.assertGreaterEqual(segundos, limite_bucket(b - 1))
+
+    def test_percentiles(self):
+        histograma = np.zeros(10, dtype=np.uint64)
+        histograma[2] = 90
+        histograma[7] = 10
+        limites = np.arange(10, dtype=np.float64)
+
+        self.assertEqual(percentiles(histograma, limites), [2.0, 7.0, 7.0])
+        self.assertEqual(percentiles(np.zeros(10, dtype=np.uint64), limites), [None, None, None])
+
+    @patch('src.metricas.monotonic')
+    def test_latencias_por_etapa(self, mock_monotonic):
+        # envío 0.0, analizador 0 toma 0.1 y procesa 0.3, analizador 1 toma 0.2 y procesa 0.5, bloque 0.6
+        mock_monotonic.side_effect = [100.0, 100.1, 100.3, 100.2, 100.5, 100.6]
+        self.metricas.enviado(0)
+        self.metricas.recibido(0, 0)
+        self.metricas.procesado(0, 0)
+        self.metricas.recibido(1, 0)
+        self.metricas.procesado(1, 0)
+        self.metricas.bloque(0, en_cola=3)
+
+        reporte = self.metricas.reporte()
+        latencias = reporte.get('latencias')
+        self.assertEqual(reporte.get('bloques'), 1)
+        self.assertEqual(latencias['transporte']['cantidad'], 2)
+        self.assertEqual(latencias['transporte']['p99'], limite_bucket(bucket(0.2)))
+        self.assertEqual(latencias['analisis']['p50'], limite_bucket(bucket(0.2)))
+        self.assertEqual(latencias['cola']['p50'], limite_bucket(bucket(0.1)))
+        self.assertEqual(latencias['total']['p50'], limite_bucket(bucket(0.6)))
+        self.assertEqual(reporte['profundidades']['cola']['p50'], 3)
+        self.assertIn('total', formatear_reporte(reporte))
+
+    @patch('src.metricas.monotonic')
+    def test_mediciones_de_datos_que_salieron_del_anillo(self, mock_monotonic):
+        # El generador se adelanta 9 datos con capacidad 8: la posición del dato 0 ya es del dato 8
+        mock_monotonic.side_effect = [float(i) for i in range(9)] + [20.0, 21.0, 23.0]
+        for secuencia in range(9):
+            self.metricas.enviado(secuencia)
+        self.metricas.recibido(0, 0)
+        self.metricas.bloque(0)
+        self.metricas.recibido(0, 8)
+
+        reporte = self.metricas.reporte()
+        latencias = reporte.get('latencias')
+        self.assertEqual(reporte.get('descartadas'), 2)
+        self.assertEqual((latencias['transporte']['cantidad'], latencias['total']['cantidad']), (1, 0))
+        self.assertEqual(latencias['transporte']['p50'], limite_bucket(bucket(15.0)))
+        self.assertIn('2 mediciones descartadas', formatear_reporte(reporte))
+
+    @patch('src.metricas.monotonic')
+    def test_anillo_que_da_la_vuelta(self, mock_monotonic):
+        metricas = Metricas(analizadores=1, capacidad=2)
+        self.addCleanup(metricas.liberar)
+        # El dato 0 se procesa a tiempo; el 1 se recibe cuando el generador ya escribió el 3 en su posición
+        mock_monotonic.side_effect = [0.0, 0.001, 0.002, 0.003, 1.0, 2.0, 2.5, 2.51, 2.52, 2.6]
+        metricas.enviado(0)
+        metricas.recibido(0, 0)
+        metricas.procesado(0, 0)
+        metricas.bloque(0)
+        metricas.enviado(1)
+        metricas.enviado(2)
+        metricas.enviado(3)
+        metricas.recibido(0, 1)
+        metricas.procesado(0, 1)
+        metricas.bloque(1)
+
+        reporte = metricas.reporte()
+        latencias = reporte.get('latencias')
+        # Solo quedan las mediciones del dato 0: ninguna usa instantes de otro dato
+        self.assertEqual([latencias[etapa]['cantidad'] for etapa in ('transporte', 'analisis', 'cola', 'total')], [1, 1, 1, 1])
+        self.assertEqual(latencias['analisis']['p99'], limite_bucket(bucket(0.001)))
+        self.assertEqual(reporte.get('descartadas'), 3)
+
+    def test_analizadores_que_no_corren(self):
+        # Con lugar para dos analizadores pero uno solo corriendo, el bloque se mide igual
+        self.metricas.enviado(0)
+        self.metricas.recibido(0, 0)
+        self.metricas.procesado(0, 0)
+        self.metricas.bloque(0)
+
+        reporte = self.metricas.reporte()
+        self.assertEqual(reporte['latencias']['total']['cantidad'], 1)
+        self.assertEqual(reporte.get('descartadas'), 0)
+
+    def test_reporte_vacio(self):
+        reporte = self.metricas.reporte()
+
+        self.assertEqual(reporte.get('bloques'), 0)
+        self.assertIsNone(reporte.get('bloques_por_segundo'))
+        self.assertIsNone(reporte['latencias']['total']['p50'])
+        formatear_reporte(reporte)
+
+    def test_compartido_entre_procesos(self):
+        proceso = Process(target=anotar_en_otro_proceso, args=(self.metricas,))
+        proceso.start()
+        proceso.join()
+
+        self.assertEqual(self.metricas.contadores[0], 1)
+        copia = pickle.loads(pickle.dumps(self.metricas))
+        copia.enviado(1)
+        self.assertEqual(self.metricas.contadores[0], 2)
+
+if __name__ == '__main__':
+    unittest.main()
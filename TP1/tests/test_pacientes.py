@@ -0,0 +1,97 @@
+import unittest, tempfile, json, pickle
+from multiprocessing import Process, Pipe, Queue, Array
+from unittest.mock import patch
+from src.pacientes import EstadoPaciente, trabajar, supervisar, elegir_trabajador, elegir_migracion, ruta_cadena
+from src.almacenamiento import leer_jsonl
+from src.blockchain import calcular_hash
+from src.generador import generar_dato
+
+def cadena_valida(bloques):
+    prev_hash = '0' * 64
+    for bloque in bloques:
+        if bloque.get('prev_hash') != prev_hash or calcular_hash(bloque) != bloque.get('hash'):
+            return False
+        prev_hash = bloque.get('hash')
+    return True
+
+def muestra(i):
+    # Datos fijos: con datos aleatorios la media incremental puede diferir de sum/len en el último dígito
+    frecuencias = [72, 95, 130, 61, 148, 87, 110, 123, 66, 171]
+    return {'paciente': 3, 'timestamp': f'2025-08-05T12:00:{i:02d}', 'frecuencia': frecuencias[i], 'presion': [120 + i, 80 - i], 'oxigeno': 95 + i % 5}
+
+class TestPacientes(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_generar_dato_con_paciente(self):
+        self.assertEqual(json.loads(generar_dato(7)).get('paciente'), 7)
+        self.assertNotIn('paciente', json.loads(generar_dato()))
+
+    def test_estado_paciente_sigue_la_cadena_en_otro_proceso(self):
+        estado = EstadoPaciente(3, self.dir.name, ventana_size=4)
+        datos = [muestra(i) for i in range(10)]
+        for dato in datos[:6]:
+            estado.procesar(dato)
+
+        # Se simula el paso a otro trabajador
+        estado = pickle.loads(pickle.dumps(estado.suspender())).reanudar()
+        for dato in datos[6:]:
+            estado.procesar(dato)
+        estado.suspender()
+
+        bloques = list(leer_jsonl(ruta_cadena(self.dir.name, 3)))
+        self.assertEqual(len(bloques), 10)
+        self.assertTrue(cadena_valida(bloques))
+        frecuencias = [dato.get('frecuencia') for dato in datos[6:]]
+        self.assertEqual(bloques[-1]['datos']['frecuencia']['media'], sum(frecuencias) / 4)
+
+    def test_elegir_trabajador(self):
+        self.assertEqual(elegir_trabajador([0.0, 0.0, 0.0], [[1, 2], [3], [4, 5]]), 1)
+        self.assertEqual(elegir_trabajador([2.0, 0.5, 1.0], [[1], [2, 3, 4], []]), 1)
+
+    def test_elegir_migracion(self):
+        self.assertEqual(elegir_migracion([3.0, 1.0], [[0, 2], [1]]), (2, 0, 1))
+        self.assertIsNone(elegir_migracion([1.2, 1.0], [[0, 2], [1]])) # Diferencia chica
+        self.assertIsNone(elegir_migracion([3.0, 1.0], [[0], [1, 2]])) # El más cargado tiene un solo paciente
+
+    def correr(self, pacientes, n, workers, rebalanceo=0):
+        respuestas = Queue()
+        cpu = Array('d', workers)
+        pipes = [Pipe(duplex=False) for _ in range(workers)]
+        procesos = [Process(target=trabajar, args=(pipes[i][0], respuestas, i, cpu, self.dir.name, 5)) for i in range(workers)]
+        for p in procesos:
+            p.start()
+        bloques = supervisar([p[1] for p in pipes], respuestas, cpu, pacientes, n, tasa=0, rebalanceo=rebalanceo)
+        for p in procesos:
+            p.join()
+        return bloques
+
+    @patch('builtins.print')
+    def test_supervisar(self, mock_print):
+        bloques = self.correr(pacientes=5, n=8, workers=2)
+
+        self.assertEqual(bloques, {paciente: 8 for paciente in range(5)})
+        for paciente in range(5):
+            self.assertTrue(cadena_valida(list(leer_jsonl(ruta_cadena(self.dir.name, paciente)))))
+
+    @patch('builtins.print')
+    @patch('src.pacientes.elegir_migracion')
+    def test_supervisar_con_migraciones(self, mock_migracion, mock_print):
+        # Cada revisión mueve un paciente del trabajador 0 al 1 mientras le quede más de uno
+        def migrar(cargas, asignados):
+            return (asignados[0][-1], 0, 1) if len(asignados[0]) > 1 else None
+        mock_migracion.side_effect = migrar
+
+        with patch('src.pacientes.time.monotonic', side_effect=range(10**6)):
+            bloques = self.correr(pacientes=4, n=6, workers=2, rebalanceo=1)
+
+        self.assertGreater(mock_migracion.call_count, 0)
+        self.assertEqual(bloques, {paciente: 6 for paciente in range(4)})
+        for paciente in range(4):
+            self.assertTrue(cadena_valida(list(leer_jsonl(ruta_cadena(self.dir.name, paciente)))))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest, json
+from multiprocessing import Pipe, Queue
+from unittest.mock import patch
+from src.pool import coordinar
+from src.analizador import calcular
+from src.generador import generar_dato
+from src.ventana import VentanaCircular
+
+class TestPool(unittest.TestCase):
+    def resultados(self, datos, **kwargs):
+        lectura, escritura = Pipe(duplex=False)
+        q = Queue()
+        for dato in datos:
+            escritura.send(dato)
+        with patch('builtins.print'):
+            coordinar(lectura, q, n=len(datos), costo='ninguno', **kwargs)
+        mensajes = []
+        while sum(len(m) for m in mensajes) < len(datos) * len(kwargs.get('tipos', 'xyz')):
+            mensajes.append(json.loads(q.get(timeout=10)))
+        return mensajes
+
+    def test_coordinar_igual_que_analizadores_dedicados(self):
+        datos = [generar_dato() for _ in range(12)]
+        tipos = ('frecuencia', 'presion', 'oxigeno', 'tendencia')
+        mensajes = self.resultados(datos, tipos=tipos, workers=2, ventana_size=5, profundidad=2)
+        resultados = [resultado for mensaje in mensajes for resultado in mensaje]
+
+        # Un mensaje por ronda, en orden, con un resultado por tipo
+        self.assertEqual(len(mensajes), 12)
+        self.assertEqual([r.get('secuencia') for r in resultados], [i // 4 for i in range(48)])
+        ventana = VentanaCircular(5)
+        for secuencia, dato in enumerate(datos):
+            ventana.agregar_dato(json.loads(dato))
+            for tipo, resultado in zip(tipos, resultados[4 * secuencia:4 * secuencia + 4]):
+                esperado = calcular(tipo, ventana)
+                self.assertEqual(resultado.get('tipo'), tipo)
+                self.assertEqual(resultado.get('timestamp'), esperado.get('timestamp'))
+                self.assertEqual(json.dumps(resultado.get('media')), json.dumps(esperado.get('media')))
+
+    def test_coordinar_en_lotes(self):
+        datos = [generar_dato() for _ in range(5)]
+        mensajes = self.resultados(datos, workers=1, lote=2, profundidad=0)
+
+        self.assertEqual([len(m) for m in mensajes], [6, 6, 3])
+
+    def test_coordinar_parametros_invalidos(self):
+        lectura, _ = Pipe(duplex=False)
+        for kwargs in ({'workers': 0}, {'profundidad': -1}, {'tipos': ('frecuencia', 'otro')}):
+            with self.subTest(**kwargs):
+                with self.assertRaises(ValueError):
+                    coordinar(lectura, Queue(), n=1, **kwargs)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+import numpy as np
+from src.senales import variabilidad, tendencia, espectro, intervalos_rr, BANDAS, SENALES, METRICAS
+
+def registros(frecuencias, segundos=1.0):
+    # Registros de ventana (timestamp, frecuencia, sistólica, diastólica, oxígeno) cada `segundos`
+    n = len(frecuencias)
+    return np.column_stack((
+        np.arange(n) * segundos,
+        frecuencias,
+        np.full(n, 120.0),
+        np.full(n, 80.0),
+        np.full(n, 95.0),
+    ))
+
+class TestSenales(unittest.TestCase):
+    def test_intervalos_rr(self):
+        np.testing.assert_allclose(intervalos_rr([60, 120]), [1000.0, 500.0])
+
+    def test_variabilidad(self):
+        resultado = variabilidad(registros([60, 120, 60]))
+        rr = np.array([1000.0, 500.0, 1000.0])
+
+        self.assertAlmostEqual(resultado.get('rmssd'), 500.0)
+        self.assertAlmostEqual(resultado.get('sdnn'), rr.std(ddof=1))
+        self.assertEqual(variabilidad(registros([60])), {'rmssd': 0.0, 'sdnn': 0.0})
+
+    def test_tendencia(self):
+        # La frecuencia sube 1 latido por segundo: 60 por minuto; el resto no cambia
+        resultado = tendencia(registros(np.arange(70.0, 80.0)))
+
+        self.assertAlmostEqual(resultado.get('frecuencia'), 60.0)
+        self.assertAlmostEqual(resultado.get('sistolica'), 0.0)
+        self.assertAlmostEqual(resultado.get('oxigeno'), 0.0)
+        # Todos los datos en el mismo segundo
+        self.assertEqual(tendencia(registros([70, 80, 90], segundos=0)).get('frecuencia'), 0.0)
+
+    def test_espectro_banda_dominante(self):
+        t = np.arange(256.0)
+        for banda, frecuencia in (('lf', 0.1), ('hf', 0.25)):
+            with self.subTest(banda=banda):
+                resultado = espectro(registros(75 + 5 * np.sin(2 * np.pi * frecuencia * t)))
+                otras = [resultado.get(b) for b in BANDAS if b != banda]
+
+                self.assertGreater(resultado.get(banda), 10 * max(otras))
+        resultado = espectro(registros(75 + 5 * np.sin(2 * np.pi * 0.1 * t)))
+        self.assertGreater(resultado.get('lf_hf'), 10)
+
+    def test_espectro_pocos_datos(self):
+        self.assertEqual(espectro(registros([70, 80, 90])), {'vlf': 0.0, 'lf': 0.0, 'hf': 0.0, 'lf_hf': 0.0})
+        self.assertEqual(espectro(registros([70] * 10, segundos=0)).get('lf'), 0.0)
+
+    def test_metricas_en_orden(self):
+        for tipo, funcion in SENALES.items():
+            for ventana in (registros([60]), registros(np.arange(60.0, 90.0))):
+                self.assertEqual(tuple(funcion(ventana)), METRICAS[tipo])
+
+if __name__ == '__main__':
+    unittest.main()
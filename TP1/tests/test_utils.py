@@ -0,0 +1,64 @@
+import unittest
+from random import randint, seed
+from src.utils import media, desviacion, EstadisticaMovil
+
+class TestEstadisticaMovil(unittest.TestCase):
+    def test_vacia(self):
+        stats = EstadisticaMovil('frecuencia')
+
+        self.assertEqual(stats.media(), 0)
+        self.assertEqual(stats.desviacion(), 0)
+
+    def test_un_dato(self):
+        stats = EstadisticaMovil('presion')
+        stats.agregar([140, 85])
+
+        self.assertEqual(stats.media(), [140.0, 85.0])
+        self.assertEqual(stats.desviacion(), 0) # Igual que desviacion() con un solo dato
+
+    def test_frecuencia_2_datos(self):
+        stats = EstadisticaMovil('frecuencia')
+        stats.agregar(120)
+        stats.agregar(100)
+
+        self.assertEqual(stats.media(), 110.0)
+        self.assertEqual(stats.desviacion(), 14.142135623730951)
+
+    def test_ventana_deslizante_igual_a_numpy(self):
+        # Simula la ventana de leer_datos: se agrega el nuevo y se quita el más antiguo
+        seed(1)
+        for tipo in ('frecuencia', 'presion', 'oxigeno'):
+            with self.subTest(tipo=tipo):
+                stats = EstadisticaMovil(tipo)
+                ventana = []
+                for _ in range(500):
+                    valor = [randint(110, 220), randint(40, 110)] if tipo == 'presion' else randint(40, 220)
+                    ventana.append(valor)
+                    stats.agregar(valor)
+                    if len(ventana) > 30:
+                        stats.quitar(ventana.pop(0))
+                    if len(ventana) < 2:
+                        continue
+
+                    esperado_media = media(tipo, ventana)
+                    esperado_desv = desviacion(tipo, ventana)
+                    if tipo == 'presion':
+                        for c in range(2):
+                            self.assertAlmostEqual(stats.media()[c], esperado_media[c], places=9)
+                            self.assertAlmostEqual(stats.desviacion()[c], esperado_desv[c], places=9)
+                    else:
+                        self.assertAlmostEqual(stats.media(), esperado_media, places=9)
+                        self.assertAlmostEqual(stats.desviacion(), esperado_desv, places=9)
+
+    def test_quitar_hasta_vaciar(self):
+        stats = EstadisticaMovil('oxigeno')
+        stats.agregar(98)
+        stats.agregar(96)
+        stats.quitar(98)
+        stats.quitar(96)
+
+        self.assertEqual(len(stats), 0)
+        self.assertEqual(stats.media(), 0)
+
+if __name__ == '__main__':
+    unittest.main()
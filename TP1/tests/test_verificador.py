@@ -0,0 +1,73 @@
+import unittest, json, queue
+from unittest.mock import MagicMock
+from src.verificador import ReordenadorRondas, leer_rondas
+from src.memoria_compartida import ResultadosCompartidos
+
+def resultado(tipo, secuencia):
+    return {'tipo': tipo, 'timestamp': '2025-08-05T12:00:00', 'media': 100.0, 'desv': 0, 'secuencia': secuencia}
+
+class TestReordenadorRondas(unittest.TestCase):
+    def test_entrega_rondas_en_orden(self):
+        reordenador = ReordenadorRondas(total=3)
+
+        # La ronda 1 se completa antes que la 0: no se entrega hasta que llegue la 0
+        self.assertEqual(reordenador.agregar(resultado('frecuencia', 1)), [])
+        self.assertEqual(reordenador.agregar(resultado('presion', 1)), [])
+        self.assertEqual(reordenador.agregar(resultado('oxigeno', 1)), [])
+        self.assertEqual(reordenador.agregar(resultado('frecuencia', 0)), [])
+        self.assertEqual(reordenador.agregar(resultado('oxigeno', 0)), [])
+
+        rondas = reordenador.agregar(resultado('presion', 0))
+
+        self.assertEqual(len(rondas), 2)
+        self.assertEqual([r.get('secuencia') for r in rondas[0]], [0, 0, 0])
+        self.assertEqual([r.get('secuencia') for r in rondas[1]], [1, 1, 1])
+        self.assertEqual(len(reordenador), 0)
+
+    def test_leer_rondas_con_reordenador(self):
+        queue = MagicMock()
+        orden = [('presion', 0), ('presion', 1), ('frecuencia', 0), ('oxigeno', 0),
+                 ('oxigeno', 1), ('frecuencia', 1)]
+        queue.get.side_effect = [json.dumps(resultado(t, s)) for t, s in orden]
+
+        rondas = list(leer_rondas(queue, 2, ReordenadorRondas(total=3)))
+
+        self.assertEqual(len(rondas), 2)
+        self.assertEqual(sorted(r.get('tipo') for r in rondas[1]), ['frecuencia', 'oxigeno', 'presion'])
+
+    def test_leer_rondas_sin_reordenador(self):
+        queue = MagicMock()
+        queue.get.side_effect = [json.dumps(resultado(t, 0)) for t in ('frecuencia', 'presion', 'oxigeno')]
+
+        rondas = list(leer_rondas(queue, 1))
+
+        self.assertEqual(len(rondas), 1)
+        self.assertEqual(queue.get.call_count, 3)
+
+    def test_leer_rondas_en_lotes(self):
+        queue = MagicMock()
+        # Cada analizador envía un lote con las rondas 0 y 1
+        queue.get.side_effect = [json.dumps([resultado(t, 0), resultado(t, 1)]) for t in ('frecuencia', 'presion', 'oxigeno')]
+
+        rondas = list(leer_rondas(queue, 2))
+
+        self.assertEqual(len(rondas), 2)
+        self.assertEqual([r.get('secuencia') for r in rondas[1]], [1, 1, 1])
+
+    def test_leer_rondas_de_memoria_compartida(self):
+        tipos = ('frecuencia', 'presion', 'oxigeno')
+        resultados = ResultadosCompartidos(tipos, capacidad=8)
+        cola = queue.Queue()
+        for tipo in ('presion', 'frecuencia', 'oxigeno'):
+            resultados.enviar(cola, [resultado(tipo, 0), resultado(tipo, 1)])
+        for _ in tipos:
+            cola.put(None) # Fin de cada analizador
+
+        rondas = list(leer_rondas(cola, None, ReordenadorRondas(total=3), resultados))
+        resultados.liberar()
+
+        self.assertEqual(len(rondas), 2)
+        self.assertIn(resultado('oxigeno', 1), rondas[1])
+
+if __name__ == '__main__':
+    unittest.main()
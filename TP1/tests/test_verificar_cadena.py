@@ -0,0 +1,253 @@
+import unittest, json, os, tempfile
+from unittest.mock import patch
+from src.blockchain import crear_bloque
+from src.almacenamiento import leer_json, AlmacenJSON, AlmacenJSONL
+from verificar_cadena import leer_datos, leer_datos_streaming, leer_datos_columnas, primer_bloque_invalido, probar_bloque, CheckpointInvalido
+from src.columnar import exportar_columnas
+from src.blockchain import calcular_hash, hash_valido, IndiceCheckpoints, leer_checkpoints
+
+def crear_cadena(cantidad):
+    cadena = []
+    prev_hash = '0' * 64
+    for i in range(cantidad):
+        datos = [
+            {'tipo': 'frecuencia', 'timestamp': f'2025-08-05T12:00:{i:02d}', 'media': 100.0 + i, 'desv': 0 if i == 0 else 1.5},
+            {'tipo': 'presion', 'timestamp': f'2025-08-05T12:00:{i:02d}', 'media': [120.0, 80.0 - i], 'desv': 0 if i == 0 else [2.0, 1.0]},
+            {'tipo': 'oxigeno', 'timestamp': f'2025-08-05T12:00:{i:02d}', 'media': 95.0, 'desv': 0 if i == 0 else 0.5},
+        ]
+        bloque = crear_bloque(datos, i % 2 == 0, prev_hash)
+        prev_hash = bloque.get('hash')
+        cadena.append(bloque)
+    return cadena
+
+class TestVerificarCadena(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def guardar(self, cadena, nombre='blockchain.json'):
+        ruta = os.path.join(self.dir.name, nombre)
+        almacen = AlmacenJSONL(ruta) if nombre.endswith('.jsonl') else AlmacenJSON(ruta)
+        for bloque in cadena:
+            almacen.agregar(bloque)
+        almacen.cerrar()
+        return ruta
+
+    def test_leer_json_incremental(self):
+        cadena = crear_cadena(5)
+        ruta = self.guardar(cadena)
+
+        # Trozos más chicos que un bloque: cada bloque se arma con varias lecturas
+        self.assertEqual(list(leer_json(ruta, tam_lectura=7)), cadena)
+
+    def test_leer_json_truncado(self):
+        ruta = os.path.join(self.dir.name, 'truncado.json')
+        with open(ruta, 'w') as f:
+            f.write(json.dumps(crear_cadena(2))[:-20])
+
+        with self.assertRaises(json.JSONDecodeError):
+            list(leer_json(ruta))
+
+    def test_streaming_igual_a_leer_datos(self):
+        cadena = crear_cadena(6)
+        for nombre in ('blockchain.json', 'blockchain.jsonl'):
+            with self.subTest(nombre=nombre):
+                ruta = self.guardar(cadena, nombre)
+
+                streaming, completo = leer_datos_streaming(ruta), leer_datos(ruta)
+                self.assertEqual(streaming[:2] + streaming[3:], completo[:2] + completo[3:])
+                for clave in ('medias', 'desviaciones'):
+                    self.assertEqual(streaming[2][clave], completo[2][clave])
+                cant, alertas, _, invalidos, primer_invalido = leer_datos_streaming(ruta)
+                self.assertEqual((cant, alertas, invalidos, primer_invalido), (6, 3, 0, None))
+
+    def test_bloque_alterado(self):
+        cadena = crear_cadena(6)
+        cadena[3]['datos']['frecuencia']['media'] = 500.0
+        ruta = self.guardar(cadena)
+
+        # El bloque 3 y todos los siguientes son inválidos
+        self.assertEqual(leer_datos_streaming(ruta)[3], 3)
+        self.assertEqual(leer_datos(ruta)[3], 3)
+        self.assertEqual(leer_datos_streaming(ruta)[2]['medias'], leer_datos(ruta)[2]['medias'])
+
+    def test_estadisticas_vectorizadas(self):
+        ruta = self.guardar(crear_cadena(5))
+        _, _, estadisticas, _, _ = leer_datos(ruta)
+
+        self.assertEqual(estadisticas['medias']['frecuencia'], 102.0)
+        self.assertEqual(estadisticas['medias']['presión diastólica'], 78.0)
+        self.assertEqual(estadisticas['desviaciones']['presión sistólica'], 1.6) # El primer bloque tiene desv 0
+        self.assertEqual(estadisticas['minimos']['frecuencia'], 100.0)
+        self.assertEqual(estadisticas['maximos']['presión diastólica'], 80.0)
+        self.assertEqual(estadisticas['percentiles']['p50']['frecuencia'], 102.0)
+        self.assertEqual(estadisticas['percentiles']['p99']['saturación de oxigeno'], 95.0)
+
+    def test_agrupar_por_minuto(self):
+        cadena = crear_cadena(4)
+        prev_hash = '0' * 64
+        for i, bloque in enumerate(cadena):
+            bloque['timestamp'] = f'2025-08-05T12:0{i // 2}:{i:02d}'
+            bloque['prev_hash'] = prev_hash
+            bloque['hash'] = prev_hash = calcular_hash(bloque)
+        ruta = self.guardar(cadena)
+        _, _, estadisticas, _, _ = leer_datos(ruta, agrupar='minuto')
+
+        self.assertEqual(estadisticas['por_minuto'], {
+            '2025-08-05T12:00:00': {'bloques': 2, 'frecuencia': 100.5, 'presión sistólica': 120.0, 'presión diastólica': 79.5, 'saturación de oxigeno': 95.0},
+            '2025-08-05T12:01:00': {'bloques': 2, 'frecuencia': 102.5, 'presión sistólica': 120.0, 'presión diastólica': 77.5, 'saturación de oxigeno': 95.0},
+        })
+        self.assertEqual(list(leer_datos(ruta, agrupar='hora')[2]['por_hora'].values())[0]['bloques'], 4)
+
+    def test_reglas_de_alerta(self):
+        ruta = self.guardar(crear_cadena(8))
+        # crear_cadena marca alerta en los bloques pares; con reglas se recalculan
+        reglas = [{'canal': 'frecuencia', 'op': '>=', 'umbral': 105}]
+
+        self.assertEqual(leer_datos(ruta)[1], 4)
+        self.assertEqual(leer_datos(ruta, reglas=reglas)[1], 3)
+        self.assertEqual(leer_datos_streaming(ruta, reglas=reglas)[1], 3)
+
+    def test_columnas_igual_a_leer_datos(self):
+        cadena = crear_cadena(8)
+        cadena[6]['datos']['frecuencia']['media'] = 500.0
+        ruta = self.guardar(cadena)
+        columnas = os.path.join(self.dir.name, 'blockchain.columnas')
+        exportar_columnas(ruta, columnas)
+        reglas = [{'canal': 'frecuencia', 'op': '>=', 'umbral': 103}]
+
+        self.assertEqual(leer_datos_columnas(columnas), leer_datos(ruta))
+        self.assertEqual(leer_datos_columnas(columnas, agrupar='minuto'), leer_datos(ruta, agrupar='minuto'))
+        self.assertEqual(leer_datos_columnas(columnas, reglas=reglas), leer_datos(ruta, reglas=reglas))
+
+    def test_paralelo_igual_a_secuencial(self):
+        cadena = crear_cadena(20)
+        ruta = self.guardar(cadena)
+
+        self.assertIsNone(primer_bloque_invalido(cadena, workers=3))
+        self.assertEqual(leer_datos(ruta, workers=3), leer_datos(ruta))
+
+    def test_paralelo_encuentra_el_primer_enlace_roto(self):
+        for roto in (0, 7, 8, 19):
+            with self.subTest(roto=roto):
+                cadena = crear_cadena(20)
+                # Bloque consistente consigo mismo (hash recalculado) pero desenganchado del anterior
+                cadena[roto]['prev_hash'] = 'f' * 64
+                cadena[roto]['hash'] = calcular_hash(cadena[roto])
+                # Un segundo bloque alterado más adelante no cambia el resultado
+                cadena[-1]['alerta'] = True
+                cadena[-1]['datos']['oxigeno']['media'] = 0.0
+                ruta = self.guardar(cadena)
+
+                self.assertEqual(primer_bloque_invalido(cadena, workers=2), roto)
+                secuencial = leer_datos(ruta)
+                self.assertEqual(secuencial[4], roto)
+                paralelo = leer_datos(ruta, workers=4)
+                # Con el bloque 0 roto las medias son nan (nan != nan): se comparan serializadas
+                self.assertEqual(json.dumps(paralelo), json.dumps(secuencial))
+
+    def checkpoints(self, cadena, intervalo):
+        ruta = os.path.join(self.dir.name, 'checkpoints.jsonl')
+        indice = IndiceCheckpoints(ruta, intervalo)
+        for bloque in cadena:
+            indice.agregar(bloque)
+        indice.cerrar()
+        return leer_checkpoints(ruta)
+
+    def test_checkpoints_solo_verifica_la_cola(self):
+        cadena = crear_cadena(10)
+        checkpoints = self.checkpoints(cadena, intervalo=4)
+        # Un cambio en la cola (después del bloque 7) se detecta
+        cadena[8]['datos']['oxigeno']['media'] = 0.0
+        ruta = self.guardar(cadena)
+
+        for leer in (lambda: leer_datos(ruta, checkpoints=checkpoints),
+                     lambda: leer_datos(ruta, workers=2, checkpoints=checkpoints),
+                     lambda: leer_datos_streaming(ruta, checkpoints)):
+            cant, _, _, invalidos, primer_invalido = leer()
+            self.assertEqual((cant, invalidos, primer_invalido), (10, 2, 8))
+
+    def test_checkpoints_cuerpo_alterado_en_tramo_cubierto(self):
+        cadena = crear_cadena(10)
+        checkpoints = self.checkpoints(cadena, intervalo=4)
+        # La raíz de Merkle sigue coincidiendo (solo cubre los hashes guardados)
+        cadena[2]['datos']['frecuencia']['media'] = 9999.0
+        ruta = self.guardar(cadena)
+
+        for leer in (lambda: leer_datos(ruta, checkpoints=checkpoints),
+                     lambda: leer_datos(ruta, workers=2, checkpoints=checkpoints),
+                     lambda: leer_datos_streaming(ruta, checkpoints)):
+            cant, _, medias, invalidos, primer_invalido = leer()
+            self.assertEqual((cant, invalidos, primer_invalido), (10, 8, 2))
+            self.assertEqual(medias['medias']['frecuencia'], 100.5)
+
+    def test_confiar_en_checkpoints_verifica_solo_la_cola(self):
+        cadena = crear_cadena(10)
+        checkpoints = self.checkpoints(cadena, intervalo=4)
+        # El cuerpo alterado en el tramo cubierto no se detecta, pero tampoco entra en las estadísticas
+        cadena[2]['datos']['frecuencia']['media'] = 9999.0
+        cadena[9]['datos']['oxigeno']['media'] = 0.0
+        ruta = self.guardar(cadena)
+
+        for leer in (lambda: leer_datos(ruta, checkpoints=checkpoints, confiar=True),
+                     lambda: leer_datos(ruta, workers=2, checkpoints=checkpoints, confiar=True),
+                     lambda: leer_datos_streaming(ruta, checkpoints, confiar=True)):
+            cant, alertas, medias, invalidos, primer_invalido = leer()
+            self.assertEqual((cant, invalidos, primer_invalido), (10, 1, 9))
+            self.assertEqual(medias.get('no_verificados'), 8)
+            self.assertEqual(medias['medias']['frecuencia'], 108.0)
+            self.assertEqual(alertas, 1) # Solo el bloque 8
+
+        with patch('verificar_cadena.hash_valido', wraps=hash_valido) as rehash:
+            leer_datos_streaming(ruta, checkpoints, confiar=True)
+        self.assertEqual(rehash.call_count, 2)
+
+    def test_checkpoints_que_no_coinciden(self):
+        cadena = crear_cadena(10)
+        checkpoints = self.checkpoints(cadena, intervalo=4)
+        # Se reemplaza un hash del tramo confiable: la raíz de Merkle ya no coincide
+        cadena[1]['hash'] = calcular_hash({**cadena[1], 'timestamp': 'otro'})
+        ruta = self.guardar(cadena)
+
+        with self.assertRaises(CheckpointInvalido):
+            leer_datos(ruta, checkpoints=checkpoints)
+        with self.assertRaises(CheckpointInvalido):
+            leer_datos_streaming(ruta, checkpoints)
+        # Cadena más corta que el último checkpoint
+        with self.assertRaises(CheckpointInvalido):
+            leer_datos(self.guardar(crear_cadena(5), 'corta.json'), checkpoints=checkpoints)
+
+    def test_probar_bloque(self):
+        cadena = crear_cadena(10)
+        checkpoints = self.checkpoints(cadena, intervalo=4)
+        cadena[6]['datos']['frecuencia']['media'] = 0.0
+        ruta = self.guardar(cadena, 'blockchain.jsonl')
+
+        self.assertTrue(probar_bloque(ruta, 5, checkpoints))
+        self.assertFalse(probar_bloque(ruta, 6, checkpoints))
+        with self.assertRaises(IndexError):
+            probar_bloque(ruta, 9, checkpoints) # El último tramo no tiene checkpoint
+
+    def test_probar_bloque_lee_solo_su_tramo(self):
+        cadena = crear_cadena(10)
+        checkpoints = self.checkpoints(cadena, intervalo=4)
+        ruta = self.guardar(cadena, 'blockchain.jsonl')
+        # Sin índice de offsets se saltean las líneas anteriores al tramo sin decodificarlas
+        with patch('verificar_cadena.loads', wraps=json.loads) as decodificar:
+            self.assertTrue(probar_bloque(ruta, 5, checkpoints))
+        self.assertEqual(decodificar.call_count, 4)
+
+        # Con índice de offsets se va directo al tramo
+        ruta = os.path.join(self.dir.name, 'indexada.json')
+        almacen = AlmacenJSON(ruta, offsets=True)
+        for bloque in cadena:
+            almacen.agregar(bloque)
+        almacen.cerrar()
+        with patch('verificar_cadena.iterar_bloques', side_effect=AssertionError):
+            self.assertTrue(probar_bloque(ruta, 6, checkpoints))
+            self.assertTrue(probar_bloque(ruta, 2, checkpoints))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,77 +1,422 @@
-from json import loads, dumps, dump
-from hashlib import sha256
-from numpy import mean
+import argparse, os
+from itertools import islice
+from json import loads, dump
+from multiprocessing import Pool
+import numpy as np
+from src.almacenamiento import iterar_bloques, leer_jsonl
+from src.alertas import MotorAlertas, matriz_bloques, cargar_reglas
+from src.blockchain import hash_valido, raiz_merkle, prueba_merkle, verificar_bloque, leer_checkpoints
+from src.columnar import cargar_columnas, CANALES_PRESION
+from src.consultas import CadenaIndexada, ruta_offsets
 
-def signal_data_mean(data_type:str,signals:list,pres_signal:int=-1):
-    if pres_signal == -1:
-        return round(float(mean([signal.get(data_type) for signal in signals])),2)
-    else:
-        return round(float(mean([signal.get(data_type)[pres_signal] for signal in signals])),2)
+def canal(valor, indice:int=-1):
+    # La presión guarda [sistólica, diastólica], salvo la desviación de una ventana con un solo
+    # dato, que el analizador guarda como 0 (se usa el mismo valor para ambos canales)
+    if indice == -1 or not isinstance(valor, list):
+        return valor
+    return valor[indice]
 
-def leer_datos():
-    with open('blockchain.json','r') as blockchain:
-        data = loads(blockchain.read())
+class CheckpointInvalido(Exception):
+    '''
+    La cadena no coincide con el índice de checkpoints (hashes o raíces de Merkle distintas, o
+    una cadena más corta que el último checkpoint). Hay que verificarla completa.
+    '''
 
-    cant = len(data)
+class Validador:
+    '''
+    Valida los bloques de la cadena de a uno, en orden, recordando el hash calculado del
+    bloque anterior.
 
-    hash_calc = '0'*64
-    alert_num = 0
-    invalid_hashes = 0
-    frec_signals = []
-    pres_signals = []
-    oxig_signals = []
-    for block in data:
-        cuerpo = block.get('datos')
-        timestamp = block.get('timestamp')
+    Si se pasan checkpoints (ver `src.blockchain.IndiceCheckpoints`), además se comprueba que los
+    hashes guardados de cada tramo hasta el último checkpoint den la raíz de Merkle del
+    checkpoint; si algo no coincide se lanza `CheckpointInvalido`. La raíz solo cubre los hashes
+    guardados, así que el hash de cada bloque se recalcula igual a partir de su cuerpo.
+
+    Con `confiar` los bloques cubiertos por los checkpoints no se recalculan: solo se comprueban
+    sus hashes guardados contra las raíces de Merkle y se verifica la cola posterior al último
+    checkpoint. Como su cuerpo no se verificó, esos bloques no se consideran válidos (no entran en
+    las estadísticas) sino que se cuentan en `no_verificados`.
+    '''
+    def __init__(self, checkpoints:list=None, confiar:bool=False):
+        self.hash_calc = '0'*64
+        self.invalid_hashes = 0
+        self.cant = 0
+        self.confiar = confiar
+        self.no_verificados = 0
+        self.primer_invalido = None # Índice del primer bloque inválido (donde se rompe la cadena)
+        self.checkpoints = checkpoints if checkpoints and checkpoints[0].get('inicio') == 0 else []
+        self.siguiente_checkpoint = 0
+        self.tramo = [] # Hashes guardados del tramo confiable actual
+
+    def inicio_cola(self) -> int:
+        '''
+        Índice del primer bloque posterior al último checkpoint.
+        '''
+        return self.checkpoints[-1].get('bloque') + 1 if self.checkpoints else 0
+
+    def finalizar(self):
+        if self.cant < self.inicio_cola():
+            raise CheckpointInvalido
+
+    def comprobar_checkpoint(self, block:dict):
+        self.tramo.append(block.get('hash'))
+        checkpoint = self.checkpoints[self.siguiente_checkpoint]
+        if self.cant - 1 == checkpoint.get('bloque'):
+            if block.get('hash') != checkpoint.get('hash') or raiz_merkle(self.tramo) != checkpoint.get('merkle'):
+                raise CheckpointInvalido
+            self.tramo = []
+            self.siguiente_checkpoint += 1
+
+    def validar(self, block:dict) -> bool:
+        self.cant += 1
+        if self.cant <= self.inicio_cola():
+            self.comprobar_checkpoint(block)
+            if self.confiar:
+                # El último hash del tramo es el del checkpoint: con él se verifica el primero de la cola
+                self.hash_calc = block.get('hash')
+                self.no_verificados += 1
+                return False
         prev_hash = block.get('prev_hash')
-        # Es imposible que el hash previo sea distinto al calculado anteriormente. 
+        # Es imposible que el hash previo sea distinto al calculado anteriormente.
         # Si esto sucede, el resto serán invalidos y no hay necesidad que calcularlos.
-        # Además, si hubiese un hash incorrecto, no tiene sentido leer el resto de 
-        # datos, estos serán también invalidos. Entonces estos datos se 
+        # Además, si hubiese un hash incorrecto, no tiene sentido leer el resto de
+        # datos, estos serán también invalidos. Entonces estos datos se
         # leen solo si el hash es válido
-        if prev_hash == hash_calc:
-            hash_input = prev_hash + dumps(cuerpo, sort_keys=True) + timestamp
-            hash_calc = sha256(hash_input.encode()).hexdigest()
-            
-            if hash_calc == block.get('hash'):
-                alert = block.get('alerta')
-                if alert:
-                    alert_num+=1 
-
-                frec_signals.append(cuerpo.get('frecuencia'))
-                pres_signals.append(cuerpo.get('presion'))
-                oxig_signals.append(cuerpo.get('oxigeno'))
-            else:
-                invalid_hashes += 1
-                hash_calc = 'invalid'
+        if prev_hash == self.hash_calc and hash_valido(block):
+            self.hash_calc = block.get('hash')
+            return True
+        if self.primer_invalido is None:
+            self.primer_invalido = self.cant - 1
+        self.invalid_hashes += 1
+        self.hash_calc = 'invalid'
+        return False
+
+def verificar_tramo(tramo:tuple):
+    '''
+    Verifica un tramo de la cadena en un proceso del pool. Como cada bloque guarda su `prev_hash`,
+    alcanza con conocer el hash guardado del bloque anterior al tramo para verificarlo sin
+    depender del resto.
+
+    Parameters
+    ----------
+    tramo : tuple
+        (índice del primer bloque, hash guardado del bloque anterior, lista de bloques del tramo)
+
+    Returns
+    -------
+    int or None
+        Índice (global) del primer bloque inválido del tramo, o None si todos son válidos.
+    '''
+    inicio, hash_anterior, bloques = tramo
+    for i, block in enumerate(bloques):
+        if block.get('prev_hash') != hash_anterior or not hash_valido(block):
+            return inicio + i
+        hash_anterior = block.get('hash')
+    return None
+
+def primer_bloque_invalido(data:list, workers:int=1, inicio:int=0):
+    '''
+    Busca el primer bloque inválido de la cadena repartiendo la verificación de hashes entre
+    `workers` procesos. Un bloque es válido si su `prev_hash` coincide con el hash del anterior
+    y su hash recalculado coincide con el guardado: es el mismo criterio que `Validador`, así que
+    el resultado es el mismo que recorrer la cadena en orden. Se verifica desde el bloque `inicio`.
+
+    Returns
+    -------
+    int or None
+        Índice del primer bloque inválido, o None si la cadena es válida.
+    '''
+    tam = max(1, -(-(len(data) - inicio) // (workers * 4))) # Algunos tramos por proceso para repartir mejor
+    tramos = [
+        (i, data[i - 1].get('hash') if i > 0 else '0'*64, data[i:i + tam])
+        for i in range(inicio, len(data), tam)
+    ]
+    with Pool(workers) as pool:
+        invalidos = [i for i in pool.map(verificar_tramo, tramos) if i is not None]
+    return min(invalidos) if invalidos else None
+
+# Canales del reporte: (nombre en el reporte, tipo en el cuerpo del bloque, índice de presión)
+CANALES = (
+    ('frecuencia', 'frecuencia', -1),
+    ('presión sistólica', 'presion', 0),
+    ('presión diastólica', 'presion', 1),
+    ('saturación de oxigeno', 'oxigeno', -1),
+)
+
+# Columnas de la matriz del reporte: primero las medias y después las desviaciones de cada canal
+COLUMNAS = tuple((campo, tipo, indice) for campo in ('media', 'desv') for _, tipo, indice in CANALES)
+
+def columnas(bloques:list):
+    '''
+    Carga los cuerpos de los bloques una sola vez en una estructura columnar de NumPy.
+
+    Returns
+    -------
+    tuple
+        (timestamps, matriz): un arreglo datetime64[s] con el timestamp de cada bloque y una
+        matriz de len(COLUMNAS) x len(bloques) con una fila por columna de `COLUMNAS`.
+    '''
+    timestamps = np.array([block.get('timestamp') for block in bloques], dtype='datetime64[s]')
+    matriz = np.array(
+        [[canal(block.get('datos').get(tipo).get(campo), indice) for campo, tipo, indice in COLUMNAS] for block in bloques],
+        dtype=np.float64
+    ).reshape(len(bloques), len(COLUMNAS))
+    # Cada columna queda contigua en memoria (se reduce por filas en lugar de por columnas)
+    return timestamps, np.ascontiguousarray(matriz.T)
+
+def estadisticas(matriz:np.ndarray) -> dict:
+    '''
+    Calcula de una vez, vectorizado sobre la matriz de `columnas`, las medias y desviaciones
+    promedio de cada canal (las del reporte original) y el mínimo, máximo y percentiles 50/95/99
+    de las medias de cada canal.
+    '''
+    nombres = [nombre for nombre, _, _ in CANALES]
+    n = len(CANALES)
+    if matriz.shape[1] == 0:
+        # Sin bloques válidos no hay estadísticas (igual que numpy.mean de una lista vacía)
+        vacio = {nombre: float('nan') for nombre in nombres}
+        return {'medias': vacio, 'desviaciones': dict(vacio)}
+    promedios = np.round(matriz.mean(axis=1), 2)
+    minimos = matriz[:n].min(axis=1)
+    maximos = matriz[:n].max(axis=1)
+    percentiles = np.round(np.percentile(matriz[:n], (50, 95, 99), axis=1), 2)
+    return {
+        'medias': {nombre: float(promedios[i]) for i, nombre in enumerate(nombres)},
+        'desviaciones': {nombre: float(promedios[n + i]) for i, nombre in enumerate(nombres)},
+        'minimos': {nombre: round(float(minimos[i]), 2) for i, nombre in enumerate(nombres)},
+        'maximos': {nombre: round(float(maximos[i]), 2) for i, nombre in enumerate(nombres)},
+        'percentiles': {
+            f'p{p}': {nombre: float(percentiles[j][i]) for i, nombre in enumerate(nombres)}
+            for j, p in enumerate((50, 95, 99))
+        },
+    }
+
+def agregados_por_tiempo(timestamps:np.ndarray, matriz:np.ndarray, unidad:str='minuto') -> dict:
+    '''
+    Agrupa los bloques por minuto u hora y calcula, vectorizado, la cantidad de bloques y la
+    media de las medias de cada canal en cada intervalo.
+    '''
+    intervalos = timestamps.astype('datetime64[m]' if unidad == 'minuto' else 'datetime64[h]')
+    claves, indices = np.unique(intervalos, return_inverse=True)
+    cantidades = np.bincount(indices, minlength=len(claves))
+    agregados = {}
+    sumas = [np.bincount(indices, weights=matriz[i], minlength=len(claves)) for i in range(len(CANALES))]
+    for j, clave in enumerate(claves):
+        fila = {'bloques': int(cantidades[j])}
+        for i, (nombre, _, _) in enumerate(CANALES):
+            fila[nombre] = round(float(sumas[i][j] / cantidades[j]), 2)
+        agregados[str(clave.astype('datetime64[s]'))] = fila
+    return agregados
+
+def leer_datos(ruta:str='blockchain.json', workers:int=1, checkpoints:list=None, agrupar:str=None, reglas:list=None, confiar:bool=False):
+    '''
+    Verifica la cadena y calcula las estadísticas del reporte sobre sus bloques válidos. Con
+    `confiar` (ver `Validador`) la cantidad de bloques cubiertos por checkpoints que no se
+    verificaron se agrega a las estadísticas como 'no_verificados'.
+    '''
+    if ruta.endswith('.jsonl'):
+        data = list(leer_jsonl(ruta))
+    else:
+        with open(ruta,'r') as blockchain:
+            data = loads(blockchain.read())
+
+    validador = Validador(checkpoints, confiar)
+    if workers > 1:
+        # Las raíces de Merkle se comprueban en orden (solo con los hashes guardados) y los hashes
+        # se recalculan en paralelo desde el primer bloque (o desde la cola, con `confiar`); acá
+        # solo se leen los bloques válidos (los anteriores al primero inválido)
+        for block in data[:validador.inicio_cola()]:
+            validador.cant += 1
+            validador.comprobar_checkpoint(block)
+        validador.finalizar()
+        inicio = validador.inicio_cola() if confiar else 0
+        primer_invalido = primer_bloque_invalido(data, workers, inicio)
+        validos = data[inicio:] if primer_invalido is None else data[inicio:primer_invalido]
+        validador.cant = len(data)
+        validador.no_verificados = inicio
+        validador.invalid_hashes = len(data) - inicio - len(validos)
+        validador.primer_invalido = primer_invalido
+    else:
+        validos = [block for block in data if validador.validar(block)]
+        validador.finalizar()
+
+    if reglas is None:
+        alert_num = sum(1 for block in validos if block.get('alerta'))
+    else:
+        # Se vuelven a evaluar las alertas de toda la cadena con otras reglas, en un solo lote
+        alert_num = int(MotorAlertas(reglas).alertas(matriz_bloques(validos)).sum())
+    timestamps, matriz = columnas(validos)
+    general_means = estadisticas(matriz)
+    if agrupar is not None:
+        general_means[f'por_{agrupar}'] = agregados_por_tiempo(timestamps, matriz, agrupar)
+    if confiar:
+        general_means['no_verificados'] = validador.no_verificados
+    return validador.cant, alert_num, general_means, validador.invalid_hashes, validador.primer_invalido
+
+def nombre_columna(campo:str, tipo:str, indice:int) -> str:
+    # Nombre de una columna de `COLUMNAS` en el archivo columnar (ver `src.columnar`)
+    return f'{tipo if indice == -1 else CANALES_PRESION[indice]}.{campo}'
+
+def leer_datos_columnas(ruta:str='blockchain.columnas', agrupar:str=None, reglas:list=None):
+    '''
+    Igual que `leer_datos`, pero a partir de un archivo columnar (`exportar_cadena.py -f columnas`),
+    que ya se verificó al exportarlo: las columnas se mapean en memoria con `np.memmap` y no se
+    decodifica ningún bloque. La cantidad de bloques inválidos sale de los metadatos.
+    '''
+    nombres = [nombre_columna(*columna) for columna in COLUMNAS]
+    metadatos, datos = cargar_columnas(ruta, nombres)
+    timestamps = datos.get('timestamp').view('datetime64[s]')
+    matriz = np.vstack([datos.get(nombre) for nombre in nombres]).reshape(len(COLUMNAS), len(timestamps))
+    if reglas is None:
+        alert_num = int(np.count_nonzero(datos.get('alerta')))
+    else:
+        # Las primeras columnas son las medias en el orden de `src.alertas.CANALES`
+        alert_num = int(MotorAlertas(reglas).alertas(matriz[:len(CANALES)].T).sum())
+    general_means = estadisticas(matriz)
+    if agrupar is not None:
+        general_means[f'por_{agrupar}'] = agregados_por_tiempo(timestamps, matriz, agrupar)
+    return metadatos.get('bloques'), alert_num, general_means, metadatos.get('invalidos'), metadatos.get('primer_invalido')
+
+# Bloques que se acumulan en modo streaming antes de evaluar las reglas de alerta
+LOTE_ALERTAS = 4096
+
+def leer_datos_streaming(ruta:str='blockchain.json', checkpoints:list=None, reglas:list=None, confiar:bool=False):
+    '''
+    Igual que `leer_datos`, pero recorre la cadena de a un bloque (`iterar_bloques`) y acumula
+    sumas de las medias y desviaciones de cada canal en lugar de guardar todos los cuerpos, así
+    la memoria usada es constante sin importar el tamaño de la cadena.
+    '''
+    validador = Validador(checkpoints, confiar)
+    motor = MotorAlertas(reglas) if reglas is not None else None
+    pendientes = []
+    alert_num = 0
+    validos = 0
+    sumas = {'media': [0.0] * len(CANALES), 'desv': [0.0] * len(CANALES)}
+    for block in iterar_bloques(ruta):
+        if not validador.validar(block):
+            continue
+        cuerpo = block.get('datos')
+        if motor is not None:
+            pendientes.append(block)
+            if len(pendientes) == LOTE_ALERTAS:
+                alert_num += int(motor.alertas(matriz_bloques(pendientes)).sum())
+                pendientes = []
+        elif block.get('alerta'):
+            alert_num += 1
+        validos += 1
+        for campo, suma in sumas.items():
+            for i, (_, tipo, indice) in enumerate(CANALES):
+                suma[i] += canal(cuerpo.get(tipo).get(campo), indice)
+    validador.finalizar()
+    if motor is not None:
+        alert_num += int(motor.alertas(matriz_bloques(pendientes)).sum())
+
+    # Sin bloques válidos la media no está definida (igual que numpy.mean de una lista vacía)
+    promedio = lambda suma: round(suma / validos, 2) if validos else float('nan')
+    general_means = {
+        'medias': {nombre: promedio(sumas['media'][i]) for i, (nombre, _, _) in enumerate(CANALES)},
+        'desviaciones': {nombre: promedio(sumas['desv'][i]) for i, (nombre, _, _) in enumerate(CANALES)},
+    }
+    if confiar:
+        general_means['no_verificados'] = validador.no_verificados
+    return validador.cant, alert_num, general_means, validador.invalid_hashes, validador.primer_invalido
+
+def bloques_tramo(ruta:str, inicio:int, fin:int):
+    '''
+    Genera los bloques `inicio` a `fin` (incluido) sin decodificar los anteriores: con el índice
+    de offsets (main.py --offsets) se leen directamente; sin él, en una cadena .jsonl se saltean
+    las líneas anteriores sin decodificarlas. Un blockchain.json sin índice se recorre desde el
+    principio.
+    '''
+    if os.path.exists(ruta_offsets(ruta)):
+        with CadenaIndexada(ruta) as cadena:
+            yield from cadena.bloques(inicio, fin + 1)
+    elif ruta.endswith('.jsonl'):
+        with open(ruta, 'r', encoding='utf-8') as f:
+            for linea in islice((linea for linea in f if linea.strip()), inicio, fin + 1):
+                yield loads(linea)
+    else:
+        yield from islice(iterar_bloques(ruta), inicio, fin + 1)
+
+def probar_bloque(ruta:str, indice:int, checkpoints:list) -> bool:
+    '''
+    Verifica un único bloque con una prueba de Merkle contra el checkpoint que lo cubre, sin
+    recalcular los hashes del resto de la cadena: solo se leen los bloques de su tramo
+    (`bloques_tramo`).
+    '''
+    checkpoint = next((c for c in checkpoints if c.get('inicio') <= indice <= c.get('bloque')), None)
+    if checkpoint is None:
+        raise IndexError
+    inicio = checkpoint.get('inicio')
+    tramo = list(bloques_tramo(ruta, inicio, checkpoint.get('bloque')))
+    if len(tramo) != checkpoint.get('bloque') - inicio + 1:
+        return False
+    prueba = prueba_merkle([block.get('hash') for block in tramo], indice - inicio)
+    return verificar_bloque(tramo[indice - inicio], prueba, checkpoint)
+
+def generar_reporte(ruta:str='blockchain.json', streaming:bool=False, workers:int=1, checkpoints:list=None, agrupar:str=None, reglas:list=None, confiar:bool=False):
+    try:
+        if os.path.isdir(ruta):
+            # Archivo columnar: ya se verificó al exportarlo
+            resultado = leer_datos_columnas(ruta, agrupar, reglas)
         else:
-            invalid_hashes += 1
-            hash_calc = 'invalid'
-
-    general_means = {'medias':{
-        'frecuencia': signal_data_mean('media',frec_signals),
-        'presión sistólica': signal_data_mean('media',pres_signals,0),
-        'presión diastólica': signal_data_mean('media',pres_signals,1),
-        'saturación de oxigeno': signal_data_mean('media',oxig_signals)
-    },
-    'desviaciones':{
-        'frecuencia': signal_data_mean('desv',frec_signals),
-        'presión sistólica': signal_data_mean('desv',pres_signals,0),
-        'presión diastólica': signal_data_mean('desv',pres_signals,1),
-        'saturación de oxigeno': signal_data_mean('desv',oxig_signals)
-    }}
-    return cant, alert_num, general_means, invalid_hashes
-
-def generar_reporte():
-    cant, alert_num, general_means, invalid_hashes = leer_datos()
+            resultado = leer_datos_streaming(ruta, checkpoints, reglas, confiar) if streaming else leer_datos(ruta, workers, checkpoints, agrupar, reglas, confiar)
+    except CheckpointInvalido:
+        print('[!] La cadena no coincide con los checkpoints; se verifica completa.')
+        resultado = leer_datos_streaming(ruta, reglas=reglas) if streaming else leer_datos(ruta, workers, agrupar=agrupar, reglas=reglas)
+    cant, alert_num, general_means, invalid_hashes, primer_invalido = resultado
+    no_verificados = general_means.pop('no_verificados', 0)
     with open('reporte.txt','w',encoding='utf-8') as reporte:
+        if no_verificados:
+            reporte.write(f'Los bloques 1 a {no_verificados} (cubiertos por checkpoints) no se verificaron: solo se comprobaron sus hashes guardados con las raíces de Merkle. No entran en las estadísticas.\n')
         if invalid_hashes == 0:
-            reporte.write('Todos los bloques han sido correctamente encadenados.\n')
+            reporte.write('Todos los bloques verificados han sido correctamente encadenados.\n' if no_verificados else 'Todos los bloques han sido correctamente encadenados.\n')
         else:
             reporte.write(f'Hay datos corruptos. Total de datos corruptos: {invalid_hashes} (los datos invalidos son ignorados)\n')
+            reporte.write(f'Primer bloque inválido: {primer_invalido + 1}\n')
         reporte.write(f'Cantidad de bloques leídos: {cant}\n')
         reporte.write(f'Cantidad de alertas: {alert_num}\n')
         dump(general_means,reporte,indent=2,ensure_ascii=False)
 
 if __name__ == '__main__':
-    generar_reporte()
+    parser = argparse.ArgumentParser(
+        prog='python3 verificar_cadena.py',
+        description="Verifica la integridad de la cadena de bloques y genera reporte.txt."
+    )
+    parser.add_argument("-c", "--cadena", default="blockchain.json", help="Cadena a verificar (blockchain.json o una cadena .jsonl), o directorio de un archivo columnar (exportar_cadena.py -f columnas), que se lee mapeado en memoria.")
+    parser.add_argument("-s", "--streaming", action="store_true", help="Recorrer la cadena de a un bloque con memoria constante, sin cargarla completa.")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="Cantidad de procesos para verificar los hashes en paralelo (por tramos).")
+    parser.add_argument("--checkpoints", nargs="?", const="blockchain.checkpoints.jsonl", default=None, help="Índice de checkpoints (main.py --checkpoints K): además de recalcular el hash de cada bloque, se comprueba que los hashes guardados de cada tramo den la raíz de Merkle de su checkpoint.")
+    parser.add_argument("--confiar-checkpoints", action="store_true", help="Con --checkpoints, no recalcular los hashes de los bloques cubiertos (solo se comprueban sus hashes guardados con las raíces de Merkle) y verificar solo la cola posterior al último checkpoint. Los bloques cubiertos no entran en las estadísticas del reporte.")
+    parser.add_argument("--probar-bloque", type=int, default=None, metavar="N", help="Con --checkpoints, verificar solo el bloque N (numerado desde 1) con una prueba de Merkle y terminar.")
+    parser.add_argument("-a", "--agrupar", choices=("minuto", "hora"), default=None, help="Agregar al reporte las medias por minuto u hora.")
+    parser.add_argument("--reglas", default=None, help="Archivo JSON con reglas de alerta: las alertas del reporte se recalculan con esas reglas en lugar de contar las guardadas en los bloques.")
+    args = parser.parse_args()
+    if args.streaming and args.agrupar:
+        parser.error("--agrupar no se puede combinar con --streaming")
+    if args.workers < 1:
+        parser.error("--workers debe ser al menos 1")
+    if args.streaming and args.workers > 1:
+        parser.error("--workers no se puede combinar con --streaming")
+
+    if args.confiar_checkpoints and not args.checkpoints:
+        parser.error("--confiar-checkpoints necesita --checkpoints")
+    if os.path.isdir(args.cadena) and (args.streaming or args.workers > 1 or args.checkpoints):
+        parser.error("un archivo columnar ya está verificado: no admite --streaming, --workers ni --checkpoints")
+
+    try:
+        checkpoints = leer_checkpoints(args.checkpoints) if args.checkpoints else None
+    except (OSError, ValueError) as error:
+        parser.error(f"no se puede leer el índice de checkpoints: {error}")
+
+    if args.probar_bloque is not None:
+        if not checkpoints:
+            parser.error("--probar-bloque necesita --checkpoints")
+        try:
+            valido = probar_bloque(args.cadena, args.probar_bloque - 1, checkpoints)
+        except IndexError:
+            parser.error(f"el bloque {args.probar_bloque} no está cubierto por ningún checkpoint")
+        print(f'[+] Bloque {args.probar_bloque}: {"válido" if valido else "INVÁLIDO"}')
+    else:
+        reglas = cargar_reglas(args.reglas) if args.reglas else None
+        generar_reporte(args.cadena, args.streaming, args.workers, checkpoints, args.agrupar, reglas, args.confiar_checkpoints)